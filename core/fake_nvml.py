@@ -0,0 +1,77 @@
+"""Поддельная реализация NVML для тестов и замеров без видеокарты.
+
+Повторяет ту часть API pynvml, которую использует core/gpu.py, и
+считает вызовы, чтобы можно было проверить кэширование сессии.
+"""
+import random
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+NVML_TEMPERATURE_GPU = 0
+NVML_CLOCK_GRAPHICS = 0
+
+
+class NVMLError(Exception):
+    pass
+
+
+class FakeNVML:
+    NVML_TEMPERATURE_GPU = NVML_TEMPERATURE_GPU
+    NVML_CLOCK_GRAPHICS = NVML_CLOCK_GRAPHICS
+    NVMLError = NVMLError
+
+    def __init__(self, device_count=2, latency=0.0, seed=0):
+        self.device_count = device_count
+        self.latency = latency  # Имитация стоимости вызова драйвера, сек
+        self.calls = Counter()
+        self.initialized = False
+        self._random = random.Random(seed)
+
+    def _call(self, name):
+        self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if name != 'nvmlInit' and not self.initialized:
+            raise NVMLError("NVML не инициализирована")
+
+    def _check_handle(self, handle):
+        if not 0 <= handle < self.device_count:
+            raise NVMLError(f"Неверный дескриптор устройства: {handle}")
+
+    def nvmlInit(self):
+        self._call('nvmlInit')
+        self.initialized = True
+
+    def nvmlShutdown(self):
+        self._call('nvmlShutdown')
+        self.initialized = False
+
+    def nvmlDeviceGetCount(self):
+        self._call('nvmlDeviceGetCount')
+        return self.device_count
+
+    def nvmlDeviceGetHandleByIndex(self, index):
+        self._call('nvmlDeviceGetHandleByIndex')
+        self._check_handle(index)
+        return index
+
+    def nvmlDeviceGetName(self, handle):
+        self._call('nvmlDeviceGetName')
+        self._check_handle(handle)
+        return f"Fake GPU {handle}"
+
+    def nvmlDeviceGetTemperature(self, handle, sensor):
+        self._call('nvmlDeviceGetTemperature')
+        self._check_handle(handle)
+        return self._random.randint(35, 90)
+
+    def nvmlDeviceGetClockInfo(self, handle, clock_type):
+        self._call('nvmlDeviceGetClockInfo')
+        self._check_handle(handle)
+        return self._random.randint(300, 2100)
+
+    def nvmlDeviceGetUtilizationRates(self, handle):
+        self._call('nvmlDeviceGetUtilizationRates')
+        self._check_handle(handle)
+        return SimpleNamespace(gpu=self._random.randint(0, 100), memory=self._random.randint(0, 100))
@@ -0,0 +1,176 @@
+"""Признаки по скользящим окнам истории метрик.
+
+Для каждой метрики и каждого окна (в секундах) поддерживаются среднее,
+максимум, дисперсия и наклон (тренд, единиц в секунду, по методу
+наименьших квадратов). Суммы обновляются при каждом отсчёте за O(1):
+новый отсчёт прибавляется, вышедший из окна - вычитается; максимум
+хранится монотонной очередью (амортизированно O(1)).
+
+WindowedFeatures подключается к MetricsStore через attach() и получает
+каждый добавленный отсчёт, окна не пересчитываются заново.
+"""
+import math
+import threading
+from collections import deque
+from typing import NamedTuple
+
+import numpy as np
+
+from core.history import METRICS
+
+DEFAULT_WINDOWS = (60.0, 300.0)
+
+
+class WindowStats(NamedTuple):
+    """Агрегаты окна по каждой метрике (NaN - нет данных)."""
+    count: np.ndarray
+    mean: np.ndarray
+    max: np.ndarray
+    var: np.ndarray
+    slope: np.ndarray
+
+
+class RollingWindow:
+    """Скользящее окно длиной seconds секунд по width метрикам."""
+
+    def __init__(self, seconds, width):
+        self.seconds = seconds
+        self.width = width
+        self._entries = deque()  # (время, значения, маска наличия)
+        self._maxima = [deque() for _ in range(width)]  # (время, значение), значения убывают
+        self._origin = None  # Начало отсчёта времени для сумм
+        self._updates = 0
+        self._reset_sums()
+
+    def _reset_sums(self):
+        self._n = np.zeros(self.width)
+        self._sx = np.zeros(self.width)
+        self._sxx = np.zeros(self.width)
+        self._st = np.zeros(self.width)
+        self._stt = np.zeros(self.width)
+        self._stx = np.zeros(self.width)
+
+    def _accumulate(self, t, x, valid, sign):
+        # Отсутствующие значения не участвуют ни в одной сумме
+        x = np.where(valid, x, 0.0)
+        t = np.where(valid, t - self._origin, 0.0)
+        self._n += sign * valid
+        self._sx += sign * x
+        self._sxx += sign * x * x
+        self._st += sign * t
+        self._stt += sign * t * t
+        self._stx += sign * t * x
+
+    def _recompute(self):
+        """Пересчёт сумм по записям окна: убирает накопленную ошибку округления."""
+        self._origin = self._entries[0][0] if self._entries else None
+        self._reset_sums()
+        for t, x, valid in self._entries:
+            self._accumulate(t, x, valid, 1.0)
+
+    def add(self, timestamp, values):
+        values = np.asarray(values, dtype=np.float64)
+        valid = ~np.isnan(values)
+        if self._origin is None:
+            self._origin = timestamp
+
+        self._entries.append((timestamp, values, valid))
+        self._accumulate(timestamp, values, valid, 1.0)
+        for i in np.flatnonzero(valid):
+            maxima = self._maxima[i]
+            value = values[i]
+            while maxima and maxima[-1][1] <= value:
+                maxima.pop()
+            maxima.append((timestamp, value))
+
+        self.evict(timestamp)
+        # Раз в несколько длин окна суммы пересчитываются с новым началом
+        # отсчёта времени - это O(1) в среднем на отсчёт
+        self._updates += 1
+        if self._updates >= 4 * max(len(self._entries), 16):
+            self._updates = 0
+            self._recompute()
+
+    def evict(self, now):
+        """Удаление отсчётов старше now - seconds."""
+        start = now - self.seconds
+        while self._entries and self._entries[0][0] <= start:
+            t, x, valid = self._entries.popleft()
+            self._accumulate(t, x, valid, -1.0)
+        for maxima in self._maxima:
+            while maxima and maxima[0][0] <= start:
+                maxima.popleft()
+        if not self._entries:
+            self._origin = None
+            self._reset_sums()
+
+    def stats(self):
+        n = self._n
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = self._sx / n
+            var = np.maximum(self._sxx / n - mean * mean, 0.0)
+            # Наклон МНК: cov(t, x) / var(t)
+            t_var = self._stt / n - (self._st / n) ** 2
+            slope = np.where(t_var > 1e-12, (self._stx / n - self._st / n * mean) / t_var, np.nan)
+        maximum = np.array([m[0][1] if m else math.nan for m in self._maxima])
+        empty = n == 0
+        return WindowStats(
+            count=n.astype(np.int64),
+            mean=np.where(empty, np.nan, mean),
+            max=maximum,
+            var=np.where(empty, np.nan, var),
+            slope=np.where(n >= 2, slope, np.nan),
+        )
+
+
+class WindowedFeatures:
+    """Среднее, максимум, дисперсия и наклон метрик по нескольким окнам."""
+
+    STATS = ('mean', 'max', 'var', 'slope')
+
+    def __init__(self, windows=DEFAULT_WINDOWS, metrics=METRICS):
+        self.metrics = tuple(metrics)
+        self.windows = tuple(float(w) for w in windows)
+        self._rolling = {w: RollingWindow(w, len(self.metrics)) for w in self.windows}
+        self._latest = None
+        self._lock = threading.Lock()
+
+    def update(self, timestamp, values):
+        """Учёт нового отсчёта (values - в порядке metrics)."""
+        with self._lock:
+            if self._latest is not None and timestamp <= self._latest:
+                return  # Отсчёты приходят по возрастанию времени
+            self._latest = timestamp
+            for rolling in self._rolling.values():
+                rolling.add(timestamp, values)
+
+    def prime(self, times, values):
+        """Заполнение окон из сохранённой истории (times по возрастанию)."""
+        if len(times) == 0:
+            return
+        start = times[-1] - max(self.windows)
+        for t, row in zip(times.tolist(), values):
+            if t > start:
+                self.update(t, row)
+
+    def window(self, seconds=None, now=None) -> WindowStats:
+        """Агрегаты окна seconds (по умолчанию - самого короткого) на момент now."""
+        seconds = float(seconds or self.windows[0])
+        with self._lock:
+            rolling = self._rolling[seconds]
+            if now is not None:
+                rolling.evict(now)
+            return rolling.stats()
+
+    def vector(self, now=None):
+        """Все признаки одним вектором: окно x статистика x метрика."""
+        parts = []
+        for seconds in self.windows:
+            stats = self.window(seconds, now)
+            parts.extend(getattr(stats, name) for name in self.STATS)
+        return np.concatenate(parts)
+
+    def names(self):
+        """Имена элементов vector() вида 'cpu_temp_max_60s'."""
+        return [f"{metric}_{stat}_{seconds:g}s"
+                for seconds in self.windows for stat in self.STATS for metric in self.metrics]
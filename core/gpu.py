@@ -1,27 +1,173 @@
-from pynvml import *
+import atexit
+import importlib
+import os
+import threading
+
+
+class GPUBackend:
+    """Долгоживущая сессия NVML.
+
+    NVML инициализируется один раз, дескрипторы устройств и их имена
+    кэшируются, при каждом опросе читаются только изменяемые счётчики.
+    Вместо pynvml можно передать любой объект с тем же API (например,
+    core.fake_nvml.FakeNVML).
+    """
+
+    def __init__(self, nvml=None):
+        self._nvml = nvml
+        self._devices = None  # Список пар (дескриптор, имя)
+        self._lock = threading.Lock()
+
+    @property
+    def nvml(self):
+        if self._nvml is None:
+            self._nvml = importlib.import_module('pynvml')
+        return self._nvml
+
+    def open(self):
+        """Инициализация NVML и кэширование устройств (если ещё не сделано)."""
+        if self._devices is not None:
+            return
+        nvml = self.nvml
+        nvml.nvmlInit()  # Инициализируем библиотеку NVML
+        try:
+            devices = []
+            for i in range(nvml.nvmlDeviceGetCount()):
+                handle = nvml.nvmlDeviceGetHandleByIndex(i)
+                devices.append((handle, nvml.nvmlDeviceGetName(handle)))
+        except Exception:
+            nvml.nvmlShutdown()
+            raise
+        self._devices = devices
+
+    def close(self):
+        """Завершение сессии NVML."""
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        if self._devices is None:
+            return
+        self._devices = None
+        try:
+            self.nvml.nvmlShutdown()  # Завершаем работу с NVML
+        except Exception:
+            pass
+
+    def poll(self):
+        """Опрос всех видеокарт, возвращает список словарей."""
+        with self._lock:
+            self.open()
+            nvml = self.nvml
+            gpu_list = []  # Список для хранения данных о всех видеокартах
+
+            try:
+                for handle, gpu_name in self._devices:
+                    temperature = nvml.nvmlDeviceGetTemperature(handle, nvml.NVML_TEMPERATURE_GPU)
+                    clock_freq = nvml.nvmlDeviceGetClockInfo(handle, nvml.NVML_CLOCK_GRAPHICS)
+                    load = nvml.nvmlDeviceGetUtilizationRates(handle)
+
+                    gpu_list.append({
+                        "gpu": gpu_name,
+                        "load": load.gpu,  # Нагрузка GPU в %
+                        "ram_load": load.memory,  # Нагрузка памяти в %
+                        "temperature": temperature,  # Температура в градусах
+                        "chip": clock_freq,  # Частота графического чипа в МГц
+                    })
+            except Exception:
+                # Устройство пропало или драйвер перезапущен -
+                # сессия будет создана заново при следующем опросе
+                self._close()
+                raise
+
+            return gpu_list
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_gpu_backend():
+    """Общий экземпляр GPUBackend.
+
+    Если задана переменная окружения FAKE_NVML_GPUS, используется
+    поддельная NVML с указанным числом видеокарт.
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            fake_count = os.getenv('FAKE_NVML_GPUS')
+            if fake_count:
+                from core.fake_nvml import FakeNVML
+                _backend = GPUBackend(FakeNVML(int(fake_count)))
+            else:
+                _backend = GPUBackend()
+        return _backend
+
+
+def set_gpu_backend(backend):
+    """Подмена общего экземпляра GPUBackend (старый закрывается)."""
+    global _backend
+    with _backend_lock:
+        if _backend is not None and _backend is not backend:
+            _backend.close()
+        _backend = backend
+
 
 def monitor_gpu():
     """Мониторинг всех доступных видеокарт."""
-    nvmlInit()  # Инициализируем библиотеку NVML
-
-    device_count = nvmlDeviceGetCount()  # Получаем количество GPU
-    gpu_list = []  # Список для хранения данных о всех видеокартах
-
-    for i in range(device_count):
-        handle = nvmlDeviceGetHandleByIndex(i)
-        gpu_name = nvmlDeviceGetName(handle)
-        temperature = nvmlDeviceGetTemperature(handle, NVML_TEMPERATURE_GPU)
-        clock_freq = nvmlDeviceGetClockInfo(handle, NVML_CLOCK_GRAPHICS)
-        load = nvmlDeviceGetUtilizationRates(handle)
-
-        gpu_info = {
-            "gpu": gpu_name,
-            "load": load.gpu,  # Нагрузка GPU в %
-            "ram_load": load.memory,  # Нагрузка памяти в %
-            "temperature": temperature,  # Температура в градусах
-            "chip": clock_freq,  # Частота графического чипа в МГц
-        }
-        gpu_list.append(gpu_info)  # Добавляем данные в список
-
-    nvmlShutdown()  # Завершаем работу с NVML
-    return gpu_list  # Возвращаем список с информацией о всех видеокартах
+    return get_gpu_backend().poll()
+
+
+@atexit.register
+def _shutdown_backend():
+    if _backend is not None:
+        _backend.close()
+
+
+if __name__ == "__main__":
+    # Сравнение старого пути (init/shutdown на каждый вызов) с кэшированной сессией:
+    #   python -m core.gpu [число_GPU] [итераций] [задержка_вызова_мкс]
+    import sys
+    import time
+    from core.fake_nvml import FakeNVML
+
+    device_count = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    latency = float(sys.argv[3]) / 1e6 if len(sys.argv) > 3 else 0.0
+
+    def poll_uncached(nvml):
+        nvml.nvmlInit()
+        result = []
+        for i in range(nvml.nvmlDeviceGetCount()):
+            handle = nvml.nvmlDeviceGetHandleByIndex(i)
+            load = nvml.nvmlDeviceGetUtilizationRates(handle)
+            result.append({
+                "gpu": nvml.nvmlDeviceGetName(handle),
+                "load": load.gpu,
+                "ram_load": load.memory,
+                "temperature": nvml.nvmlDeviceGetTemperature(handle, nvml.NVML_TEMPERATURE_GPU),
+                "chip": nvml.nvmlDeviceGetClockInfo(handle, nvml.NVML_CLOCK_GRAPHICS),
+            })
+        nvml.nvmlShutdown()
+        return result
+
+    uncached = FakeNVML(device_count, latency)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        poll_uncached(uncached)
+    uncached_time = time.perf_counter() - started
+
+    cached = FakeNVML(device_count, latency)
+    backend = GPUBackend(cached)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        backend.poll()
+    cached_time = time.perf_counter() - started
+    backend.close()
+
+    print(f"GPU: {device_count}, итераций: {iterations}")
+    print(f"Без кэша: {uncached_time / iterations * 1e6:.1f} мкс/опрос, "
+          f"вызовов NVML: {sum(uncached.calls.values())}")
+    print(f"С кэшем:  {cached_time / iterations * 1e6:.1f} мкс/опрос, "
+          f"вызовов NVML: {sum(cached.calls.values())}")
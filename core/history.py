@@ -0,0 +1,241 @@
+"""Хранилище истории метрик в памяти.
+
+Все метрики хранятся в заранее выделенных кольцевых буферах NumPy
+(по столбцу на метрику плюс отметки времени) на нескольких уровнях
+разрешения, например 1 с за час и 1 мин за сутки. Графики, диагностика
+и экспорт читают историю отсюда, не опрашивая датчики повторно.
+"""
+import math
+import threading
+from typing import NamedTuple
+
+import numpy as np
+
+# Метрики в порядке признаков модели и столбцов журнала
+METRICS = ('cpu_usage', 'cpu_temp', 'gpu_usage', 'gpu_temp', 'disk_usage', 'ram_usage')
+
+# Коллектор SamplingEngine, из которого берётся каждая метрика
+METRIC_COLLECTORS = {
+    'cpu_usage': 'cpu', 'cpu_temp': 'cpu',
+    'gpu_usage': 'gpu', 'gpu_temp': 'gpu',
+    'disk_usage': 'hdd', 'ram_usage': 'ram',
+}
+
+# (разрешение в секундах, ёмкость); разрешение 0 - каждый отсчёт без агрегации
+DEFAULT_TIERS = ((0, 7200), (1, 3600), (60, 1440))
+
+
+def snapshot_metrics(snapshot, fresh=False):
+    """Значения METRICS из снимка SamplingEngine (нет данных - NaN).
+
+    При fresh=True NaN ставится и для метрик коллекторов, не опрошенных
+    в такте снимка (их значения в снимке - с прошлых тактов).
+    """
+    cpu = snapshot.cpu or {}
+    gpu = snapshot.gpu[0] if snapshot.gpu else {}
+    hdd = snapshot.hdd or {}
+    ram = snapshot.ram or {}
+
+    cpu_temp = None
+    coretemp = (cpu.get('temperatures') or {}).get('coretemp')
+    if coretemp:
+        cpu_temp = coretemp[0].get('current')
+
+    values = (
+        cpu.get('usage'), cpu_temp,
+        gpu.get('load'), gpu.get('temperature'),
+        hdd.get('percent'), ram.get('percent'),
+    )
+    if fresh:
+        values = [v if METRIC_COLLECTORS[name] in snapshot.collected else None
+                  for name, v in zip(METRICS, values)]
+    return np.array([math.nan if v is None else v for v in values], dtype=np.float64)
+
+
+class Window(NamedTuple):
+    """Окно истории: представления массивов без копирования."""
+    times: np.ndarray
+    mean: np.ndarray
+    min: np.ndarray
+    max: np.ndarray
+
+
+class RingBuffer:
+    """Кольцевой буфер фиксированной ёмкости с отметками времени.
+
+    Каждая запись хранится дважды (в позициях i и i + capacity), поэтому
+    последние n <= capacity записей всегда образуют непрерывный срез, и
+    окно возвращается как представление без копирования.
+    """
+
+    def __init__(self, capacity, width, dtype=np.float64):
+        self.capacity = capacity
+        self.width = width
+        self._times = np.full(2 * capacity, np.nan)
+        self._values = np.full((2 * capacity, width), np.nan, dtype=dtype)
+        self._next = 0  # Позиция следующей записи в [0, capacity)
+        self.count = 0
+
+    def append(self, timestamp, values):
+        """Добавление записи за O(1)."""
+        i = self._next
+        j = i + self.capacity
+        self._times[i] = self._times[j] = timestamp
+        self._values[i] = self._values[j] = values
+        self._next = (i + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def last(self, n=None):
+        """Последние n записей (все, если n не задано): (times, values)."""
+        n = self.count if n is None else min(n, self.count)
+        end = self._next + self.capacity
+        return self._times[end - n:end], self._values[end - n:end]
+
+    def since(self, timestamp):
+        """Записи с отметкой времени не раньше timestamp."""
+        times, values = self.last()
+        start = np.searchsorted(times, timestamp, side='left')
+        return times[start:], values[start:]
+
+
+class Tier:
+    """Уровень истории с разрешением resolution секунд.
+
+    Для каждого интервала хранятся min/max/mean всех метрик. Агрегаты
+    текущего интервала обновляются при каждом добавлении за O(1), в буфер
+    интервал попадает, когда приходит отсчёт из следующего интервала.
+    """
+
+    def __init__(self, resolution, capacity, width):
+        self.resolution = resolution
+        self.width = width
+        self.buffer = RingBuffer(capacity, width if resolution == 0 else 3 * width)
+        self._bucket = None
+        self._reset()
+
+    def _reset(self):
+        self._min = np.full(self.width, np.inf)
+        self._max = np.full(self.width, -np.inf)
+        self._sum = np.zeros(self.width)
+        self._count = np.zeros(self.width, dtype=np.int64)
+
+    def add(self, timestamp, values):
+        if self.resolution == 0:
+            self.buffer.append(timestamp, values)
+            return
+
+        bucket = math.floor(timestamp / self.resolution)
+        if self._bucket is not None and bucket != self._bucket:
+            self.flush()
+        self._bucket = bucket
+
+        # fmin/fmax пропускают NaN, пропуски не портят агрегаты
+        valid = ~np.isnan(values)
+        np.fmin(self._min, values, out=self._min)
+        np.fmax(self._max, values, out=self._max)
+        self._sum += np.where(valid, values, 0.0)
+        self._count += valid
+
+    def flush(self):
+        """Запись накопленного интервала в буфер."""
+        if self._bucket is None:
+            return
+        empty = self._count == 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = self._sum / self._count
+        record = np.concatenate([
+            np.where(empty, np.nan, mean),
+            np.where(empty, np.nan, self._min),
+            np.where(empty, np.nan, self._max),
+        ])
+        self.buffer.append(self._bucket * self.resolution, record)
+        self._bucket = None
+        self._reset()
+
+    def window(self, seconds=None, last=None):
+        if seconds is not None:
+            newest = self.buffer.last(1)[0]
+            if len(newest) == 0:
+                times, values = self.buffer.last(0)
+            else:
+                times, values = self.buffer.since(newest[0] - seconds)
+        else:
+            times, values = self.buffer.last(last)
+
+        if self.resolution == 0:
+            return Window(times, values, values, values)
+        w = self.width
+        return Window(times, values[:, :w], values[:, w:2 * w], values[:, 2 * w:])
+
+
+class MetricsStore:
+    """История метрик на нескольких уровнях разрешения.
+
+    Окна, возвращаемые window() и column(), - представления внутренних
+    буферов: они не копируются и со временем перезаписываются новыми
+    данными, поэтому для долгого хранения их нужно копировать.
+    """
+
+    def __init__(self, metrics=METRICS, tiers=DEFAULT_TIERS):
+        self.metrics = tuple(metrics)
+        self._index = {name: i for i, name in enumerate(self.metrics)}
+        self.tiers = [Tier(resolution, capacity, len(self.metrics)) for resolution, capacity in tiers]
+        self._lock = threading.Lock()
+        self._extractors = []
+
+    def attach(self, extractor):
+        """Подключение обработчика отсчётов (например, core.features.WindowedFeatures).
+
+        Обработчик заполняется из уже накопленной истории, затем получает
+        каждый новый отсчёт через update(timestamp, values).
+        """
+        with self._lock:
+            window = self.tiers[0].window(max(extractor.windows))
+            extractor.prime(window.times, window.mean)
+            self._extractors.append(extractor)
+        return extractor
+
+    def append(self, timestamp, values):
+        """Добавление отсчёта: values - последовательность в порядке metrics или словарь.
+
+        NaN (и отсутствующий ключ словаря) - метрика в этом отсчёте не
+        измерялась: агрегаты уровней и обработчики attach() её пропускают.
+        """
+        if isinstance(values, dict):
+            values = [values.get(name, math.nan) for name in self.metrics]
+        values = np.asarray(values, dtype=np.float64)
+        with self._lock:
+            for tier in self.tiers:
+                tier.add(timestamp, values)
+            for extractor in self._extractors:
+                extractor.update(timestamp, values)
+
+    def append_snapshot(self, snapshot, fresh=False):
+        """Добавление снимка SamplingEngine (fresh - см. snapshot_metrics)."""
+        self.append(snapshot.timestamp, snapshot_metrics(snapshot, fresh))
+
+    def window(self, seconds=None, tier=0, last=None) -> Window:
+        """Окно истории уровня tier: за последние seconds секунд или last записей."""
+        return self.tiers[tier].window(seconds, last)
+
+    def column(self, name, seconds=None, tier=0, stat='mean'):
+        """Одна метрика из окна: (times, values)."""
+        window = self.window(seconds, tier)
+        return window.times, getattr(window, stat)[:, self._index[name]]
+
+    def latest(self):
+        """Последние измеренные значения метрик самого подробного уровня в виде словаря.
+
+        Метрики, не опрошенные в последнем отсчёте (NaN), берутся из более
+        ранних отсчётов; timestamp - время последнего отсчёта.
+        """
+        with self._lock:
+            times, values = self.tiers[0].buffer.last()
+            if len(times) == 0:
+                return None
+            values = values[:, :len(self.metrics)]
+            valid = ~np.isnan(values)
+            # Индекс последнего не-NaN значения в каждом столбце
+            last = len(values) - 1 - np.argmax(valid[::-1], axis=0)
+            row = np.where(valid.any(axis=0), values[last, np.arange(len(self.metrics))], np.nan)
+            return dict(zip(self.metrics, row.tolist()), timestamp=float(times[-1]))
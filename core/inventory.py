@@ -0,0 +1,189 @@
+"""Кэш статических сведений об оборудовании.
+
+Данные, которые не меняются без перезагрузки (DMI, чипсет из lspci,
+тип памяти, вывод dmidecode), собираются один раз, сохраняются в
+небольшой JSON-файл и берутся оттуда, пока не сменится загрузка
+(boot_id) и отпечаток оборудования. Повторный сбор - только по явному
+запросу refresh() или при обнаружении изменений.
+"""
+import hashlib
+import json
+import os
+import subprocess
+import threading
+
+from core.moth import get_motherboard_info
+
+CACHE_VERSION = 1
+BOOT_ID_PATH = "/proc/sys/kernel/random/boot_id"
+DMI_PATH = "/sys/class/dmi/id/"
+DMI_FIELDS = ('board_vendor', 'board_name', 'board_version', 'bios_vendor', 'bios_version', 'bios_date')
+
+
+def default_cache_path():
+    cache_home = os.getenv('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(cache_home, 'pc-diagnostics', 'inventory.json')
+
+
+def _read_text(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return ''
+
+
+def read_boot_id():
+    return _read_text(BOOT_ID_PATH)
+
+
+def hardware_fingerprint():
+    """Хэш DMI-полей и объёма памяти - без запуска внешних программ."""
+    parts = [_read_text(os.path.join(DMI_PATH, name)) for name in DMI_FIELDS]
+    meminfo = _read_text('/proc/meminfo')
+    parts.append(meminfo.split('\n', 1)[0])  # MemTotal
+    return hashlib.sha256('\n'.join(parts).encode()).hexdigest()
+
+
+def detect_ram_type():
+    """Определение типа RAM без root-прав"""
+    # Метод 1: Через sysfs (если доступно)
+    if os.path.exists('/sys/class/dmi/id/modalias'):
+        try:
+            with open('/sys/class/dmi/id/modalias') as f:
+                modalias = f.read().lower()
+                if 'ddr4' in modalias: return 'DDR4'
+                elif 'ddr3' in modalias: return 'DDR3'
+        except:
+            pass
+
+    # Метод 2: Косвенное определение через CPU
+    try:
+        with open('/proc/cpuinfo') as f:
+            cpuinfo = f.read()
+            if 'Ryzen' in cpuinfo: return 'DDR4/DDR5'
+            elif 'Intel' in cpuinfo: return 'DDR3/DDR4'
+    except:
+        pass
+
+    return 'Unknown'
+
+
+def read_memory_modules():
+    """Тип и частота памяти из dmidecode (обычно требует root)."""
+    try:
+        # Пытаемся получить информацию о памяти, но не требуем прав root
+        output = subprocess.check_output(
+            ['dmidecode', '--type', 'memory'],
+            stderr=subprocess.DEVNULL  # Подавляем ошибки
+        ).decode('utf-8', errors='ignore')
+
+        return {
+            'type': next(
+                (line.split(':')[1].strip() for line in output.split('\n')
+                 if 'Type:' in line), 'Недоступно без прав root'
+            ),
+            'speed': next(
+                (line.split(':')[1].strip().split()[0] for line in output.split('\n')
+                 if 'Speed:' in line), 'Недоступно без прав root'
+            ),
+        }
+    except Exception:
+        # Если не получилось - используем значения по умолчанию
+        return {'type': 'Недоступно', 'speed': 'Недоступно'}
+
+
+class HardwareInventory:
+    """Статические сведения об оборудовании с кэшем на диске."""
+
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path or default_cache_path()
+        self._facts = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+
+    def facts(self, wait=True):
+        """Сведения об оборудовании.
+
+        При wait=False не блокирует: если сбор ещё не завершён
+        (например, идёт в фоне после load_async()), возвращает None.
+        """
+        if self._ready.is_set():
+            return self._facts
+        if not wait:
+            return None
+        with self._lock:
+            if not self._ready.is_set():
+                self._facts = self._load_cached() or self._collect()
+                self._ready.set()
+        return self._facts
+
+    def load_async(self, refresh=False):
+        """Загрузка (или повторный сбор) сведений в фоновом потоке."""
+        target = self.refresh if refresh else self.facts
+        threading.Thread(target=target, name='HardwareInventory', daemon=True).start()
+
+    def refresh(self):
+        """Принудительный повторный сбор сведений."""
+        with self._lock:
+            self._facts = self._collect()
+            self._ready.set()
+        return self._facts
+
+    def _load_cached(self):
+        try:
+            with open(self.cache_path) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if cached.get('version') != CACHE_VERSION:
+            return None
+
+        boot_id = read_boot_id()
+        if boot_id and cached.get('boot_id') == boot_id:
+            return cached['facts']
+
+        # Новая загрузка - проверяем, не поменялось ли оборудование
+        if cached.get('fingerprint') == hardware_fingerprint():
+            cached['boot_id'] = boot_id
+            self._save(cached)
+            return cached['facts']
+        return None
+
+    def _collect(self):
+        facts = {
+            'motherboard': get_motherboard_info(),
+            'ram_type': detect_ram_type(),
+            'memory_modules': read_memory_modules(),
+        }
+        self._save({
+            'version': CACHE_VERSION,
+            'boot_id': read_boot_id(),
+            'fingerprint': hardware_fingerprint(),
+            'facts': facts,
+        })
+        return facts
+
+    def _save(self, data):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = self.cache_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"Не удалось сохранить кэш оборудования: {e}")
+
+
+_inventory = None
+_inventory_lock = threading.Lock()
+
+
+def get_inventory():
+    """Общий экземпляр HardwareInventory."""
+    global _inventory
+    with _inventory_lock:
+        if _inventory is None:
+            _inventory = HardwareInventory()
+        return _inventory
@@ -0,0 +1,214 @@
+"""Определение состояния системы по правилам с порогами.
+
+Правила описываются в JSON (по умолчанию core/rules.json, другой файл
+задаётся переменной окружения RULES_FILE):
+
+    {"state": "Critical", "any": [["cpu_temp", ">=", 90], ["gpu_temp", ">=", 85]]}
+    {"state": "Warning", "all": [["cpu_usage", ">=", 95], ["cpu_temp", ">=", 60, 5]]}
+
+"any" - достаточно одного условия, "all" - нужны все. Четвёртый элемент
+условия (или общий словарь "hysteresis") - гистерезис: сработавшее
+условие снимается, только когда значение отойдёт от порога на эту
+величину, поэтому состояние не «дребезжит» около порога.
+
+Состояние - самое тяжёлое из сработавших правил ("default", если ни одно
+не сработало, "Error", если нет значения обязательной метрики).
+
+Правила компилируются в массивы порогов: label() размечает всю историю
+масками NumPy за один проход, evaluate() проверяет один отсчёт без NumPy.
+
+    python -m core.rules relabel <журнал.bin>
+"""
+import json
+import operator
+import os
+
+import numpy as np
+
+from core.history import METRICS
+
+DEFAULT_RULES_FILE = os.path.join(os.path.dirname(__file__), 'rules.json')
+
+# Порядок тяжести состояний; Error обрабатывается отдельно
+LEVELS = ('Normal', 'Warning', 'Critical')
+ERROR = 'Error'
+
+OPERATORS = {'>=': operator.ge, '>': operator.gt, '<=': operator.le, '<': operator.lt}
+
+
+def load_rules(path=None):
+    """Конфигурация правил из JSON (path, RULES_FILE или core/rules.json)."""
+    path = path or os.getenv('RULES_FILE') or DEFAULT_RULES_FILE
+    with open(path) as f:
+        return json.load(f)
+
+
+class RuleEngine:
+    """Скомпилированные правила состояния системы."""
+
+    def __init__(self, config, metrics=METRICS):
+        self.metrics = tuple(metrics)
+        index = {name: i for i, name in enumerate(self.metrics)}
+        self.default = LEVELS.index(config.get('default', 'Normal'))
+        self.required = [index[name] for name in config.get('required', ())]
+        hysteresis = config.get('hysteresis', {})
+
+        # Условия: столбец, оператор, порог, гистерезис (одинаковые условия не дублируются)
+        conditions = {}
+        rules = []  # (уровень, индексы условий, которые должны выполниться все)
+        for rule in config['rules']:
+            level = LEVELS.index(rule['state'])
+            parsed = []
+            for metric, op, threshold, *rest in rule.get('any', []) + rule.get('all', []):
+                if op not in OPERATORS:
+                    raise ValueError(f"Неизвестный оператор в правиле: {op}")
+                h = float(rest[0]) if rest else float(hysteresis.get(metric, 0.0))
+                key = (index[metric], op, float(threshold), h)
+                parsed.append(conditions.setdefault(key, len(conditions)))
+            if 'any' in rule:
+                rules.extend((level, [c]) for c in parsed[:len(rule['any'])])
+            if 'all' in rule:
+                rules.append((level, parsed[len(rule.get('any', [])):]))
+
+        self.conditions = list(conditions)
+        self.rules = sorted(rules, key=lambda r: -r[0])
+        self._columns = np.array([c[0] for c in self.conditions], dtype=np.int64)
+        self._thresholds = np.array([c[2] for c in self.conditions])
+        self._hysteresis = np.array([c[3] for c in self.conditions])
+        self._upper = np.array([c[1] in ('>=', '>') for c in self.conditions])
+        self._active = [False] * len(self.conditions)
+
+    @classmethod
+    def from_file(cls, path=None):
+        return cls(load_rules(path))
+
+    def reset(self):
+        """Сброс состояния гистерезиса для evaluate()."""
+        self._active = [False] * len(self.conditions)
+
+    def _condition_masks(self, X, active):
+        """Маски условий (n, число условий) с учётом гистерезиса."""
+        n = len(X)
+        values = X[:, self._columns]
+        on = np.zeros(values.shape, dtype=bool)
+        off = np.zeros(values.shape, dtype=bool)
+        for i, (_, op, threshold, h) in enumerate(self.conditions):
+            compare = OPERATORS[op]
+            with np.errstate(invalid='ignore'):
+                on[:, i] = compare(values[:, i], threshold)
+                # Условие снимается за порогом, сдвинутым на гистерезис
+                release = threshold - h if self._upper[i] else threshold + h
+                off[:, i] = ~compare(values[:, i], release) & ~np.isnan(values[:, i])
+        if not self._hysteresis.any():
+            return on
+
+        # Состояние триггера - последнее событие (включение или снятие) до строки
+        rows = np.arange(n)[:, None]
+        last_on = np.maximum.accumulate(np.where(on, rows, -1), axis=0)
+        last_off = np.maximum.accumulate(np.where(off, rows, -1), axis=0)
+        masks = last_on > last_off
+        no_event = (last_on < 0) & (last_off < 0)
+        masks[no_event] = np.broadcast_to(active, masks.shape)[no_event]
+        # Без гистерезиса условие определяется только текущим значением
+        plain = self._hysteresis == 0
+        masks[:, plain] = on[:, plain]
+        return masks
+
+    def label(self, X, active=None):
+        """Разметка истории: X (n, len(metrics)) -> (индексы состояний, состояние триггеров).
+
+        Индексы - позиции в LEVELS, len(LEVELS) - Error. active - состояние
+        триггеров после предыдущей части истории (для разметки частями).
+        """
+        X = np.asarray(X, dtype=np.float64)
+        active = np.zeros(len(self.conditions), dtype=bool) if active is None else np.asarray(active, dtype=bool)
+        masks = self._condition_masks(X, active)
+
+        levels = np.full(len(X), self.default, dtype=np.int8)
+        # Правила отсортированы от тяжёлых к лёгким: лёгкие не перекрывают тяжёлые
+        assigned = np.zeros(len(X), dtype=bool)
+        for level, conditions in self.rules:
+            hit = masks[:, conditions].all(axis=1) & ~assigned
+            levels[hit] = level
+            assigned |= hit
+
+        if self.required:
+            levels[np.isnan(X[:, self.required]).any(axis=1)] = len(LEVELS)
+        return levels, (masks[-1] if len(X) else active)
+
+    def label_states(self, X):
+        """Разметка истории названиями состояний."""
+        levels, _ = self.label(X)
+        return np.array([*LEVELS, ERROR], dtype=object)[levels]
+
+    def evaluate(self, values):
+        """Состояние одного отсчёта (метрики в порядке metrics, None - нет данных).
+
+        Учитывает гистерезис относительно предыдущих вызовов evaluate().
+        """
+        active = self._active
+        for i, (column, op, threshold, h) in enumerate(self.conditions):
+            value = values[column]
+            if value is None or value != value:
+                # Без данных условие с гистерезисом сохраняет состояние, без него - снимается
+                if not h:
+                    active[i] = False
+                continue
+            compare = OPERATORS[op]
+            if compare(value, threshold):
+                active[i] = True
+            elif active[i] and not compare(value, threshold - h if self._upper[i] else threshold + h):
+                active[i] = False
+
+        # Триггеры обновлены и при ошибке, как в label()
+        for i in self.required:
+            if values[i] is None or values[i] != values[i]:
+                return ERROR
+
+        for level, conditions in self.rules:
+            if all(active[c] for c in conditions):
+                return LEVELS[level]
+        return LEVELS[self.default]
+
+
+_engine = None
+
+
+def get_rule_engine():
+    """Общий экземпляр RuleEngine с правилами по умолчанию."""
+    global _engine
+    if _engine is None:
+        _engine = RuleEngine.from_file()
+    return _engine
+
+
+def relabel_log(path, engine=None, chunksize=1_000_000):
+    """Перезапись состояний в двоичном журнале по правилам (на месте, частями)."""
+    from data.logs.binlog import HEADER_SIZE, RECORD_DTYPE, STATE_CODES, open_log
+
+    engine = engine or RuleEngine.from_file()
+    count = len(open_log(path))
+    records = np.memmap(path, dtype=RECORD_DTYPE, mode='r+', offset=HEADER_SIZE, shape=(count,))
+    codes = np.array([STATE_CODES[name] for name in (*LEVELS, ERROR)], dtype=np.int8)
+
+    active = None
+    for start in range(0, count, chunksize):
+        chunk = records[start:start + chunksize]
+        X = np.column_stack([chunk[name] for name in engine.metrics]).astype(np.float64)
+        levels, active = engine.label(X, active)
+        chunk['system_state'] = codes[levels]
+    records.flush()
+    return count
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    if len(sys.argv) != 3 or sys.argv[1] != 'relabel':
+        print("Использование: python -m core.rules relabel <журнал.bin>")
+        sys.exit(1)
+    started = time.perf_counter()
+    count = relabel_log(sys.argv[2])
+    elapsed = time.perf_counter() - started
+    print(f"Размечено записей: {count} за {elapsed:.2f} с ({count / max(elapsed, 1e-9):,.0f} строк/с)")
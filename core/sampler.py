@@ -0,0 +1,263 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from types import MappingProxyType
+from typing import Any, NamedTuple, Optional
+
+import psutil
+
+from core.cpu import get_cpu_info
+from core.gpu import monitor_gpu
+from core.hdd import monitor_hdd
+from core.ram import monitor_ram
+from core.volt import get_voltage_info
+
+
+class Snapshot(NamedTuple):
+    """Неизменяемый снимок состояния системы за один такт."""
+    seq: int  # Номер такта (0 - данных ещё нет)
+    timestamp: float  # Время сбора (epoch)
+    cpu: Any = None
+    gpu: Any = None
+    ram: Any = None
+    hdd: Any = None
+    voltage: Any = None
+    collected: frozenset = frozenset()  # Коллекторы, опрошенные в этом такте
+
+
+def _freeze(value):
+    """Рекурсивно превращает словари и списки в неизменяемые аналоги."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class SamplingEngine:
+    """Единый фоновый сборщик метрик.
+
+    Каждый коллектор вызывается не чаще своего периода, коллекторы
+    одного такта работают параллельно с ограничением времени (TIMEOUTS).
+    Результат публикуется одним снимком Snapshot, который читают все экраны,
+    поток диагностики и экран тестирования. Только этот поток вызывает
+    psutil.cpu_percent(), поэтому его глобальное состояние не портится.
+
+    Опрашиваются только коллекторы, запрошенные через set_demand()
+    (видимый экран, идущая диагностика). Остальные собираются с периодом
+    background_interval, если он задан, иначе не собираются вовсе - без
+    запросов поток спит и не расходует процессор.
+    """
+
+    COLLECTORS = {
+        'cpu': get_cpu_info,
+        'gpu': monitor_gpu,
+        'ram': monitor_ram,
+        'hdd': monitor_hdd,
+        'voltage': get_voltage_info,
+    }
+
+    # Периоды опроса в секундах
+    PERIODS = {'cpu': 0.5, 'gpu': 0.5, 'ram': 0.5, 'hdd': 0.5, 'voltage': 2.0}
+
+    # Предельное время работы коллектора в секундах
+    TIMEOUTS = {'cpu': 2.0, 'gpu': 3.0, 'ram': 1.0, 'hdd': 2.0, 'voltage': 2.0}
+
+    # Коллекторы, из которых берутся метрики истории
+    HISTORY_COLLECTORS = frozenset(('cpu', 'gpu', 'ram', 'hdd'))
+
+    def __init__(self, periods=None, background_interval=None, timeouts=None, history=None):
+        self.periods = dict(self.PERIODS, **(periods or {}))
+        self.timeouts = dict(self.TIMEOUTS, **(timeouts or {}))
+        self.background_interval = background_interval
+        self.history = history  # MetricsStore, куда записывается каждый снимок
+        self._executor = None
+        self._running = {}  # Коллектор -> future, ещё не завершившийся после таймаута
+        self._listeners = []
+        self._cond = threading.Condition()
+        self._snapshot = Snapshot(seq=0, timestamp=0.0)
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._demand = {}  # Владелец -> множество нужных ему коллекторов
+        self._active = frozenset()
+        self._due = {}
+        self._collected_at = {}  # Время последнего опроса коллектора (monotonic)
+        self._failed = set()
+
+    def start(self):
+        """Запуск фонового потока сбора."""
+        if self._thread and self._thread.is_alive():
+            return
+        psutil.cpu_percent(interval=None)  # Первый вызов задаёт точку отсчёта
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name='SamplingEngine', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        """Остановка фонового потока."""
+        self._stopping = True
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def add_listener(self, callback):
+        """Подписка на завершение коллекторов: callback(name, started_at).
+
+        Вызывается из потока сборщика сразу по готовности данных коллектора,
+        до публикации общего снимка.
+        """
+        with self._cond:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._cond:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def set_demand(self, owner, names=()):
+        """Задаёт коллекторы, нужные владельцу (пустой набор снимает запрос).
+
+        Вновь запрошенные коллекторы опрашиваются сразу, не дожидаясь
+        очередного такта.
+        """
+        with self._cond:
+            if names:
+                self._demand[owner] = frozenset(names)
+            else:
+                self._demand.pop(owner, None)
+            active = frozenset().union(*self._demand.values())
+            for name in active - self._active:
+                self._due[name] = 0.0
+            self._active = active
+        self._wakeup.set()
+
+    def refresh(self, owner, names, timeout=None) -> Snapshot:
+        """Запрашивает коллекторы и ждёт снимок, собранный после запроса.
+
+        Запрос остаётся за владельцем до вызова set_demand(owner).
+        """
+        requested_at = time.monotonic()
+        with self._cond:
+            for name in names:
+                self._due[name] = 0.0
+        self.set_demand(owner, names)
+
+        with self._cond:
+            self._cond.wait_for(
+                lambda: all(self._collected_at.get(n, -1.0) >= requested_at for n in names),
+                timeout
+            )
+            return self._snapshot
+
+    def snapshot(self) -> Snapshot:
+        """Последний опубликованный снимок (без ожидания)."""
+        with self._cond:
+            return self._snapshot
+
+    def wait_for_update(self, after_seq=0, timeout=None) -> Snapshot:
+        """Ждёт снимок с номером больше after_seq и возвращает его."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._snapshot.seq > after_seq, timeout)
+            return self._snapshot
+
+    def _period(self, name):
+        """Текущий период опроса коллектора (None - не опрашивается)."""
+        if name in self._active:
+            return self.periods[name]
+        return self.background_interval
+
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.clear()
+            self.sample_once()
+
+            # Спим до ближайшего срока; без запросов - до пробуждения
+            now = time.monotonic()
+            waits = [
+                self._due.get(name, 0.0) - now
+                for name in self.COLLECTORS if self._period(name) is not None
+            ]
+            self._wakeup.wait(max(0.0, min(waits)) if waits else None)
+
+    def _report_error(self, name, message):
+        # Сообщаем только о первой ошибке подряд, чтобы не засорять вывод
+        if name not in self._failed:
+            print(f"Ошибка сбора данных ({name}): {message}")
+            self._failed.add(name)
+
+    def _notify(self, name, started_at):
+        with self._cond:
+            listeners = list(self._listeners)
+        for callback in listeners:
+            callback(name, started_at)
+
+    def sample_once(self) -> Snapshot:
+        """Один такт: параллельный опрос коллекторов, у которых подошёл срок."""
+        now = time.monotonic()
+        values = self._snapshot._asdict()
+        collected_at = {}
+        pending = {}  # future -> (имя, крайний срок)
+
+        for name, collector in self.COLLECTORS.items():
+            period = self._period(name)
+            if period is None or now < self._due.get(name, 0.0):
+                continue
+            # Зависший с прошлого такта коллектор повторно не запускаем
+            running = self._running.get(name)
+            if running is not None:
+                if not running.done():
+                    continue
+                del self._running[name]
+            self._due[name] = now + period
+            collected_at[name] = now
+            if self._executor is None:
+                # Коллекторы одного такта выполняются параллельно
+                self._executor = ThreadPoolExecutor(max_workers=len(self.COLLECTORS), thread_name_prefix='collector')
+            future = self._executor.submit(lambda c=collector: _freeze(c()))
+            pending[future] = (name, now + self.timeouts[name])
+
+        if not collected_at:
+            return self._snapshot
+
+        while pending:
+            nearest = min(deadline for _, deadline in pending.values())
+            done, _ = wait(pending, timeout=max(0.0, nearest - time.monotonic()), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                name, _ = pending.pop(future)
+                try:
+                    values[name] = future.result()
+                    self._failed.discard(name)
+                except Exception as e:
+                    self._report_error(name, e)
+                    values[name] = None
+                self._notify(name, collected_at[name])
+
+            now = time.monotonic()
+            for future in [f for f, (_, deadline) in pending.items() if deadline <= now]:
+                name, _ = pending.pop(future)
+                self._running[name] = future
+                self._report_error(name, f"превышено время ожидания {self.timeouts[name]} с")
+                values[name] = None
+                self._notify(name, collected_at[name])
+
+        values['seq'] += 1
+        values['timestamp'] = time.time()
+        values['collected'] = frozenset(collected_at)
+        snapshot = Snapshot(**values)
+
+        with self._cond:
+            self._snapshot = snapshot
+            self._collected_at.update(collected_at)
+            self._cond.notify_all()
+
+        # В историю - только метрики опрошенных в этом такте коллекторов,
+        # остальные значения снимка перенесены из прошлых тактов
+        if self.history is not None and self.HISTORY_COLLECTORS.intersection(collected_at):
+            self.history.append_snapshot(snapshot, fresh=True)
+        return snapshot
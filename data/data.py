@@ -1,52 +1,189 @@
-import datetime
-import csv
-import random
-
-
-def generate_balanced_data():
-    filename = 'system_data.csv'
-    header = ['timestamp', 'cpu_usage', 'cpu_temp', 'gpu_usage', 'gpu_temp', 'disk_usage', 'ram_usage', 'system_state']
-    
-    with open(filename, 'w', newline='') as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(header)
-
-        for _ in range(200):
-            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            cpu_usage = round(random.uniform(0, 100), 1)
-            cpu_temp = round(random.uniform(30, 69), 1)  # < 70
-            gpu_usage = round(random.uniform(0, 100), 1)
-            gpu_temp = round(random.uniform(40, 79), 1)  # < 80
-            disk_usage = round(random.uniform(10, 79), 1)  # < 80
-            ram_usage = round(random.uniform(20, 64), 1)  # < 65
-            system_state = "Normal"
-            row = [timestamp, cpu_usage, cpu_temp, gpu_usage, gpu_temp, disk_usage, ram_usage, system_state]
-            writer.writerow(row)
-        
-        for _ in range(200):
-            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            cpu_usage = round(random.uniform(0, 100), 1)
-            cpu_temp = round(random.uniform(70, 89), 1)  # 70 <= x < 90
-            gpu_usage = round(random.uniform(0, 100), 1)
-            gpu_temp = round(random.uniform(80, 84), 1)  # 80 <= x < 85
-            disk_usage = round(random.uniform(10, 98), 1)
-            ram_usage = round(random.uniform(20, 98), 1)
-            system_state = "Warning"
-            row = [timestamp, cpu_usage, cpu_temp, gpu_usage, gpu_temp, disk_usage, ram_usage, system_state]
-            writer.writerow(row)
-        
-        for _ in range(200):
-            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            cpu_usage = round(random.uniform(0, 100), 1)
-            cpu_temp = round(random.uniform(91, 105), 1)  # > 90
-            gpu_usage = round(random.uniform(0, 100), 1)
-            gpu_temp = round(random.uniform(86, 105), 1)  # > 85
-            disk_usage = round(random.uniform(10, 98), 1)
-            ram_usage = round(random.uniform(82, 98), 1)  # > 81
-            system_state = "Critical"
-            row = [timestamp, cpu_usage, cpu_temp, gpu_usage, gpu_temp, disk_usage, ram_usage, system_state]
-            writer.writerow(row)
-            
+"""Генерация синтетических данных для обучения и проверки модели.
+
+Столбцы генерируются целиком средствами NumPy частями по chunksize строк
+и сразу записываются в CSV или двоичный журнал (data/logs/binlog.py),
+поэтому память не зависит от числа строк.
+
+    python -m data.data system_data.csv --rows 1000000 --seed 1 --ratios 6,3,1 --correlation 0.6 --noise 2 --missing 0.01
+    python -m data.data system_data.bin --rows 10000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from core.history import METRICS
+from data.logs.binlog import CSV_HEADER, STATE_CODES, BinaryLogWriter, is_binary_log, make_records
+
+STATES = ('Normal', 'Warning', 'Critical')
+
+# Диапазоны равномерного распределения признаков для каждого состояния
+CLASS_PROFILES = {
+    'Normal': {
+        'cpu_usage': (0, 100), 'cpu_temp': (30, 69), 'gpu_usage': (0, 100),
+        'gpu_temp': (40, 79), 'disk_usage': (10, 79), 'ram_usage': (20, 64),
+    },
+    'Warning': {
+        'cpu_usage': (0, 100), 'cpu_temp': (70, 89), 'gpu_usage': (0, 100),
+        'gpu_temp': (80, 84), 'disk_usage': (10, 98), 'ram_usage': (20, 98),
+    },
+    'Critical': {
+        'cpu_usage': (0, 100), 'cpu_temp': (91, 105), 'gpu_usage': (0, 100),
+        'gpu_temp': (86, 105), 'disk_usage': (10, 98), 'ram_usage': (82, 98),
+    },
+}
+
+# Температура растёт вместе с нагрузкой соответствующего устройства
+CORRELATED = {'cpu_temp': 'cpu_usage', 'gpu_temp': 'gpu_usage'}
+
+CHUNK_ROWS = 100_000
+
+# Границы диапазонов: массивы (состояние, признак)
+_LOW = np.array([[CLASS_PROFILES[s][m][0] for m in METRICS] for s in STATES], dtype=np.float64)
+_HIGH = np.array([[CLASS_PROFILES[s][m][1] for m in METRICS] for s in STATES], dtype=np.float64)
+
+
+def class_counts(rows, ratios):
+    """Точное число строк каждого состояния: доли ratios от rows, остаток -
+    состояниям с наибольшими дробными частями."""
+    ratios = np.asarray(ratios, dtype=np.float64)
+    exact = rows * ratios / ratios.sum()
+    counts = np.floor(exact).astype(np.int64)
+    remainder = rows - counts.sum()
+    counts[np.argsort(counts - exact, kind='stable')[:remainder]] += 1
+    return counts
+
+
+def iter_chunks(rows, seed=None, ratios=(1, 1, 1), correlation=0.0, noise=0.0, missing=0.0,
+                start=None, interval=1.0, chunksize=CHUNK_ROWS, rule_labels=False, exact_counts=False):
+    """Синтетические данные частями: (timestamps, X, labels).
+
+    timestamps - секунды epoch (int64), X - матрица (n, 6) в порядке METRICS,
+    labels - индексы в STATES.
+
+    ratios - доли состояний Normal/Warning/Critical; состояние каждой строки
+    выбирается случайно с этими вероятностями, а при exact_counts=True
+    число строк каждого состояния точно равно class_counts(rows, ratios)
+    (метки np.repeat по состояниям, перемешанные с тем же seed);
+    correlation - от 0 до 1, насколько температура определяется нагрузкой
+    (при 1 температура линейно растёт с нагрузкой внутри диапазона состояния);
+    noise - СКО гауссова шума, добавляемого к признакам;
+    missing - доля значений, заменяемых на NaN;
+    rule_labels - метки по правилам core/rules.py (после шума и пропусков)
+    вместо исходного состояния. Без шума и пропусков они совпадают:
+    диапазоны CLASS_PROFILES согласованы с порогами правил.
+    Одинаковые seed и chunksize дают одинаковые данные.
+    """
+    ratios = np.asarray(ratios, dtype=np.float64)
+    if ratios.shape != (len(STATES),) or (ratios < 0).any() or ratios.sum() <= 0:
+        raise ValueError(f"Нужно {len(STATES)} неотрицательные доли состояний")
+    if not 0.0 <= correlation <= 1.0:
+        raise ValueError("correlation должен быть от 0 до 1")
+    ratios = ratios / ratios.sum()
+    start = int(time.time()) if start is None else int(start)
+    seeds = np.random.SeedSequence(seed)
+
+    all_labels = None
+    if exact_counts:
+        # Метки всего набора (int8 - байт на строку), затем части берут свои срезы
+        all_labels = np.repeat(np.arange(len(STATES), dtype=np.int8), class_counts(rows, ratios))
+        np.random.default_rng(seeds.spawn(1)[0]).shuffle(all_labels)
+
+    engine = None
+    if rule_labels:
+        from core.rules import RuleEngine, load_rules
+        # Строки независимы, поэтому гистерезис не применяется
+        engine = RuleEngine(dict(load_rules(), hysteresis={}))
+
+    columns = {name: i for i, name in enumerate(METRICS)}
+    for offset in range(0, rows, chunksize):
+        n = min(chunksize, rows - offset)
+        rng = np.random.default_rng(seeds.spawn(1)[0])
+
+        if all_labels is not None:
+            labels = all_labels[offset:offset + n].astype(np.intp)
+        else:
+            labels = rng.choice(len(STATES), size=n, p=ratios)
+        low, high = _LOW[labels], _HIGH[labels]
+        u = rng.random((n, len(METRICS)))
+        for target, source in CORRELATED.items():
+            t, s = columns[target], columns[source]
+            u[:, t] = correlation * u[:, s] + (1.0 - correlation) * u[:, t]
+        X = low + (high - low) * u
+
+        if noise:
+            X += rng.normal(0.0, noise, X.shape)
+            np.maximum(X, 0.0, out=X)
+        X = np.round(X, 1)
+        if missing:
+            X[rng.random(X.shape) < missing] = np.nan
+        if engine is not None:
+            levels, _ = engine.label(X)
+            # Строки без обязательных метрик (Error) остаются с исходной меткой
+            labels = np.where(levels < len(STATES), levels, labels)
+
+        timestamps = start + ((offset + np.arange(n)) * interval).astype(np.int64)
+        yield timestamps, X, labels
+
+
+def _write_csv(path, chunks):
+    from data.logs.binlog import to_local_datetime
+
+    names = np.array(STATES)
+    row_format = ','.join(['%s'] + ['%.1f'] * len(METRICS) + ['%s'])
+    with open(path, 'w', newline='') as f:
+        f.write(','.join(CSV_HEADER) + '\n')
+        for timestamps, X, labels in chunks:
+            times = [t.replace('T', ' ') for t in np.datetime_as_string(to_local_datetime(timestamps), unit='s').tolist()]
+            text = '\n'.join(row_format % row for row in zip(times, *X.T.tolist(), names[labels].tolist()))
+            # Пропуски в CSV - пустые поля, как у pd.read_csv
+            f.write(text.replace(',nan', ',') + '\n')
+
+
+def _write_binary(path, chunks):
+    codes = np.array([STATE_CODES[name] for name in STATES], dtype=np.int8)
+    with BinaryLogWriter(path) as writer:
+        for timestamps, X, labels in chunks:
+            writer.write(make_records(timestamps, X, codes[labels]))
+
+
+def generate_dataset(path, rows, binary=None, **options):
+    """Запись rows строк в path (CSV или двоичный журнал), возвращает время в секундах.
+
+    binary=None - формат по расширению: .bin - двоичный журнал, иначе CSV.
+    Существующий двоичный журнал дописывается, CSV перезаписывается.
+    Остальные параметры - как у iter_chunks().
+    """
+    if binary is None:
+        binary = path.endswith('.bin') or is_binary_log(path)
+    started = time.perf_counter()
+    (_write_binary if binary else _write_csv)(path, iter_chunks(rows, **options))
+    return time.perf_counter() - started
+
+
+def generate_balanced_data(filename='system_data.csv', rows_per_class=200, seed=None):
+    """Сбалансированный набор: ровно rows_per_class строк каждого состояния."""
+    generate_dataset(filename, rows_per_class * len(STATES), seed=seed, exact_counts=True)
     print(f"Сбалансированные данные сгенерированы и записаны в {filename}")
-    
-generate_balanced_data()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Генерация синтетических данных")
+    parser.add_argument('path', nargs='?', default='system_data.csv')
+    parser.add_argument('--rows', type=int, default=600)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--ratios', default='1,1,1', help="доли Normal,Warning,Critical")
+    parser.add_argument('--correlation', type=float, default=0.0)
+    parser.add_argument('--noise', type=float, default=0.0)
+    parser.add_argument('--missing', type=float, default=0.0)
+    parser.add_argument('--chunksize', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--rule-labels', action='store_true', help="метки по правилам core/rules.json")
+    parser.add_argument('--exact-counts', action='store_true', help="точное число строк каждого состояния по долям")
+    args = parser.parse_args()
+
+    elapsed = generate_dataset(
+        args.path, args.rows, seed=args.seed, ratios=[float(r) for r in args.ratios.split(',')],
+        correlation=args.correlation, noise=args.noise, missing=args.missing, chunksize=args.chunksize,
+        rule_labels=args.rule_labels, exact_counts=args.exact_counts,
+    )
+    print(f"Строк: {args.rows}, файл: {args.path}, время: {elapsed:.2f} с ({args.rows / max(elapsed, 1e-9):,.0f} строк/с)")
@@ -0,0 +1,370 @@
+"""Двоичный журнал метрик.
+
+Файл состоит из заголовка фиксированного размера и записей одинаковой
+длины: время (целые секунды epoch), метрики в порядке METRICS (float32)
+и код состояния системы (int8). Записи только дописываются в конец,
+а читаются через numpy.memmap без разбора текста: каждый столбец
+доступен как представление массива.
+
+Преобразование в CSV и обратно:
+    python -m data.logs.binlog to-bin system_data.csv system_data.bin
+    python -m data.logs.binlog to-csv system_data.bin system_data.csv
+"""
+import os
+import struct
+import time
+
+import numpy as np
+
+from core.history import METRICS
+
+MAGIC = b'PCDLOG\0\0'
+VERSION = 1
+HEADER = struct.Struct('<8sIII12x')  # magic, версия, размер записи, число метрик
+HEADER_SIZE = HEADER.size
+
+RECORD_DTYPE = np.dtype(
+    [('timestamp', '<i8')]
+    + [(name, '<f4') for name in METRICS]
+    + [('system_state', 'i1'), ('_pad', 'V3')]
+)
+
+# Коды состояний; -1 - состояние не определено
+STATES = ('Normal', 'Warning', 'Critical', 'Error')
+STATE_CODES = {name: code for code, name in enumerate(STATES)}
+NO_STATE = -1
+
+CSV_HEADER = ['timestamp', *METRICS, 'system_state']
+CSV_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _header_bytes():
+    return HEADER.pack(MAGIC, VERSION, RECORD_DTYPE.itemsize, len(METRICS))
+
+
+def is_binary_log(path):
+    """Проверка, что файл начинается с заголовка двоичного журнала."""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def _check_header(data, path):
+    if len(data) < HEADER_SIZE:
+        raise ValueError(f"{path}: файл не является двоичным журналом")
+    magic, version, record_size, metric_count = HEADER.unpack(data[:HEADER_SIZE])
+    if magic != MAGIC:
+        raise ValueError(f"{path}: файл не является двоичным журналом")
+    if version != VERSION or record_size != RECORD_DTYPE.itemsize or metric_count != len(METRICS):
+        raise ValueError(f"{path}: неподдерживаемая версия журнала ({version})")
+
+
+def encode_states(states):
+    """Названия состояний -> коды (неизвестные и пустые -> NO_STATE)."""
+    return np.array([STATE_CODES.get(s, NO_STATE) for s in states], dtype=np.int8)
+
+
+def decode_states(codes):
+    """Коды состояний -> названия (NO_STATE -> None)."""
+    names = np.array([*STATES, None], dtype=object)
+    codes = np.asarray(codes)
+    return names[np.where((codes >= 0) & (codes < len(STATES)), codes, len(STATES))]
+
+
+def make_records(timestamps, values, states):
+    """Массив записей журнала из времени, матрицы метрик и кодов состояний."""
+    records = np.zeros(len(timestamps), dtype=RECORD_DTYPE)
+    records['timestamp'] = timestamps
+    values = np.asarray(values, dtype=np.float32).reshape(len(records), len(METRICS))
+    for i, name in enumerate(METRICS):
+        records[name] = values[:, i]
+    records['system_state'] = states
+    return records
+
+
+class BinaryLogWriter:
+    """Дописывание записей в двоичный журнал.
+
+    Если файл оборвался на середине записи (например, при сбое питания),
+    неполная запись отбрасывается перед дописыванием.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'ab')
+        try:
+            self._prepare()
+        except Exception:
+            self._file.close()
+            raise
+
+    def _prepare(self):
+        size = os.fstat(self._file.fileno()).st_size
+        if size == 0:
+            self._file.write(_header_bytes())
+            return
+
+        with open(self.path, 'rb') as f:
+            _check_header(f.read(HEADER_SIZE), self.path)
+        tail = (size - HEADER_SIZE) % RECORD_DTYPE.itemsize
+        if tail:
+            self._file.truncate(size - tail)
+
+    def append(self, timestamp, values, state=None):
+        """Одна запись: values - метрики в порядке METRICS (None - нет данных)."""
+        values = [np.nan if v is None else v for v in values]
+        self.write(make_records([int(timestamp)], values, [STATE_CODES.get(state, NO_STATE)]))
+
+    def write(self, records):
+        """Запись массива RECORD_DTYPE одним вызовом."""
+        self._file.write(np.ascontiguousarray(records, dtype=RECORD_DTYPE).tobytes())
+
+    def flush(self, fsync=False):
+        self._file.flush()
+        if fsync:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BufferedLogWriter(BinaryLogWriter):
+    """Журнал с накоплением записей в памяти.
+
+    Записи складываются в заранее выделенный массив и сбрасываются
+    на диск одним вызовом write(), когда набралось batch_size записей
+    или с прошлого сброса прошло flush_interval секунд.
+
+    Политика fsync:
+        'never' - данные остаются в кэше ОС до её собственного сброса;
+        'batch' - fsync после каждого сброса пачки;
+        'always' - каждая запись сразу сбрасывается и синхронизируется.
+    """
+
+    FSYNC_POLICIES = ('never', 'batch', 'always')
+
+    def __init__(self, path, batch_size=600, flush_interval=60.0, fsync='batch'):
+        if fsync not in self.FSYNC_POLICIES:
+            raise ValueError(f"Неизвестная политика fsync: {fsync}")
+        super().__init__(path)
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self._buffer = np.zeros(batch_size, dtype=RECORD_DTYPE)
+        self._count = 0
+        self._flushed_at = time.monotonic()
+
+    def append(self, timestamp, values, state=None):
+        values = tuple(np.nan if v is None else v for v in values)
+        self._buffer[self._count] = (int(timestamp), *values, STATE_CODES.get(state, NO_STATE), b'')
+        self._count += 1
+        if (self._count == len(self._buffer) or self.fsync == 'always'
+                or time.monotonic() - self._flushed_at >= self.flush_interval):
+            self.flush()
+
+    def write(self, records):
+        self._write_buffer()
+        super().write(records)
+
+    def _write_buffer(self):
+        if self._count:
+            super().write(self._buffer[:self._count])
+            self._count = 0
+
+    def flush(self, fsync=None):
+        """Сброс накопленных записей (fsync=None - по политике журнала)."""
+        self._write_buffer()
+        super().flush(self.fsync != 'never' if fsync is None else fsync)
+        self._flushed_at = time.monotonic()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+        super().close()
+
+
+class CsvLogWriter:
+    """Дописывание записей в CSV-журнал прежнего формата (CSV_HEADER).
+
+    Для установок, где журнал по-прежнему задан файлом .csv (например,
+    переменной FILENAME): такой журнал продолжает вестись в CSV, а не
+    ломается о проверку заголовка BinaryLogWriter. Накопление записей и
+    политика fsync - как у BufferedLogWriter.
+    """
+
+    def __init__(self, path, batch_size=1, flush_interval=0.0, fsync='never'):
+        if fsync not in BufferedLogWriter.FSYNC_POLICIES:
+            raise ValueError(f"Неизвестная политика fsync: {fsync}")
+        import csv
+
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, 'a', newline='')
+        self._writer = csv.writer(self._file)
+        if new:
+            self._writer.writerow(CSV_HEADER)
+        self._rows = []
+        self._flushed_at = time.monotonic()
+
+    def append(self, timestamp, values, state=None):
+        """Одна запись: values - метрики в порядке METRICS (None и NaN - пустое поле)."""
+        cells = ['' if v is None or v != v else v for v in values]
+        self._rows.append([time.strftime(CSV_TIME_FORMAT, time.localtime(timestamp)), *cells, state or ''])
+        if (len(self._rows) >= self.batch_size or self.fsync == 'always'
+                or time.monotonic() - self._flushed_at >= self.flush_interval):
+            self.flush()
+
+    def flush(self, fsync=None):
+        """Сброс накопленных записей (fsync=None - по политике журнала)."""
+        self._writer.writerows(self._rows)
+        self._rows.clear()
+        self._file.flush()
+        if self.fsync != 'never' if fsync is None else fsync:
+            os.fsync(self._file.fileno())
+        self._flushed_at = time.monotonic()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_log_writer(path, batch_size=None, flush_interval=60.0, fsync='batch'):
+    """Журнал для дописывания по пути path.
+
+    Файл .csv, который не является двоичным журналом, ведётся в CSV
+    (CsvLogWriter), остальные - двоичные. batch_size=None - каждая запись
+    пишется сразу (BinaryLogWriter), иначе - пачками (BufferedLogWriter).
+    """
+    if path.lower().endswith('.csv') and not is_binary_log(path):
+        if batch_size is None:
+            return CsvLogWriter(path)
+        return CsvLogWriter(path, batch_size, flush_interval, fsync)
+    if batch_size is None:
+        return BinaryLogWriter(path)
+    return BufferedLogWriter(path, batch_size, flush_interval, fsync)
+
+
+def open_log(path):
+    """Записи журнала как numpy.memmap (только чтение, без копирования).
+
+    Столбцы доступны по именам: records['cpu_usage'], records['timestamp'].
+    """
+    with open(path, 'rb') as f:
+        _check_header(f.read(HEADER_SIZE), path)
+        size = os.fstat(f.fileno()).st_size
+    count = (size - HEADER_SIZE) // RECORD_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=HEADER_SIZE, shape=(count,))
+
+
+def _local_offsets(seconds):
+    """Смещение местного времени от UTC для каждого значения (в секундах).
+
+    Смещение меняется только на границах часов, поэтому time.localtime
+    вызывается один раз на каждый встретившийся час, а не на каждую запись.
+    """
+    hours, inverse = np.unique(np.asarray(seconds, dtype=np.int64) // 3600, return_inverse=True)
+    offsets = np.array([time.localtime(int(h) * 3600).tm_gmtoff for h in hours], dtype=np.int64)
+    return offsets[inverse.reshape(-1)]
+
+
+def to_local_datetime(timestamps):
+    """Секунды epoch -> местное время datetime64 без часового пояса (как в CSV)."""
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    return (timestamps + _local_offsets(timestamps)).astype('datetime64[s]')
+
+
+def from_local_datetime(values):
+    """Местное время (строки CSV или datetime64) -> секунды epoch."""
+    naive = np.asarray(values, dtype='datetime64[s]').astype(np.int64)
+    # Смещение на момент naive - offset совпадает с истинным везде, кроме часа перехода
+    epoch = naive - _local_offsets(naive)
+    return naive - _local_offsets(epoch)
+
+
+def read_log(path, usecols=None):
+    """Чтение журнала в DataFrame со столбцами CSV_HEADER.
+
+    Замена pd.read_csv: двоичный журнал читается через memmap,
+    остальные файлы - как CSV.
+    """
+    import pandas as pd
+
+    if not is_binary_log(path):
+        return pd.read_csv(path, usecols=usecols)
+
+    records = open_log(path)
+    columns = usecols or CSV_HEADER
+    data = {}
+    for name in columns:
+        if name == 'timestamp':
+            data[name] = to_local_datetime(records['timestamp'])
+        elif name == 'system_state':
+            data[name] = decode_states(records['system_state'])
+        else:
+            data[name] = np.asarray(records[name])
+    return pd.DataFrame(data, columns=list(columns))
+
+
+def csv_to_binary(csv_path, bin_path, chunksize=100_000):
+    """Преобразование CSV-журнала в двоичный (дописывается в bin_path)."""
+    import pandas as pd
+
+    count = 0
+    with BinaryLogWriter(bin_path) as writer:
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+            timestamps = from_local_datetime(pd.to_datetime(chunk['timestamp'], format=CSV_TIME_FORMAT))
+            values = chunk[list(METRICS)].apply(pd.to_numeric, errors='coerce').to_numpy(np.float32)
+            states = encode_states(chunk['system_state'].tolist())
+            writer.write(make_records(timestamps, values, states))
+            count += len(chunk)
+    return count
+
+
+def binary_to_csv(bin_path, csv_path, chunksize=100_000):
+    """Преобразование двоичного журнала в CSV с прежним заголовком."""
+    import pandas as pd
+
+    records = open_log(bin_path)
+    with open(csv_path, 'w', newline='') as f:
+        f.write(','.join(CSV_HEADER) + '\n')
+        for start in range(0, len(records), chunksize):
+            chunk = records[start:start + chunksize]
+            frame = pd.DataFrame({name: chunk[name] for name in METRICS})
+            frame.insert(0, 'timestamp', pd.Series(to_local_datetime(chunk['timestamp'])).dt.strftime(CSV_TIME_FORMAT))
+            frame['system_state'] = decode_states(chunk['system_state'])
+            # float32 хранит около 7 значащих цифр
+            frame.to_csv(f, header=False, index=False, float_format='%.7g')
+    return len(records)
+
+
+if __name__ == "__main__":
+    import sys
+
+    commands = {'to-bin': csv_to_binary, 'to-csv': binary_to_csv}
+    if len(sys.argv) != 4 or sys.argv[1] not in commands:
+        print("Использование: python -m data.logs.binlog to-bin|to-csv <источник> <результат>")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    count = commands[sys.argv[1]](sys.argv[2], sys.argv[3])
+    print(f"Записей: {count}, время: {time.perf_counter() - started:.2f} с")
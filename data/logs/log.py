@@ -1,86 +1,169 @@
-import datetime
-import pandas as pd
-import csv, os
+"""Запись метрик в двоичный журнал (data/logs/binlog.py).
+
+Файл .csv (например, из прежней настройки FILENAME) продолжает вестись
+в CSV прежнего формата.
+
+Однократный замер (по умолчанию, например из cron):
+    python -m data.logs.log
+Непрерывная запись с заданным периодом до SIGTERM/SIGINT:
+    python -m data.logs.log --daemon --interval 1 --batch-size 600 --flush-interval 60 --fsync batch
+С дообучением модели по отсчётам, размеченным правилами (data/model/online.py):
+    python -m data.logs.log --daemon --learn --checkpoint-interval 300
+
+Старый CSV переводится командой
+    python -m data.logs.binlog to-bin <файл.csv> <файл.bin>
+"""
+import argparse
+import math
+import os
+import signal
+import threading
+import time
 
 from core.cpu import get_cpu_info
 from core.gpu import monitor_gpu
 from core.hdd import monitor_hdd
 from core.ram import monitor_ram
+from core.rules import get_rule_engine
+from data.logs.binlog import BufferedLogWriter, CsvLogWriter, open_log_writer
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
-
-def determine_system_state(cpu_usage, gpu_usage, ram_usage, disk_usage):
-    """Определяет состояние системы на основе пороговых значений."""
-    if cpu_usage is None or gpu_usage is None:
-        return "Error" 
-
-    if cpu_usage < 70 and gpu_usage < 80 and ram_usage < 75 and disk_usage < 80:
-        return 'Normal'
-    elif cpu_usage >= 70 and cpu_usage < 90 or gpu_usage >= 80 and gpu_usage < 90:
-        return 'Warning'
-
-filename = os.getenv('FILENAME')
-header = ['timestamp', 'cpu_usage', 'cpu_temp', 'gpu_usage', 'gpu_temp', 'disk_usage', 'ram_usage', 'system_state']
-if not filename:
-    filename = 'default_file.csv'
-    
-file_ex = os.path.isfile(filename)
-
-# Проверяем, существует ли файл. Если нет, записываем заголовок.
-try:
-    with open(filename, 'a', newline='') as csvfile:
-        writer = csv.writer(csvfile)
-        
-        if not file_ex:
-            writer.writerow(header)
-except FileExistsError:
-    pass
-
-# Сбор данных и запись в CSV
-cpu_info = get_cpu_info()
-
-if "error" in cpu_info:
-    print(f"Ошибка CPU: {cpu_info['error']}")
-    cpu_usage = None
-    cpu_temp = None
-else:
-    cpu_usage = cpu_info["usage"]
-    if cpu_info["temperatures"]:
-        coretemp = cpu_info['temperatures']['coretemp']
-        if coretemp:
-            cpu_temp = coretemp[0]['current']
- 
-gpu_info = monitor_gpu()   
-if not gpu_info:
-    print("Ошибка: Не удалось получить данные о видеокарте")
-else:
-    gpu_data = gpu_info[0]
-    gpu_usage = gpu_data['load']
-    gpu_temp = gpu_data['temperatura']
-
-hdd_info = monitor_hdd()
-if not hdd_info:
-    print("Ошибка: Не удалось получить данные о HDD")
-else:
-    disk_usage = hdd_info['percent']
-
-ram_info = monitor_ram()
-if not ram_info:
-    print("Ошибка: Не удалось получить данные RAM")
-else:
-    ram_usage = ram_info['percent']
-
-system_state = determine_system_state(cpu_usage, gpu_usage, ram_usage, disk_usage)
-
-timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-row = [timestamp, cpu_usage, cpu_temp, gpu_usage, gpu_temp, disk_usage, ram_usage, system_state]
-
-with open(filename, 'a', newline='') as csvfile:
-    writer = csv.writer(csvfile)
-    writer.writerow(row)
-
-print(f"Данные записаны в {filename}")
+# Коллекторы, из которых складываются метрики журнала
+LOG_COLLECTORS = ('cpu', 'gpu', 'ram', 'hdd')
+
+
+def collect_sample():
+    """Однократный опрос коллекторов: метрики в порядке METRICS."""
+    cpu_usage = cpu_temp = gpu_usage = gpu_temp = disk_usage = ram_usage = None
+
+    cpu_info = get_cpu_info()
+    if "error" in cpu_info:
+        print(f"Ошибка CPU: {cpu_info['error']}")
+    else:
+        cpu_usage = cpu_info["usage"]
+        if cpu_info["temperatures"]:
+            coretemp = cpu_info['temperatures'].get('coretemp')
+            if coretemp:
+                cpu_temp = coretemp[0]['current']
+
+    try:
+        gpu_info = monitor_gpu()
+    except Exception as e:
+        print(f"Ошибка GPU: {e}")
+        gpu_info = []
+    if not gpu_info:
+        print("Ошибка: Не удалось получить данные о видеокарте")
+    else:
+        gpu_data = gpu_info[0]
+        gpu_usage = gpu_data['load']
+        gpu_temp = gpu_data['temperature']
+
+    hdd_info = monitor_hdd()
+    if not hdd_info:
+        print("Ошибка: Не удалось получить данные о HDD")
+    else:
+        disk_usage = hdd_info['percent']
+
+    ram_info = monitor_ram()
+    if not ram_info:
+        print("Ошибка: Не удалось получить данные RAM")
+    else:
+        ram_usage = ram_info['percent']
+
+    return [cpu_usage, cpu_temp, gpu_usage, gpu_temp, disk_usage, ram_usage]
+
+
+def state_of(values):
+    """Состояние системы по метрикам в порядке METRICS (правила core/rules.json).
+
+    При непрерывной записи учитывается гистерезис относительно
+    предыдущих отсчётов.
+    """
+    return get_rule_engine().evaluate(values)
+
+
+def log_once(filename):
+    values = collect_sample()
+    with open_log_writer(filename) as writer:
+        writer.append(time.time(), values, state_of(values))
+    print(f"Данные записаны в {filename}")
+
+
+def run_daemon(filename, interval=1.0, batch_size=600, flush_interval=60.0, fsync='batch',
+               learn=False, checkpoint_interval=300.0):
+    """Непрерывная запись с периодом interval до SIGTERM/SIGINT.
+
+    Опрос ведёт общий SamplingEngine: psutil, NVML и журнал
+    инициализируются один раз, а на каждый отсчёт приходится только
+    перевод снимка в числа и запись в буфер журнала (open_log_writer).
+    При learn=True отсчёты с определённым состоянием дообучают модель.
+    """
+    from core.history import snapshot_metrics
+    from core.sampler import SamplingEngine
+
+    trainer = None
+    if learn:
+        from data.model.model import DiagnosticModel
+        from data.model.online import OnlineTrainer
+        trainer = OnlineTrainer(DiagnosticModel(), checkpoint_interval=checkpoint_interval)
+
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop.set())
+
+    sampler = SamplingEngine(periods={name: interval for name in LOG_COLLECTORS})
+    writer = open_log_writer(filename, batch_size, flush_interval, fsync)
+    if isinstance(writer, CsvLogWriter):
+        print(f"Журнал {filename} ведётся в CSV; двоичный журнал быстрее: "
+              f"python -m data.logs.binlog to-bin {filename} <файл.bin>")
+    count = 0
+    sampler.set_demand('logger', LOG_COLLECTORS)
+    sampler.start()
+    print(f"Запись в {filename} каждые {interval} с (остановка - SIGTERM или Ctrl+C)")
+
+    try:
+        seq = 0
+        while not stop.is_set():
+            snapshot = sampler.wait_for_update(seq, timeout=0.5)
+            if snapshot.seq == seq:
+                continue
+            seq = snapshot.seq
+            values = [None if math.isnan(v) else v for v in snapshot_metrics(snapshot, fresh=True).tolist()]
+            state = state_of(values)
+            writer.append(snapshot.timestamp, values, state)
+            if trainer is not None and None not in values:
+                trainer.add(values, state)
+            count += 1
+    finally:
+        sampler.stop()
+        writer.close()  # Сбрасывает остаток буфера
+        if trainer is not None and trainer.added:
+            trainer.checkpoint()
+            print(f"Дообучение: {trainer.added} отсчётов, модель сохранена в {trainer.path}")
+        print(f"Записей: {count}, журнал {filename} закрыт")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Запись метрик в двоичный журнал")
+    parser.add_argument('filename', nargs='?', default=os.getenv('FILENAME') or 'default_file.bin')
+    parser.add_argument('--daemon', action='store_true', help="непрерывная запись до SIGTERM")
+    parser.add_argument('--interval', type=float, default=1.0, help="период опроса, с")
+    parser.add_argument('--batch-size', type=int, default=600, help="записей в пачке")
+    parser.add_argument('--flush-interval', type=float, default=60.0, help="максимальное время до сброса, с")
+    parser.add_argument('--fsync', choices=BufferedLogWriter.FSYNC_POLICIES, default='batch')
+    parser.add_argument('--learn', action='store_true', help="дообучать модель по отсчётам")
+    parser.add_argument('--checkpoint-interval', type=float, default=300.0, help="период сохранения модели, с")
+    args = parser.parse_args()
+
+    if args.daemon:
+        run_daemon(args.filename, args.interval, args.batch_size, args.flush_interval, args.fsync,
+                   args.learn, args.checkpoint_interval)
+    else:
+        log_once(args.filename)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""Пакетная диагностика журналов без GUI.
+
+Журналы (CSV или двоичные) делятся на части, которые оцениваются
+моделью DiagnosticModel параллельно в отдельных процессах. Части
+двоичного журнала - диапазоны записей (каждый процесс читает свой
+диапазон через memmap и пишет результат прямо в выходной файл), части
+CSV - диапазоны байтов, выровненные по строкам, так что и разбор CSV
+идёт параллельно.
+
+Результат по каждому журналу - двоичный журнал <имя>.diagnosis.bin с
+состояниями модели в столбце system_state (в CSV переводится командой
+python -m data.logs.binlog to-csv) и сводка: сколько времени каждый
+хост провёл в каждом состоянии. Время записи - интервал до следующей
+записи, но не больше --max-gap (более длинный промежуток - простой).
+
+    python -m data.model.batch logs/*.bin --jobs 8
+    python -m data.model.batch fleet/*/system_data.csv --host-from parent --summary-only --json summary.json
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from data.logs.binlog import (
+    CSV_TIME_FORMAT, HEADER_SIZE, RECORD_DTYPE, STATE_CODES, STATES, BinaryLogWriter,
+    from_local_datetime, is_binary_log, make_records, open_log,
+)
+from data.model.model import FEATURES, DiagnosticModel
+
+# Записей двоичного журнала и байтов CSV в одной части
+CHUNK_ROWS = 1_000_000
+CHUNK_BYTES = 64 * 1024 * 1024
+
+MAX_GAP = 300.0
+
+# Модель, переданная процессу при запуске, и перевод её кодов в коды журнала
+_model = _codes = None
+
+
+def _init_worker(model):
+    global _model, _codes
+    _model = model
+    # Код модели -> код состояния журнала; индекс -1 (строка с пропусками) -> Error
+    names = [model.state_names[code] for code in range(len(model.state_names))]
+    _codes = np.array([STATE_CODES[name] for name in names] + [STATE_CODES['Error']], dtype=np.int8)
+    # Один поток BLAS на процесс: параллельность - на уровне частей
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(1)
+
+
+def _summarize(timestamps, states, max_gap):
+    """Сводка части: записи и секунды по состояниям, границы для склейки частей."""
+    durations = np.clip(np.diff(timestamps), 0, max_gap)
+    return {
+        'rows': np.bincount(states, minlength=len(STATES)),
+        'seconds': np.bincount(states[:-1], weights=durations, minlength=len(STATES)),
+        'first': int(timestamps[0]) if len(timestamps) else None,
+        'last': int(timestamps[-1]) if len(timestamps) else None,
+        'last_state': int(states[-1]) if len(states) else None,
+    }
+
+
+def _score_binary(path, start, stop, output, max_gap):
+    records = open_log(path)[start:stop]
+    codes, _ = _model.predict_batch(records)
+    states = _codes[codes]
+    if output:
+        # Каждый процесс пишет только свой диапазон заранее выделенного файла
+        result = np.memmap(output, dtype=RECORD_DTYPE, mode='r+',
+                           offset=HEADER_SIZE + start * RECORD_DTYPE.itemsize, shape=(stop - start,))
+        result[:] = records
+        result['system_state'] = states
+        result.flush()
+    return _summarize(records['timestamp'], states, max_gap), None
+
+
+def _score_csv(path, start, stop, columns, output, max_gap):
+    import pandas as pd
+
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(stop - start)
+    frame = pd.read_csv(io.BytesIO(data), header=None, names=columns)
+    X = frame[FEATURES].apply(pd.to_numeric, errors='coerce').to_numpy(np.float64)
+    timestamps = from_local_datetime(pd.to_datetime(frame['timestamp'], format=CSV_TIME_FORMAT))
+    codes, _ = _model.predict_batch(X)
+    states = _codes[codes]
+    records = make_records(timestamps, X, states) if output else None
+    return _summarize(timestamps, states, max_gap), records
+
+
+def _score(task):
+    kind, *args = task
+    return (_score_binary if kind == 'binary' else _score_csv)(*args)
+
+
+def _csv_ranges(path, chunk_bytes):
+    """Заголовок CSV и диапазоны байтов частей, границы - на концах строк."""
+    ranges = []
+    with open(path, 'rb') as f:
+        columns = f.readline().decode().strip().split(',')
+        position = f.tell()
+        size = os.fstat(f.fileno()).st_size
+        while position < size:
+            f.seek(min(position + chunk_bytes, size))
+            f.readline()
+            end = f.tell()
+            ranges.append((position, end))
+            position = end
+    return columns, ranges
+
+
+def output_paths(paths, out_dir=None):
+    """Файлы <имя>.diagnosis.bin для журналов paths.
+
+    По умолчанию результат лежит рядом с журналом. В out_dir сохраняются
+    каталоги журналов относительно их общего каталога, поэтому
+    fleet/a/system_data.bin и fleet/b/system_data.bin дают
+    <out_dir>/a/... и <out_dir>/b/... Если два журнала всё же получают
+    один выходной файл (например, x.csv и x.bin в одном каталоге) -
+    ValueError.
+    """
+    resolved = {path: Path(path).resolve() for path in paths}
+    if out_dir is None:
+        outputs = {path: str(p.parent / f"{p.stem}.diagnosis.bin") for path, p in resolved.items()}
+    else:
+        base = Path(os.path.commonpath([p.parent for p in resolved.values()])) if resolved else None
+        outputs = {path: str(Path(out_dir) / p.parent.relative_to(base) / f"{p.stem}.diagnosis.bin")
+                   for path, p in resolved.items()}
+
+    owners = {}
+    for path, output in outputs.items():
+        key = os.path.abspath(output)
+        if key in owners:
+            raise ValueError(f"{owners[key]} и {path} записываются в один файл {output}")
+        owners[key] = path
+    return outputs
+
+
+def host_of(path, host_from='stem'):
+    """Имя хоста журнала: имя файла без расширения или имя его каталога."""
+    path = Path(path).resolve()
+    return path.parent.name if host_from == 'parent' else path.stem
+
+
+def _prepare_output(path, rows):
+    """Пустой двоичный журнал на rows записей (части дописываются процессами на свои места)."""
+    if os.path.exists(path):
+        os.remove(path)
+    with BinaryLogWriter(path):
+        pass
+    os.truncate(path, HEADER_SIZE + rows * RECORD_DTYPE.itemsize)
+
+
+def _tasks(path, output, max_gap, chunk_rows, chunk_bytes):
+    if is_binary_log(path):
+        count = len(open_log(path))
+        if output:
+            _prepare_output(output, count)
+        return [('binary', path, start, min(start + chunk_rows, count), output, max_gap)
+                for start in range(0, count, chunk_rows)]
+
+    columns, ranges = _csv_ranges(path, chunk_bytes)
+    missing = [name for name in ['timestamp'] + FEATURES if name not in columns]
+    if missing:
+        raise ValueError(f"{path}: нет столбцов {', '.join(missing)}")
+    if output and os.path.exists(output):
+        os.remove(output)
+    return [('csv', path, start, stop, columns, output, max_gap) for start, stop in ranges]
+
+
+def _merge(total, part, max_gap):
+    """Добавление сводки части к сводке журнала (части идут по порядку)."""
+    if part['first'] is None:
+        return total
+    if total is None:
+        return dict(part, rows=part['rows'].copy(), seconds=part['seconds'].copy())
+    # Интервал между последней записью предыдущей части и первой записью этой
+    total['seconds'][total['last_state']] += min(max(part['first'] - total['last'], 0), max_gap)
+    total['rows'] += part['rows']
+    total['seconds'] += part['seconds']
+    total['last'], total['last_state'] = part['last'], part['last_state']
+    return total
+
+
+def diagnose_logs(paths, model=None, jobs=None, out_dir=None, summary_only=False, host_from='stem',
+                  max_gap=MAX_GAP, chunk_rows=CHUNK_ROWS, chunk_bytes=CHUNK_BYTES):
+    """Оценка журналов paths моделью, возвращает сводку {хост: {состояние: {rows, seconds}}}.
+
+    Если summary_only=False, состояния по каждой записи пишутся в
+    <имя>.diagnosis.bin рядом с журналом или в out_dir (см. output_paths,
+    недостающие каталоги создаются).
+    """
+    model = model or DiagnosticModel()
+    if summary_only:
+        outputs = dict.fromkeys(paths)
+    else:
+        outputs = output_paths(paths, out_dir)
+        for output in set(outputs.values()):
+            Path(output).parent.mkdir(parents=True, exist_ok=True)
+    tasks = {path: _tasks(path, outputs[path], max_gap, chunk_rows, chunk_bytes) for path in paths}
+    ordered = [task for path in paths for task in tasks[path]]
+
+    totals = {path: None for path in paths}
+    writers = {}
+    try:
+        with ProcessPoolExecutor(max_workers=jobs or os.cpu_count(), initializer=_init_worker,
+                                 initargs=(model,)) as pool:
+            # Результаты приходят в порядке задач: части CSV дописываются по порядку
+            for task, (part, records) in zip(ordered, pool.map(_score, ordered)):
+                path = task[1]
+                totals[path] = _merge(totals[path], part, max_gap)
+                if records is not None:
+                    if path not in writers:
+                        writers[path] = BinaryLogWriter(outputs[path])
+                    writers[path].write(records)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    summary = {}
+    for path, total in totals.items():
+        if total is None:
+            continue
+        host = summary.setdefault(host_of(path, host_from),
+                                  {name: {'rows': 0, 'seconds': 0.0} for name in STATES})
+        for code, name in enumerate(STATES):
+            host[name]['rows'] += int(total['rows'][code])
+            host[name]['seconds'] += float(total['seconds'][code])
+    return summary
+
+
+def print_summary(summary):
+    header = f"{'Хост':<24} {'Записей':>12} " + ' '.join(f"{name:>16}" for name in STATES)
+    print(header)
+    print('-' * len(header))
+    for host, states in summary.items():
+        rows = sum(s['rows'] for s in states.values())
+        total = sum(s['seconds'] for s in states.values()) or 1.0
+        cells = ' '.join(f"{s['seconds'] / 3600:>8.1f}ч {100 * s['seconds'] / total:>5.1f}%" for s in states.values())
+        print(f"{host:<24} {rows:>12,} {cells}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетная диагностика журналов")
+    parser.add_argument('paths', nargs='+', help="журналы (CSV или двоичные)")
+    parser.add_argument('--jobs', type=int, help="число процессов (по умолчанию - все ядра)")
+    parser.add_argument('--out-dir', help="каталог для <имя>.diagnosis.bin с подкаталогами журналов "
+                                          "(по умолчанию - рядом с журналом)")
+    parser.add_argument('--summary-only', action='store_true', help="только сводка, без состояний по записям")
+    parser.add_argument('--host-from', choices=('stem', 'parent'), default='stem',
+                        help="имя хоста - имя файла или имя каталога журнала")
+    parser.add_argument('--max-gap', type=float, default=MAX_GAP, help="максимальное время одной записи, с")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help="записей двоичного журнала в части")
+    parser.add_argument('--chunk-mb', type=float, default=CHUNK_BYTES / 2 ** 20, help="МБ CSV в части")
+    parser.add_argument('--json', help="сохранить сводку в JSON")
+    args = parser.parse_args()
+
+    model = DiagnosticModel()
+    started = time.perf_counter()
+    try:
+        summary = diagnose_logs(args.paths, model, args.jobs, args.out_dir, args.summary_only, args.host_from,
+                                args.max_gap, args.chunk_rows, int(args.chunk_mb * 2 ** 20))
+    except ValueError as e:
+        print(f"Ошибка: {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - started
+
+    print_summary(summary)
+    rows = sum(s['rows'] for states in summary.values() for s in states.values())
+    print(f"Записей: {rows:,}, время: {elapsed:.2f} с ({rows / max(elapsed, 1e-9):,.0f} записей/с)")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""Сравнение моделей диагностики по точности и скорости.
+
+Модели обучаются и проверяются кросс-валидацией на сгенерированных
+данных (data/data.py) или на журнале; блоки кросс-валидации считаются
+параллельно в отдельных процессах. Задержка одиночного предсказания,
+пропускная способность и размер артефакта измеряются в основном
+процессе на модели, обученной на всех данных, чтобы параллельные
+задачи не искажали замеры.
+
+    python -m data.model.evaluate --rows 200000 --folds 5 --jobs 4
+    python -m data.model.evaluate --log system_data.bin --models naive_bayes,decision_tree
+    python -m data.model.evaluate --confusion-matrix confusion_matrix.png --json report.json
+"""
+import argparse
+import json
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from data.model.model import FEATURES, iter_log_chunks
+from data.model.naive_bayes import GaussianNBStats
+
+STATE_NAMES = ('Normal', 'Warning', 'Critical')
+STATE_MAPPING = {name: code for code, name in enumerate(STATE_NAMES)}
+
+
+class NaiveBayesCandidate:
+    """Модель DiagnosticModel: GaussianNB на достаточных статистиках и вывод на NumPy."""
+
+    def fit(self, X, y):
+        self.model = GaussianNBStats(X.shape[1]).update(X, y).to_model(FEATURES)
+        return self
+
+    def predict(self, X):
+        return self.model.predict(X)
+
+    def artifact(self):
+        return json.dumps(self.model.to_dict()).encode()
+
+
+class SklearnCandidate:
+    """Модель scikit-learn; артефакт - pickle."""
+
+    def __init__(self, factory):
+        self.factory = factory
+
+    def fit(self, X, y):
+        self.model = self.factory().fit(X, y)
+        return self
+
+    def predict(self, X):
+        return self.model.predict(X)
+
+    def artifact(self):
+        return pickle.dumps(self.model)
+
+
+def _decision_tree():
+    from sklearn.tree import DecisionTreeClassifier
+    return DecisionTreeClassifier(max_depth=12, random_state=0)
+
+
+def _logistic_regression():
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+    return make_pipeline(StandardScaler(), LogisticRegression(max_iter=1000))
+
+
+def _gradient_boosting():
+    # Гистограммный бустинг: обычный GradientBoostingClassifier на сотнях тысяч строк слишком медленный
+    from sklearn.ensemble import HistGradientBoostingClassifier
+    return HistGradientBoostingClassifier(max_iter=100, random_state=0)
+
+
+CANDIDATES = {
+    'naive_bayes': NaiveBayesCandidate,
+    'decision_tree': lambda: SklearnCandidate(_decision_tree),
+    'logistic_regression': lambda: SklearnCandidate(_logistic_regression),
+    'gradient_boosting': lambda: SklearnCandidate(_gradient_boosting),
+}
+
+
+def load_dataset(log=None, rows=200_000, seed=0, **options):
+    """(X, y): журнал log или сгенерированные данные; пропуски - нули, как при обучении."""
+    if log:
+        chunks = list(iter_log_chunks(log, STATE_MAPPING))
+        X = np.vstack([X for X, _ in chunks])
+        y = np.concatenate([y for _, y in chunks])
+    else:
+        from data.data import iter_chunks
+        chunks = list(iter_chunks(rows, seed=seed, **options))
+        X = np.vstack([X for _, X, _ in chunks])
+        y = np.concatenate([labels for _, _, labels in chunks])
+
+    known = y >= 0
+    X = np.where(np.isnan(X[known]), 0.0, X[known])
+    return X, y[known]
+
+
+def stratified_folds(y, folds, seed=0):
+    """Номер блока для каждой строки, доли классов в блоках одинаковы."""
+    rng = np.random.default_rng(seed)
+    fold = np.empty(len(y), dtype=np.int64)
+    for label in np.unique(y):
+        rows = np.flatnonzero(y == label)
+        fold[rng.permutation(rows)] = np.arange(len(rows)) % folds
+    return fold
+
+
+# Данные, переданные процессу при запуске (чтобы не пересылать их с каждой задачей)
+_X = _y = _fold = None
+
+
+def _init_worker(X, y, fold):
+    global _X, _y, _fold
+    _X, _y, _fold = X, y, fold
+    # Один поток BLAS/OpenMP на процесс: параллельность - на уровне блоков
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(1)
+
+
+def _run_fold(name, k):
+    train, test = _fold != k, _fold == k
+    candidate = CANDIDATES[name]()
+    started = time.perf_counter()
+    candidate.fit(_X[train], _y[train])
+    train_time = time.perf_counter() - started
+    predicted = candidate.predict(_X[test])
+    return name, k, train_time, _y[test], predicted
+
+
+def confusion(y_true, y_pred, classes=len(STATE_NAMES)):
+    matrix = np.zeros((classes, classes), dtype=np.int64)
+    np.add.at(matrix, (y_true, y_pred), 1)
+    return matrix
+
+
+def measure_speed(candidate, X, samples=2000, batch=100_000):
+    """Задержка одиночного предсказания (p50, p99, с) и пропускная способность (строк/с)."""
+    rows = X[np.random.default_rng(0).integers(0, len(X), samples)]
+    latencies = np.empty(samples)
+    for i in range(samples):
+        started = time.perf_counter()
+        candidate.predict(rows[i:i + 1])
+        latencies[i] = time.perf_counter() - started
+
+    X = X[:batch]
+    started = time.perf_counter()
+    candidate.predict(X)
+    throughput = len(X) / (time.perf_counter() - started)
+    p50, p99 = np.percentile(latencies, [50, 99])
+    return p50, p99, throughput
+
+
+def evaluate(X, y, names, folds=5, jobs=None):
+    """Кросс-валидация и замеры скорости для моделей names, возвращает отчёт по каждой."""
+    fold = stratified_folds(y, folds)
+    tasks = [(name, k) for name in names for k in range(folds)]
+    matrices = {name: np.zeros((len(STATE_NAMES),) * 2, dtype=np.int64) for name in names}
+    accuracies = {name: [] for name in names}
+    train_times = {name: [] for name in names}
+
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count(), initializer=_init_worker,
+                             initargs=(X, y, fold)) as pool:
+        for name, k, train_time, y_true, y_pred in pool.map(_run_fold, *zip(*tasks)):
+            matrices[name] += confusion(y_true, y_pred)
+            accuracies[name].append(np.mean(y_true == y_pred))
+            train_times[name].append(train_time)
+
+    report = {}
+    for name in names:
+        candidate = CANDIDATES[name]()
+        started = time.perf_counter()
+        candidate.fit(X, y)
+        full_train_time = time.perf_counter() - started
+        p50, p99, throughput = measure_speed(candidate, X)
+
+        matrix = matrices[name]
+        with np.errstate(invalid='ignore'):
+            recall = np.diag(matrix) / matrix.sum(axis=1)
+        report[name] = {
+            'accuracy': float(np.mean(accuracies[name])),
+            'accuracy_std': float(np.std(accuracies[name])),
+            'recall': {state: float(r) for state, r in zip(STATE_NAMES, recall)},
+            'fold_train_time': float(np.mean(train_times[name])),
+            'train_time': full_train_time,
+            'latency_p50': p50,
+            'latency_p99': p99,
+            'throughput': throughput,
+            'artifact_size': len(candidate.artifact()),
+            'confusion_matrix': matrix.tolist(),
+        }
+    return report
+
+
+def print_report(report, rows, folds):
+    print(f"Строк: {rows}, блоков кросс-валидации: {folds}")
+    header = (f"{'Модель':<20} {'Точность':>13} " + ' '.join(f"{'R:' + s[:4]:>7}" for s in STATE_NAMES)
+              + f" {'Обучение':>9} {'p50':>9} {'p99':>9} {'Строк/с':>12} {'Размер':>9}")
+    print(header)
+    print('-' * len(header))
+    for name, r in report.items():
+        recall = ' '.join(f"{r['recall'][s]:>7.3f}" for s in STATE_NAMES)
+        print(f"{name:<20} {r['accuracy']:>7.4f}±{r['accuracy_std']:.3f} {recall} "
+              f"{r['train_time']:>8.2f}с {r['latency_p50'] * 1e6:>7.1f}мкс {r['latency_p99'] * 1e6:>7.1f}мкс "
+              f"{r['throughput']:>12,.0f} {r['artifact_size']:>8}Б")
+
+
+def plot_confusion_matrix(matrix, path, title):
+    """Сохранение матрицы ошибок в PNG (нужны matplotlib и seaborn)."""
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+    except ImportError as e:
+        print(f"Матрица ошибок не построена: {e}")
+        return
+
+    fig, ax = plt.subplots(figsize=(8, 7))
+    sns.heatmap(np.asarray(matrix), annot=True, fmt='d', cmap='Blues',
+                xticklabels=STATE_NAMES, yticklabels=STATE_NAMES, ax=ax)
+    ax.set_xlabel('Предсказано')
+    ax.set_ylabel('Фактически')
+    ax.set_title(title)
+    fig.tight_layout()
+    fig.savefig(path, dpi=200)
+    plt.close(fig)
+    print(f"Матрица ошибок сохранена в {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сравнение моделей диагностики")
+    parser.add_argument('--log', help="журнал (CSV или двоичный) вместо сгенерированных данных")
+    parser.add_argument('--rows', type=int, default=200_000, help="строк сгенерированных данных")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--ratios', default='1,1,1', help="доли Normal,Warning,Critical")
+    parser.add_argument('--noise', type=float, default=2.0)
+    parser.add_argument('--correlation', type=float, default=0.5)
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--jobs', type=int, help="число процессов (по умолчанию - все ядра)")
+    parser.add_argument('--models', default=','.join(CANDIDATES))
+    parser.add_argument('--confusion-matrix', help="PNG с матрицей ошибок naive_bayes")
+    parser.add_argument('--json', help="сохранить отчёт в JSON")
+    args = parser.parse_args()
+
+    names = args.models.split(',')
+    unknown = set(names) - set(CANDIDATES)
+    if unknown:
+        parser.error(f"неизвестные модели: {', '.join(sorted(unknown))}")
+
+    X, y = load_dataset(args.log, args.rows, args.seed, ratios=[float(r) for r in args.ratios.split(',')],
+                        noise=args.noise, correlation=args.correlation)
+    report = evaluate(X, y, names, args.folds, args.jobs)
+    print_report(report, len(X), args.folds)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    if args.confusion_matrix and 'naive_bayes' in report:
+        plot_confusion_matrix(report['naive_bayes']['confusion_matrix'], args.confusion_matrix,
+                              f"Naive Bayes, точность {report['naive_bayes']['accuracy']:.3f}")
+
+
+if __name__ == "__main__":
+    main()
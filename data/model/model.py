@@ -1,87 +1,379 @@
-import pandas as pd
-from sklearn.naive_bayes import GaussianNB
-import joblib
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
 from pathlib import Path
 
+from core.history import METRICS
+from data.logs.binlog import STATES, is_binary_log, open_log, read_log
+from data.model.naive_bayes import GaussianNBStats, NumpyGaussianNB
+
+# Признаки модели в порядке столбцов матрицы
+FEATURES = list(METRICS)
+
+# Параметры модели без pickle (data/model/naive_bayes.py)
+MODEL_FILE = Path("data/model/diagnostic_model.json")
+# Контрольная точка дообучения (data/model/online.py), используется вместо MODEL_FILE,
+# если построена на той же базовой модели (контрольная сумма MODEL_FILE в ключе base_checksum)
+ONLINE_MODEL_FILE = Path("data/model/online_model.json")
+# Прежний формат: читается один раз для переноса в MODEL_FILE
+LEGACY_MODEL_FILE = Path("data/model/diagnostic_model.pkl")
+
+# Строк журнала в одной части при обучении
+CHUNK_ROWS = 100_000
+
+# Кэш predict(): число записей (0 - без кэша) и шаг квантования признаков
+CACHE_SIZE = int(os.getenv('PREDICTION_CACHE_SIZE', 4096))
+CACHE_RESOLUTION = 0.1
+
+
+def model_checksum(path=MODEL_FILE):
+    """SHA-256 файла модели (None - файла нет или он не читается)."""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def checkpoint_matches_base(path, base_path=MODEL_FILE):
+    """Контрольная точка дообучения path построена на текущей базовой модели.
+
+    После переобучения или замены MODEL_FILE старая контрольная точка не
+    должна подменять новую модель.
+    """
+    try:
+        with open(path) as f:
+            base = json.load(f).get('base_checksum')
+    except (OSError, ValueError, AttributeError):
+        return False
+    return base is not None and base == model_checksum(base_path)
+
+
+def iter_log_chunks(path, state_mapping, chunksize=CHUNK_ROWS):
+    """Журнал частями: (X, y) - признаки float64 и коды состояний.
+
+    Пустое состояние считается 'Normal', состояния не из state_mapping
+    (например, 'Error') получают код -1.
+    """
+    if is_binary_log(path):
+        records = open_log(path)
+        # Код состояния журнала -> код модели; индекс -1 (нет состояния) -> 'Normal'
+        codes = np.array([state_mapping.get(name, -1) for name in STATES] + [state_mapping['Normal']])
+        for start in range(0, len(records), chunksize):
+            chunk = records[start:start + chunksize]
+            X = np.column_stack([chunk[name] for name in FEATURES]).astype(np.float64)
+            yield X, codes[chunk['system_state'].astype(np.int64)]
+        return
+
+    import pandas as pd
+    for chunk in pd.read_csv(path, usecols=FEATURES + ['system_state'], chunksize=chunksize):
+        X = chunk[FEATURES].apply(pd.to_numeric, errors='coerce').to_numpy(np.float64)
+        y = chunk['system_state'].fillna('Normal').map(state_mapping).fillna(-1)
+        yield X, y.to_numpy(np.int64)
+
+
+class PredictionCache:
+    """LRU-кэш предсказаний по признакам, округлённым до resolution.
+
+    Живые отсчёты часто повторяются (датчики меняются шагами по 0.1,
+    простаивающая машина часами выдаёт одни и те же значения), поэтому
+    повторная оценка моделью заменяется поиском в словаре. Значения,
+    отличающиеся меньше чем на resolution, получают одно предсказание -
+    предсказание для центра ячейки (center()), поэтому результат не
+    зависит от того, какое из значений ячейки пришло первым.
+    """
+
+    def __init__(self, maxsize=CACHE_SIZE, resolution=CACHE_RESOLUTION):
+        self.maxsize = maxsize
+        self.resolution = resolution
+        self.hits = self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Для передачи модели в другие процессы: без блокировки и записей
+        return {'maxsize': self.maxsize, 'resolution': self.resolution}
+
+    def __setstate__(self, state):
+        self.__init__(state['maxsize'], state['resolution'])
+
+    def key(self, values):
+        return tuple(round(v / self.resolution) for v in values)
+
+    def center(self, key):
+        """Значения признаков, для которых считается предсказание ячейки key."""
+        return [k * self.resolution for k in key]
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            if len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        """Сброс записей (счётчики сохраняются)."""
+        with self._lock:
+            self._items.clear()
+
+    def info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._items),
+                'maxsize': self.maxsize, 'resolution': self.resolution}
+
+
 class DiagnosticModel:
-    def __init__(self, data_path='system_data.csv'):
-        self.model = GaussianNB()
+    def __init__(self, data_path='system_data.csv', cache_size=CACHE_SIZE, cache_resolution=CACHE_RESOLUTION):
+        # Кэш создаётся до модели: любая замена модели его очищает
+        self.cache = PredictionCache(cache_size, cache_resolution) if cache_size > 0 else None
+        self.model = None
         self.data_path = data_path
         self.state_mapping = {'Normal': 0, 'Warning': 1, 'Critical': 2}
+        # Обратное преобразование кода в текстовый статус
+        self.state_names = {v: k for k, v in self.state_mapping.items()}
         self.load_or_train_model()
 
+    @property
+    def model(self):
+        return self._model
+
+    @model.setter
+    def model(self, model):
+        # Обучение, загрузка и дообучение (online.py) заменяют модель целиком
+        self._model = model
+        if self.cache is not None:
+            self.cache.clear()
+
+    def cache_info(self):
+        """Счётчики кэша predict(): hits, misses, size (None - кэш выключен)."""
+        return self.cache.info() if self.cache is not None else None
+
     def load_or_train_model(self):
-        model_file = Path("data/model/diagnostic_model.pkl")
-        if model_file.exists():
-            self.model = joblib.load(model_file)
+        # scikit-learn нужен только для переноса старого файла
+        for path in (ONLINE_MODEL_FILE, MODEL_FILE):
+            if path == ONLINE_MODEL_FILE and path.exists() and not checkpoint_matches_base(path):
+                print(f"Контрольная точка {path} построена на другой базовой модели, используется {MODEL_FILE}")
+                continue
+            if path.exists():
+                try:
+                    self.model = NumpyGaussianNB.load(path)
+                    return
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"Ошибка загрузки модели {path}: {e}")
+
+        if LEGACY_MODEL_FILE.exists() and not MODEL_FILE.exists():
+            import joblib
+            self.model = NumpyGaussianNB.from_sklearn(joblib.load(LEGACY_MODEL_FILE), FEATURES)
         else:
             self.train_model()
-            joblib.dump(self.model, model_file)
+        self.save_model()
+
+    def save_model(self):
+        try:
+            self.model.save(MODEL_FILE)
+        except OSError as e:
+            print(f"Не удалось сохранить модель: {e}")
+
+    def train_model(self, chunksize=None):
+        """Обучение по журналу self.data_path частями по chunksize строк.
 
-    def train_model(self):
+        Журнал не загружается целиком: по каждой части накапливаются
+        достаточные статистики (GaussianNBStats), поэтому объём памяти не
+        зависит от размера журнала, а результат совпадает с обучением
+        GaussianNB на всех данных сразу.
+        """
+        started = time.perf_counter()
+        stats = GaussianNBStats(len(FEATURES))
 
         # Чтение данных с обработкой возможных ошибок
         try:
-            data = pd.read_csv(self.data_path)
-            
-            # Проверка и очистка данных
-            if data.empty:
-                raise ValueError("Файл данных пуст")
-                
-            # Заполнение пропущенных значений
-            data.fillna({
-                'cpu_usage': 0,
-                'cpu_temp': 0,
-                'gpu_usage': 0,
-                'gpu_temp': 0,
-                'disk_usage': 0,
-                'ram_usage': 0,
-                'system_state': 'Normal'
-            }, inplace=True)
-            
-            # Преобразование меток классов
-            data['system_state'] = data['system_state'].map(self.state_mapping)
-            
-            features = ['cpu_usage', 'cpu_temp', 'gpu_usage', 'gpu_temp', 'disk_usage', 'ram_usage']
-            X = data[features]
-            y = data['system_state']
-            
-            # Удаление строк с оставшимися NaN (если есть)
-            X = X.dropna()
-            y = y[X.index]
-            
-            if len(X) == 0:
+            for X, y in iter_log_chunks(self.data_path, self.state_mapping, chunksize or CHUNK_ROWS):
+                # Пропущенные значения признаков считаются нулями
+                X = np.where(np.isnan(X), 0.0, X)
+                # Строки с неизвестным состоянием в обучение не идут
+                known = y >= 0
+                stats.update(X[known], y[known])
+
+            if stats.rows == 0:
                 raise ValueError("Нет допустимых данных для обучения")
-                
-            self.model.fit(X, y)
-            
+
+            self.model = stats.to_model(FEATURES)
+            elapsed = time.perf_counter() - started
+            print(f"Модель обучена: {stats.rows} строк за {elapsed:.2f} с "
+                  f"({stats.rows / max(elapsed, 1e-9):,.0f} строк/с)")
+
         except Exception as e:
             print(f"Ошибка при обучении модели: {str(e)}")
-            # Создаем модель с дефолтными параметрами
-            self.model = GaussianNB()
-            # Создаем искусственные данные для обучения
-            import numpy as np
-            X = np.array([[0]*6])
-            y = np.array([0])
-            self.model.fit(X, y)
+            # Создаем модель по одной нулевой строке
+            self.model = GaussianNBStats(len(FEATURES)).update(np.zeros((1, len(FEATURES))), [0]).to_model(FEATURES)
+
+        return stats
+
+    @staticmethod
+    def as_features(data):
+        """Матрица признаков (n, 6) float64 из ndarray, DataFrame или журнала.
+
+        data - двумерный массив со столбцами в порядке FEATURES, DataFrame
+        с этими столбцами, массив записей двоичного журнала или путь к
+        журналу (двоичному или CSV).
+        """
+        if isinstance(data, (str, os.PathLike)):
+            data = open_log(data) if is_binary_log(data) else read_log(data, usecols=FEATURES)
+
+        if hasattr(data, 'columns'):  # pandas.DataFrame
+            missing = [name for name in FEATURES if name not in data.columns]
+            if missing:
+                raise ValueError(f"Нет столбцов: {', '.join(missing)}")
+            X = data[FEATURES].to_numpy(dtype=np.float64)
+        elif isinstance(data, np.ndarray) and data.dtype.names:
+            X = np.column_stack([data[name] for name in FEATURES]).astype(np.float64, copy=False)
+        else:
+            X = np.asarray(data, dtype=np.float64)
+
+        if X.ndim != 2 or X.shape[1] != len(FEATURES):
+            raise ValueError(f"Ожидается матрица (n, {len(FEATURES)}), получено {X.shape}")
+        return X
+
+    def predict_batch(self, data):
+        """Предсказание для многих отсчётов за один вызов.
+
+        Возвращает (codes, proba): коды состояний (state_mapping) и
+        вероятности классов, столбец i - класс с кодом i. Отрицательные
+        значения обрезаются до 0; строки с NaN/inf получают код -1 и
+        вероятности NaN.
+        """
+        X = np.maximum(self.as_features(data), 0.0)
+        valid = np.isfinite(X).all(axis=1)
+
+        codes = np.full(len(X), -1, dtype=np.int64)
+        proba = np.full((len(X), len(self.state_mapping)), np.nan)
+        if valid.any():
+            class_proba = self.model.predict_proba(X[valid])
+            classes = self.model.classes_
+            proba[valid] = 0.0
+            proba[np.ix_(valid, classes)] = class_proba
+            codes[valid] = classes[class_proba.argmax(axis=1)]
+        return codes, proba
+
+    def labels(self, codes):
+        """Коды состояний -> текстовые статусы ("Unknown" для неизвестных)."""
+        names = np.array([self.state_names.get(code, "Unknown") for code in range(len(self.state_mapping))] + ["Unknown"], dtype=object)
+        codes = np.asarray(codes)
+        return names[np.where((codes >= 0) & (codes < len(self.state_mapping)), codes, len(self.state_mapping))]
 
     def predict(self, cpu_usage, cpu_temp, gpu_usage, gpu_temp, disk_usage, ram_usage):
         try:
-            # Обработка входных данных
-            input_data = pd.DataFrame([{
-                'cpu_usage': max(0, float(cpu_usage)),
-                'cpu_temp': max(0, float(cpu_temp)),
-                'gpu_usage': max(0, float(gpu_usage)),
-                'gpu_temp': max(0, float(gpu_temp)),
-                'disk_usage': max(0, float(disk_usage)),
-                'ram_usage': max(0, float(ram_usage))
-            }])
-            
-            prediction = self.model.predict(input_data)[0]
-            # Обратное преобразование к текстовому статусу
-            state_mapping = {v: k for k, v in self.state_mapping.items()}
-            return state_mapping.get(prediction, "Unknown")
-            
+            # Те же правила, что в predict_batch(), но без расчёта вероятностей
+            values = [max(float(v), 0.0) for v in (cpu_usage, cpu_temp, gpu_usage, gpu_temp, disk_usage, ram_usage)]
+            if not all(map(math.isfinite, values)):
+                raise ValueError("недопустимые входные данные")
+            key = self.cache.key(values) if self.cache is not None else None
+            state = self.cache.get(key) if key is not None else None
+            if state is None:
+                if key is not None:
+                    values = self.cache.center(key)
+                state = self.state_names.get(int(self.model.predict(np.array([values]))[0]), "Unknown")
+                if key is not None:
+                    self.cache.put(key, state)
+            return state
+
         except Exception as e:
             print(f"Ошибка при предсказании: {str(e)}")
-            return "Error"
\ No newline at end of file
+            return "Error"
+
+
+def _benchmark(rows):
+    """Сравнение построчного predict() с predict_batch()."""
+    import pandas as pd
+    import joblib
+
+    model = DiagnosticModel(cache_size=0)
+    X = np.random.default_rng(0).uniform(0, 100, size=(rows, len(FEATURES)))
+
+    # Прежний путь: sklearn и DataFrame из одной строки на каждый вызов
+    sample = X[:min(rows, 2000)]
+    legacy = joblib.load(LEGACY_MODEL_FILE)
+    started = time.perf_counter()
+    for values in sample:
+        legacy.predict(pd.DataFrame([dict(zip(FEATURES, values))]))
+    legacy_time = (time.perf_counter() - started) / len(sample)
+
+    started = time.perf_counter()
+    for values in sample:
+        model.predict(*values)
+    row_time = (time.perf_counter() - started) / len(sample)
+
+    # Живые отсчёты: значения с шагом 0.1, которые часто повторяются
+    cached = DiagnosticModel()
+    repeated = np.round(sample[np.random.default_rng(1).integers(0, 50, len(sample))], 1)
+    started = time.perf_counter()
+    for values in repeated:
+        cached.predict(*values)
+    cached_time = (time.perf_counter() - started) / len(repeated)
+
+    started = time.perf_counter()
+    codes, proba = model.predict_batch(X)
+    batch_time = (time.perf_counter() - started) / rows
+
+    print(f"Строк: {rows}")
+    print(f"Прежний predict(): {legacy_time * 1e6:.1f} мкс/строка")
+    print(f"predict() сейчас:  {row_time * 1e6:.1f} мкс/строка")
+    info = cached.cache_info()
+    print(f"predict() с кэшем: {cached_time * 1e6:.1f} мкс/строка (попаданий {info['hits']}, промахов {info['misses']})")
+    print(f"predict_batch():   {batch_time * 1e6:.3f} мкс/строка ({1 / batch_time:,.0f} строк/с)")
+
+
+def _train(path, chunksize, compare):
+    """Обучение по журналу частями и сохранение модели."""
+    model = DiagnosticModel(path)
+    stats = model.train_model(chunksize)
+    model.save_model()
+    print(f"Модель сохранена в {MODEL_FILE}")
+
+    if compare:
+        # Контроль: GaussianNB на всём журнале в памяти
+        from sklearn.naive_bayes import GaussianNB
+
+        X, y = zip(*iter_log_chunks(path, model.state_mapping, CHUNK_ROWS))
+        X, y = np.where(np.isnan(np.vstack(X)), 0.0, np.vstack(X)), np.concatenate(y)
+        X, y = X[y >= 0], y[y >= 0]
+        reference = GaussianNB().fit(X, y)
+        print(f"Строк: {stats.rows} / {len(X)}")
+        print(f"Расхождение theta: {np.abs(reference.theta_ - model.model.theta_).max():.3g}, "
+              f"var: {np.abs(reference.var_ / model.model.var_ - 1).max():.3g} (отн.)")
+        print(f"Совпадение предсказаний: {np.mean(reference.predict(X) == model.model.predict(X)):.6%}")
+
+
+if __name__ == "__main__":
+    # python -m data.model.model benchmark [число_строк]
+    # python -m data.model.model train <журнал> [--chunksize N] [--compare]
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Модель диагностики")
+    commands = parser.add_subparsers(dest='command', required=True)
+    benchmark = commands.add_parser('benchmark', help="скорость predict() и predict_batch()")
+    benchmark.add_argument('rows', nargs='?', type=int, default=10000)
+    train = commands.add_parser('train', help="обучение по CSV или двоичному журналу")
+    train.add_argument('path')
+    train.add_argument('--chunksize', type=int, default=CHUNK_ROWS)
+    train.add_argument('--compare', action='store_true', help="сравнить с GaussianNB на всех данных")
+    args = parser.parse_args()
+
+    if args.command == 'benchmark':
+        _benchmark(args.rows)
+    else:
+        _train(args.path, args.chunksize, args.compare)
@@ -0,0 +1,204 @@
+"""Гауссов наивный байесовский классификатор на NumPy.
+
+Вывод повторяет sklearn.naive_bayes.GaussianNB операция в операцию,
+поэтому предсказания совпадают. Параметры хранятся в небольшом JSON
+без pickle: загрузка не импортирует scikit-learn и не исполняет код
+из файла.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+SCHEMA_VERSION = 1
+
+
+def _checksum(params):
+    canonical = json.dumps(params, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class GaussianNBStats:
+    """Достаточные статистики GaussianNB: число строк, среднее и M2 по классам.
+
+    Данные подаются частями через update(); части объединяются по формуле
+    Чана, поэтому результат совпадает с обучением на всём наборе сразу, а
+    память не зависит от числа строк.
+    """
+
+    def __init__(self, n_features):
+        self.n_features = n_features
+        self.count = {}  # Класс -> число строк
+        self.mean = {}
+        self.m2 = {}  # Сумма квадратов отклонений от среднего
+
+    @property
+    def rows(self):
+        return sum(self.count.values())
+
+    def _merge(self, label, count, mean, m2):
+        if label not in self.count:
+            self.count[label], self.mean[label], self.m2[label] = count, mean, m2
+            return
+        total = self.count[label] + count
+        delta = mean - self.mean[label]
+        self.mean[label] = self.mean[label] + delta * (count / total)
+        self.m2[label] = self.m2[label] + m2 + delta ** 2 * (self.count[label] * count / total)
+        self.count[label] = total
+
+    def update(self, X, y):
+        """Добавление части данных: X (n, n_features), y - метки классов."""
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y)
+        for label in np.unique(y):
+            rows = X[y == label]
+            mean = rows.mean(axis=0)
+            self._merge(label.item(), len(rows), mean, ((rows - mean) ** 2).sum(axis=0))
+        return self
+
+    def add(self, x, label):
+        """Добавление одной строки за O(n_features) (алгоритм Уэлфорда)."""
+        x = np.asarray(x, dtype=np.float64)
+        if label not in self.count:
+            self.count[label], self.mean[label], self.m2[label] = 1, x.copy(), np.zeros(self.n_features)
+            return
+        self.count[label] += 1
+        delta = x - self.mean[label]
+        self.mean[label] += delta / self.count[label]
+        self.m2[label] += delta * (x - self.mean[label])
+
+    @classmethod
+    def from_model(cls, model, rows):
+        """Статистики, эквивалентные rows строкам с параметрами model.
+
+        Служат начальной точкой дообучения: чем больше rows, тем медленнее
+        новые данные смещают параметры модели.
+        """
+        stats = cls(len(model.features))
+        for label, prior, theta, var in zip(model.classes_.tolist(), model.class_prior_, model.theta_, model.var_):
+            count = max(1, round(prior * rows))
+            stats.count[label], stats.mean[label], stats.m2[label] = count, theta.copy(), var * count
+        return stats
+
+    def to_dict(self):
+        classes = sorted(self.count)
+        return {
+            'classes': classes,
+            'count': [self.count[c] for c in classes],
+            'mean': [self.mean[c].tolist() for c in classes],
+            'm2': [self.m2[c].tolist() for c in classes],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls(len(data['mean'][0]) if data['mean'] else 0)
+        for label, count, mean, m2 in zip(data['classes'], data['count'], data['mean'], data['m2']):
+            stats.count[label] = count
+            stats.mean[label] = np.asarray(mean, dtype=np.float64)
+            stats.m2[label] = np.asarray(m2, dtype=np.float64)
+        return stats
+
+    def merge(self, other):
+        """Объединение со статистиками, собранными по другой части данных."""
+        for label in other.count:
+            self._merge(label, other.count[label], other.mean[label], other.m2[label])
+        return self
+
+    def to_model(self, features, var_smoothing=1e-9):
+        """NumpyGaussianNB с теми же параметрами, что дал бы GaussianNB.fit()."""
+        if not self.count:
+            raise ValueError("Нет данных для обучения")
+        classes = sorted(self.count)
+        counts = np.array([self.count[c] for c in classes], dtype=np.float64)
+        theta = np.array([self.mean[c] for c in classes])
+        m2 = np.array([self.m2[c] for c in classes])
+
+        # Дисперсия по всем данным (для сглаживания, как epsilon_ в sklearn)
+        total = counts.sum()
+        overall_mean = counts @ theta / total
+        overall_var = (m2.sum(axis=0) + counts @ (theta - overall_mean) ** 2) / total
+        epsilon = var_smoothing * overall_var.max()
+
+        var = m2 / counts[:, None] + epsilon
+        return NumpyGaussianNB(theta, var, counts / total, classes, features)
+
+
+class NumpyGaussianNB:
+    """Параметры обученного GaussianNB и вывод по ним."""
+
+    def __init__(self, theta, var, class_prior, classes, features):
+        self.theta_ = np.asarray(theta, dtype=np.float64)
+        self.var_ = np.asarray(var, dtype=np.float64)
+        self.class_prior_ = np.asarray(class_prior, dtype=np.float64)
+        self.classes_ = np.asarray(classes)
+        self.features = list(features)
+
+        n_classes, n_features = self.theta_.shape
+        if self.var_.shape != self.theta_.shape or self.class_prior_.shape != (n_classes,) \
+                or self.classes_.shape != (n_classes,) or len(self.features) != n_features:
+            raise ValueError("Несогласованные размеры параметров модели")
+
+        # Слагаемые, не зависящие от входных данных, считаются один раз
+        with np.errstate(divide='ignore'):
+            self._log_prior = np.log(self.class_prior_)
+        self._log_norm = np.array([-0.5 * np.sum(np.log(2.0 * np.pi * v)) for v in self.var_])
+
+    @classmethod
+    def from_sklearn(cls, model, features):
+        """Перенос параметров из обученного sklearn GaussianNB."""
+        var = model.var_ if hasattr(model, 'var_') else model.sigma_
+        return cls(model.theta_, var, model.class_prior_, model.classes_, features)
+
+    def predict_joint_log_proba(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        jll = np.empty((len(X), len(self.classes_)))
+        for i in range(len(self.classes_)):
+            # Тот же порядок операций, что в GaussianNB._joint_log_likelihood
+            n_ij = self._log_norm[i] - 0.5 * np.sum(((X - self.theta_[i, :]) ** 2) / self.var_[i, :], 1)
+            jll[:, i] = n_ij + self._log_prior[i]
+        return jll
+
+    def predict_log_proba(self, X):
+        jll = self.predict_joint_log_proba(X)
+        # logsumexp по классам
+        top = jll.max(axis=1, keepdims=True)
+        log_norm = top + np.log(np.sum(np.exp(jll - top), axis=1, keepdims=True))
+        return jll - log_norm
+
+    def predict_proba(self, X):
+        return np.exp(self.predict_log_proba(X))
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_joint_log_proba(X), axis=1)]
+
+    def to_dict(self):
+        params = {
+            'features': self.features,
+            'classes': self.classes_.tolist(),
+            'class_prior': self.class_prior_.tolist(),
+            'theta': self.theta_.tolist(),
+            'var': self.var_.tolist(),
+        }
+        return {'schema_version': SCHEMA_VERSION, 'checksum': _checksum(params), 'params': params}
+
+    def save(self, path):
+        """Атомарная запись параметров в JSON."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Загрузка параметров с проверкой версии схемы и контрольной суммы."""
+        with open(path) as f:
+            data = json.load(f)
+
+        if data.get('schema_version') != SCHEMA_VERSION:
+            raise ValueError(f"{path}: неподдерживаемая версия схемы {data.get('schema_version')}")
+        params = data['params']
+        if _checksum(params) != data.get('checksum'):
+            raise ValueError(f"{path}: контрольная сумма не совпадает")
+
+        return cls(params['theta'], params['var'], params['class_prior'], params['classes'], params['features'])
@@ -0,0 +1,259 @@
+"""Дообучение модели по потоку отсчётов.
+
+Подтверждённые или размеченные правилами отсчёты добавляются в
+достаточные статистики GaussianNB за O(число признаков). Модель
+пересчитывается из статистик каждые refresh_every отсчётов, а на диск
+сохраняется контрольной точкой раз в checkpoint_interval секунд.
+
+Предыдущая прошедшая проверку контрольная точка хранится рядом
+(<файл>.prev): rollback() возвращает к ней, reset() - к исходной модели.
+Если текущая точка не загружается, при запуске берётся предыдущая.
+Контрольная точка помнит контрольную сумму исходной модели (MODEL_FILE):
+после её переобучения или замены точка не используется.
+
+    python -m data.model.online status|rollback|reset
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+
+from data.model.model import FEATURES, MODEL_FILE, ONLINE_MODEL_FILE, model_checksum
+from data.model.naive_bayes import GaussianNBStats, NumpyGaussianNB
+
+
+def _stats_checksum(stats):
+    canonical = json.dumps(stats, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def previous_path(path):
+    return f"{path}.prev"
+
+
+def _fsync_directory(path):
+    """Сброс на диск каталога файла path (переименования в нём)."""
+    if not hasattr(os, 'O_DIRECTORY'):  # Windows: каталог не открывается
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def save_checkpoint(path, model, stats, base_checksum=None):
+    """Атомарная запись модели вместе со статистиками.
+
+    Файл читается и как обычная модель (NumpyGaussianNB.load), прежний
+    файл сохраняется как <path>.prev. base_checksum - контрольная сумма
+    исходной модели, на которой построено дообучение.
+
+    Прежний файл сначала связывается (или копируется) в <path>.prev, затем
+    одним os.replace заменяется новым: в любой момент path существует и
+    содержит одну из двух точек.
+    """
+    data = model.to_dict()
+    data['stats'] = stats.to_dict()
+    data['stats_checksum'] = _stats_checksum(data['stats'])
+    data['base_checksum'] = base_checksum
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    if os.path.exists(path):
+        prev_tmp = f"{previous_path(path)}.tmp"
+        if os.path.exists(prev_tmp):
+            os.remove(prev_tmp)
+        try:
+            os.link(path, prev_tmp)
+        except OSError:  # Жёсткие ссылки не поддерживаются файловой системой
+            shutil.copy2(path, prev_tmp)
+        os.replace(prev_tmp, previous_path(path))
+    os.replace(tmp_path, path)
+    _fsync_directory(path)
+
+
+def load_checkpoint(path, base_checksum=None):
+    """(модель, статистики) из контрольной точки с проверкой контрольных сумм.
+
+    Если задан base_checksum, точка должна быть построена на исходной
+    модели с этой контрольной суммой.
+    """
+    model = NumpyGaussianNB.load(path)
+    with open(path) as f:
+        data = json.load(f)
+    if _stats_checksum(data.get('stats')) != data.get('stats_checksum'):
+        raise ValueError(f"{path}: контрольная сумма статистик не совпадает")
+    if base_checksum is not None and data.get('base_checksum') != base_checksum:
+        raise ValueError(f"{path}: построена на другой базовой модели")
+    return model, GaussianNBStats.from_dict(data['stats'])
+
+
+def is_valid_model(model, classes=None):
+    """Проверка перед сохранением: конечные параметры, дисперсии > 0, все классы на месте."""
+    if not (np.isfinite(model.theta_).all() and np.isfinite(model.var_).all() and (model.var_ > 0).all()):
+        return False
+    return classes is None or set(classes) <= set(model.classes_.tolist())
+
+
+class OnlineTrainer:
+    """Дообучение DiagnosticModel по отсчётам во время работы.
+
+    add() вызывается из потока сбора; модель в DiagnosticModel заменяется
+    целиком, поэтому предсказания в других потоках не видят её
+    в промежуточном состоянии.
+    """
+
+    def __init__(self, diagnostic_model, path=ONLINE_MODEL_FILE, checkpoint_interval=300.0,
+                 refresh_every=100, prior_rows=1000):
+        self.diagnostic_model = diagnostic_model
+        self.path = path
+        self.checkpoint_interval = checkpoint_interval
+        self.refresh_every = refresh_every
+        self.prior_rows = prior_rows
+        self._lock = threading.Lock()
+        self._pending = 0  # Отсчёты, ещё не учтённые в модели
+        self._checkpointed_at = time.monotonic()
+        self.added = 0
+        self.base_checksum = model_checksum(MODEL_FILE)
+
+        # Повреждённая текущая точка заменяется предыдущей
+        for name in (path, previous_path(path)):
+            try:
+                model, self.stats = load_checkpoint(name, self.base_checksum)
+            except (OSError, ValueError, KeyError):
+                continue
+            if name != path:
+                print(f"Контрольная точка {path} не загружается, используется {name}")
+            self.diagnostic_model.model = model
+            break
+        else:
+            # Начинаем с текущей модели, как если бы она была обучена на prior_rows строках
+            self.stats = GaussianNBStats.from_model(diagnostic_model.model, prior_rows)
+        self.classes = sorted(self.stats.count)
+
+    def add(self, values, state):
+        """Учёт отсчёта с меткой state; False, если метка не из state_mapping."""
+        label = self.diagnostic_model.state_mapping.get(state)
+        if label is None:
+            return False
+        x = np.asarray(values, dtype=np.float64)
+        # Как при обучении: пропуски - нули, отрицательные значения обрезаются
+        x = np.maximum(np.where(np.isnan(x), 0.0, x), 0.0)
+
+        with self._lock:
+            self.stats.add(x, label)
+            self.added += 1
+            self._pending += 1
+            if self._pending >= self.refresh_every:
+                self._refresh()
+            if time.monotonic() - self._checkpointed_at >= self.checkpoint_interval:
+                self._checkpoint()
+        return True
+
+    def refresh(self):
+        """Пересчёт модели из накопленных статистик."""
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self):
+        self._pending = 0
+        model = self.stats.to_model(FEATURES)
+        if not is_valid_model(model, self.classes):
+            print("Дообученная модель не прошла проверку, возврат к последней контрольной точке")
+            self._restore(self.path)
+            return False
+        self.diagnostic_model.model = model
+        return True
+
+    def checkpoint(self):
+        """Сохранение модели и статистик на диск."""
+        with self._lock:
+            return self._checkpoint()
+
+    def _checkpoint(self):
+        self._checkpointed_at = time.monotonic()
+        if not self._refresh():
+            return False
+        try:
+            save_checkpoint(self.path, self.diagnostic_model.model, self.stats, self.base_checksum)
+            return True
+        except OSError as e:
+            print(f"Не удалось сохранить контрольную точку: {e}")
+            return False
+
+    def rollback(self):
+        """Возврат к предыдущей контрольной точке (или к исходной модели)."""
+        with self._lock:
+            self._rollback()
+
+    def _rollback(self):
+        if self._restore(previous_path(self.path)):
+            # Предыдущая точка становится текущей
+            os.replace(previous_path(self.path), self.path)
+        elif os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _restore(self, path):
+        """Загрузка контрольной точки path; при её отсутствии - исходной модели.
+
+        Если и исходная модель не загружается, остаётся текущая модель
+        (она уже прошла проверку), статистики строятся по ней.
+        """
+        self._pending = 0
+        try:
+            model, stats = load_checkpoint(path, self.base_checksum)
+            restored = True
+        except (OSError, ValueError, KeyError):
+            try:
+                model = NumpyGaussianNB.load(MODEL_FILE)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Ошибка загрузки модели {MODEL_FILE}: {e}, оставлена текущая модель")
+                model = self.diagnostic_model.model
+            stats = GaussianNBStats.from_model(model, self.prior_rows)
+            restored = False
+        self.stats = stats
+        self.diagnostic_model.model = model
+        return restored
+
+
+def reset(path=ONLINE_MODEL_FILE):
+    """Удаление контрольных точек: следующая загрузка возьмёт исходную модель."""
+    for name in (path, previous_path(path)):
+        if os.path.exists(name):
+            os.remove(name)
+
+
+if __name__ == "__main__":
+    import sys
+
+    command = sys.argv[1] if len(sys.argv) > 1 else 'status'
+    if command == 'rollback':
+        from data.model.model import DiagnosticModel
+        trainer = OnlineTrainer(DiagnosticModel())
+        trainer.rollback()
+        print(f"Текущая модель: {ONLINE_MODEL_FILE if os.path.exists(ONLINE_MODEL_FILE) else MODEL_FILE}")
+    elif command == 'reset':
+        reset()
+        print(f"Контрольные точки удалены, используется {MODEL_FILE}")
+    elif command == 'status':
+        base = model_checksum(MODEL_FILE)
+        for name in (ONLINE_MODEL_FILE, previous_path(ONLINE_MODEL_FILE)):
+            try:
+                _, stats = load_checkpoint(name)
+                with open(name) as f:
+                    matches = json.load(f).get('base_checksum') == base
+                print(f"{name}: строк {stats.rows}, по классам {stats.count}, "
+                      f"{'текущая' if matches else 'другая (не используется)'} базовая модель")
+            except (OSError, ValueError, KeyError) as e:
+                print(f"{name}: нет ({e.__class__.__name__})")
+    else:
+        print("Использование: python -m data.model.online status|rollback|reset")
+        sys.exit(1)
@@ -1,4 +1,4 @@
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer, QSize, QProcess
+from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer, QSize, QProcess, QEvent
 from PyQt6.QtWidgets import (
     QApplication, QSizePolicy, QMainWindow, QVBoxLayout, QHBoxLayout, QLabel,
     QPushButton, QWidget, QStackedWidget, QListWidget, QGridLayout, QListWidgetItem, QMenu,
@@ -6,63 +6,160 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtGui import QPixmap, QAction, QIcon
 
-from data.model.model import DiagnosticModel
-from core.cpu import get_cpu_info
-from core.gpu import monitor_gpu
-from core.ram import monitor_ram
-from core.hdd import monitor_hdd
-from core.moth import get_motherboard_info
-from core.volt import get_voltage_info
+# Модель, psutil и NVML импортируются лениво: к первому кадру загружен только PyQt
 
 
-import sys, json, time, random, math, multiprocessing, subprocess
+import os, sys, json, time, random, math, multiprocessing, subprocess
+
+# Коллекторы, которые нужны для оценки состояния системы
+STATE_COLLECTORS = ('cpu', 'gpu', 'ram', 'hdd')
+
+
+def worst_state(*states):
+    """Самое тяжёлое из состояний (неизвестные и Error - тяжелее Critical)"""
+    from core.rules import LEVELS
+    return max(states, key=lambda state: LEVELS.index(state) if state in LEVELS else len(LEVELS))
+
+
+def _reading(data, *path):
+    """Значение метрики по пути ключей и индексов в данных коллектора.
+
+    None, если коллектор недоступен (None в снимке), значения нет или оно
+    не числовое.
+    """
+    for key in path:
+        try:
+            data = data[key]
+        except (KeyError, IndexError, TypeError):
+            return None
+    if isinstance(data, bool) or not isinstance(data, (int, float)):
+        return None
+    return data
 
 
 class DiagnosticThread(QThread):
+    """Диагностика в два этапа: параллельный сбор данных и оценка моделью.
+
+    Прогресс отражает реальное выполнение: этап сбора занимает первые
+    COLLECT_PROGRESS процентов и продвигается по мере готовности каждого
+    компонента, затем сразу запускается модель.
+
+    При подключённых признаках по окнам (core.features) модель оценивает
+    и текущий снимок, и средние за окно FEATURE_WINDOW, вердикт - более
+    тяжёлый из двух: устойчивая нагрузка видна, даже если снимок спокойный,
+    а только что измеренный всплеск не теряется в среднем. Среднее
+    метрики используется, когда в окне не меньше MIN_WINDOW_SAMPLES
+    действительно измеренных отсчётов (в истории неопрошенные метрики - NaN).
+    Метрики коллектора, не ответившего вовремя, берутся из окна или
+    считаются нулевыми; ошибка - только если недоступны все метрики.
+    """
     update_signal = pyqtSignal(int, str)
     finished_signal = pyqtSignal(dict, str)
 
-    def __init__(self, model):
+    COLLECT_PROGRESS = 80
+    COLLECT_TIMEOUT = 5  # Общий предел ожидания данных, сек
+    FEATURE_WINDOW = 60.0  # Окно усреднения метрик, сек
+    MIN_WINDOW_SAMPLES = 3
+
+    def __init__(self, model, sampler, features=None):
         super().__init__()
         self.model = model
+        self.sampler = sampler
+        self.features = features
 
     def run(self):
-        # Сбор данных
+        # Этап 1: сбор данных. Коллекторы общего сборщика работают параллельно,
+        # каждый со своим таймаутом; прогресс - по завершении каждого из них
+        requested_at = time.monotonic()
+        collected = set()
+
+        def on_collected(name, started_at):
+            if name in STATE_COLLECTORS and started_at >= requested_at and name not in collected:
+                collected.add(name)
+                progress = self.COLLECT_PROGRESS * len(collected) // len(STATE_COLLECTORS)
+                self.update_signal.emit(progress, f"Сбор данных: {name.upper()}...")
+
+        self.update_signal.emit(0, "Сбор данных...")
+        self.sampler.add_listener(on_collected)
+        try:
+            snapshot = self.sampler.refresh('diagnostic', STATE_COLLECTORS, timeout=self.COLLECT_TIMEOUT)
+        finally:
+            self.sampler.remove_listener(on_collected)
+            self.sampler.set_demand('diagnostic')
         components = {
-            'CPU': get_cpu_info(),
-            'GPU': monitor_gpu(),
-            'RAM': monitor_ram(),
-            'HDD': monitor_hdd()
+            'CPU': snapshot.cpu,
+            'GPU': snapshot.gpu,
+            'RAM': snapshot.ram,
+            'HDD': snapshot.hdd
         }
         
-        # Эмуляция прогресса
-        for i in range(1, 101):
-            time.sleep(0.03)  # Для визуализации прогресса
-            self.update_signal.emit(i, "Сбор данных...")
-        
-        # Получение прогноза
-        cpu_data = components['CPU']
-        gpu_data = components['GPU'][0] if components['GPU'] else None
-        
-        if not all([cpu_data, gpu_data]):
+        # Этап 2: получение прогноза. Коллектор, не успевший за свой таймаут
+        # или завершившийся ошибкой, даёт None - его метрики недоступны
+        self.update_signal.emit(self.COLLECT_PROGRESS, "Анализ данных...")
+        values = {
+            'cpu_usage': _reading(snapshot.cpu, 'usage'),
+            'cpu_temp': _reading(snapshot.cpu, 'temperatures', 'coretemp', 0, 'current'),
+            'gpu_usage': _reading(snapshot.gpu, 0, 'load'),
+            'gpu_temp': _reading(snapshot.gpu, 0, 'temperature'),
+            'disk_usage': _reading(snapshot.hdd, 'percent'),
+            'ram_usage': _reading(snapshot.ram, 'percent'),
+        }
+        if all(value is None for value in values.values()):
             self.finished_signal.emit({}, "Ошибка сбора данных")
             return
-
-        prediction = self.model.predict(
-            cpu_usage=cpu_data.get('usage', 0),
-            cpu_temp=cpu_data.get('temperatures', {}).get('coretemp', [{}])[0].get('current', 0),
-            gpu_usage=gpu_data.get('load', 0),
-            gpu_temp=gpu_data.get('temperature', 0),
-            disk_usage=components['HDD'].get('percent', 0),
-            ram_usage=components['RAM'].get('percent', 0)
-        )
-        
+        components['CURRENT'] = values
+
+        # Средние по метрикам с достаточным числом измерений в окне
+        means = {}
+        if self.features is not None:
+            window = self.features.window(self.FEATURE_WINDOW, now=snapshot.timestamp)
+            components['WINDOW'] = window
+            for name, count, mean in zip(self.features.metrics, window.count.tolist(), window.mean.tolist()):
+                if count >= self.MIN_WINDOW_SAMPLES:
+                    means[name] = mean
+
+        # Недоступная метрика берётся из окна, без него - 0, как пропуски при обучении
+        current = {name: means.get(name, 0.0) if value is None else value for name, value in values.items()}
+        prediction = self.model.predict(**current)
+        averaged = dict(current, **means)
+        if averaged != current:
+            prediction = worst_state(prediction, self.model.predict(**averaged))
+        
+        self.update_signal.emit(100, "Готово")
         self.finished_signal.emit(components, prediction)
 
 
+class WarmUpThread(QThread):
+    """Фоновая загрузка тяжёлых библиотек и модели после первого кадра"""
+    loaded_signal = pyqtSignal(object)
+
+    def run(self):
+        # Импорт здесь, чтобы pandas/scikit-learn не задерживали появление окна
+        import core.sampler, core.inventory, core.history, core.features
+        from data.model.model import DiagnosticModel
+
+        try:
+            model = DiagnosticModel()
+        except Exception as e:
+            print(f"Ошибка загрузки модели: {str(e)}")
+            model = None
+        self.loaded_signal.emit(model)
+
+
 class MainWindow(QMainWindow):
+    warm_up_finished = pyqtSignal()
+
+    # Длительность тестов диска, памяти и стабильности: экран тестирования останавливает тесты через 60 с,
+    # итоговый отчёт должен успеть вывестись до этого
+    TEST_SECONDS = 50
+
     def __init__(self):
         super().__init__()
+        self._screen_polls = {}  # Экран -> (таймер, обработчик, коллекторы)
+        self._sampler = None
+        self.features = None  # Признаки по окнам истории (core.features), создаются вместе со сборщиком
+        self._inventory = None
+        self.diagnostic_model = None
         self.setWindowTitle("Диагностика системы")
         self.setMinimumSize(800, 600)  # Минимальный размер окна
         self.setGeometry(100, 100, 1200, 800)
@@ -95,9 +192,140 @@ class MainWindow(QMainWindow):
 
         self.setCentralWidget(main_widget)
         self.create_menus()
+
+        # Стилизация групп для всех экранов
+        self.setStyleSheet("""
+            QGroupBox {
+                font-size: 14px;
+                border: 1px solid #ddd;
+                border-radius: 5px;
+                margin-top: 10px;
+                padding-top: 15px;
+            }
+            QGroupBox::title {
+                subcontrol-origin: margin;
+                left: 10px;
+                padding: 0 3px;
+            }
+        """)
+
+        self._rendered_seq = {}
+        self._screen_forms = {}  # Кэш построенных форм экранов
         
         self.init_screens()
 
+        # Опрашиваем только видимый экран
+        self.stacked_widget.currentChanged.connect(lambda _: self._update_polling())
+        self._update_polling()
+
+        self._warm_up_started = False
+
+    @property
+    def sampler(self):
+        """Единый фоновый сборщик метрик (создаётся при первом обращении).
+
+        BACKGROUND_INTERVAL (сек) включает редкий фоновый сбор для скрытых экранов.
+        """
+        if self._sampler is None:
+            from core.history import MetricsStore
+            from core.sampler import SamplingEngine
+            from core.features import WindowedFeatures
+            background_interval = os.getenv('BACKGROUND_INTERVAL')
+            history = MetricsStore()
+            self.features = history.attach(WindowedFeatures())
+            self._sampler = SamplingEngine(
+                background_interval=float(background_interval) if background_interval else None,
+                history=history
+            )
+            self._sampler.start()
+        return self._sampler
+
+    @property
+    def inventory(self):
+        """Статические сведения об оборудовании (загружаются в фоне при старте)."""
+        if self._inventory is None:
+            from core.inventory import get_inventory
+            self._inventory = get_inventory()
+        return self._inventory
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        # Тяжёлые библиотеки и модель грузятся в фоне после первого кадра
+        if not self._warm_up_started:
+            self._warm_up_started = True
+            QTimer.singleShot(0, self._start_warm_up)
+
+    def _start_warm_up(self):
+        """Запуск фоновой загрузки модели и сведений об оборудовании."""
+        self.inventory.load_async()
+        self.warm_up_thread = WarmUpThread()
+        self.warm_up_thread.loaded_signal.connect(self._on_warm_up_finished)
+        self.warm_up_thread.start()
+
+    def _on_warm_up_finished(self, model):
+        """Модель загружена - приложение полностью готово к работе."""
+        self.diagnostic_model = model
+        self.sampler.start()
+        if hasattr(self, 'diagnose_btn'):
+            self.diagnose_btn.setEnabled(model is not None)
+        self.warm_up_finished.emit()
+
+    def closeEvent(self, event):
+        """Остановка фонового сбора при закрытии окна."""
+        if self._sampler is not None:
+            self._sampler.stop()
+        super().closeEvent(event)
+
+    def changeEvent(self, event):
+        """Приостановка опроса при сворачивании окна."""
+        if event.type() == QEvent.Type.WindowStateChange and self._screen_polls:
+            self._update_polling()
+        super().changeEvent(event)
+
+    def _screen_timer(self, screen, update, interval, collectors=()):
+        """Таймер обновления экрана, работающий только пока экран виден."""
+        timer = QTimer()
+        timer.timeout.connect(update)
+        timer.setInterval(interval)
+        self._screen_polls[screen] = (timer, update, frozenset(collectors))
+        return timer
+
+    def _update_polling(self):
+        """Запускает опрос только для видимого экрана.
+
+        Таймеры скрытых экранов останавливаются, а их коллекторы снимаются
+        с запроса у SamplingEngine; при свёрнутом окне опрос не идёт вовсе.
+        """
+        current = None if self.isMinimized() else self.stacked_widget.currentWidget()
+        poll = self._screen_polls.get(current)
+        collectors = poll[2] if poll else frozenset()
+        # Сборщик создаётся только когда экрану действительно нужны данные
+        if collectors or self._sampler is not None:
+            self.sampler.set_demand('screen', collectors)
+
+        for screen, (timer, update, collectors) in self._screen_polls.items():
+            if screen is not current:
+                timer.stop()
+            elif not timer.isActive():
+                timer.start()
+                # Первая отрисовка - как только сборщик успеет опросить датчики
+                QTimer.singleShot(100 if collectors else 0, update)
+
+    def _state_snapshot(self):
+        """Свежий снимок CPU/GPU/RAM/HDD, даже если их экраны скрыты"""
+        try:
+            return self.sampler.refresh('state', STATE_COLLECTORS, timeout=2)
+        finally:
+            self.sampler.set_demand('state')
+
+    def _fresh_snapshot(self, screen):
+        """Возвращает снимок, если экран его ещё не отрисовывал, иначе None."""
+        snapshot = self.sampler.snapshot()
+        if self._rendered_seq.get(screen) == snapshot.seq:
+            return None
+        self._rendered_seq[screen] = snapshot.seq
+        return snapshot
+
     def init_menu_list(self):
         """Инициализация левого меню с иконками."""
         menu_items = [
@@ -315,27 +543,35 @@ class MainWindow(QMainWindow):
         )
 
     def init_screens(self):
-        """Инициализация экранов для QStackedWidget."""
-        self.general_info_screen = self.create_general_screen()
-        self.processor_screen = self.CPU_info_screen("Процессор", "Информация о процессоре.", "gui/img/cpu.png")
-        self.memory_screen = self.RAM_info_screen("Оперативная память", "Информация о памяти.", "gui/img/ram.png")
-        self.disk_screen = self.HDD_info_screen("Дисковая подсистема", "Информация о дисках.", "gui/img/disk.png")
-        self.gpu_screen = self.GPU_info_screen("Видеокарта", "Информация о видеокарте.", "gui/img/gpu.png")
-        self.motherboard_screen = self.MB_info_screen("Материнская плата", "Информация о материнской плате.", "gui/img/motherboard.png")
-        self.voltage_screen = self.Voltage_info_screen("Напряжение", "Информация о напряжении.", "gui/img/volt.png")
-        self.diagnostic_screen = self.create_diagnostic_screen("Диагностика", "Режим диагностики системы.", "gui/img/diag.png")
-        self.testing_screen = self.create_testing_screen("Тестирование", "Тестирование системы на устойчивость.", "gui/img/test.png")
-        
-        self.stacked_widget.addWidget(self.general_info_screen)
-        self.stacked_widget.addWidget(self.processor_screen)
-        self.stacked_widget.addWidget(self.memory_screen)
-        self.stacked_widget.addWidget(self.disk_screen)
-        self.stacked_widget.addWidget(self.gpu_screen)
-        self.stacked_widget.addWidget(self.motherboard_screen)
-        self.stacked_widget.addWidget(self.voltage_screen)
-        self.stacked_widget.addWidget(self.diagnostic_screen)
-        self.stacked_widget.addWidget(self.testing_screen)
-        self.stacked_widget.setCurrentWidget(self.general_info_screen)
+        """Инициализация экранов для QStackedWidget.
+
+        Сразу строится только экран 'Общие сведения', остальные - при
+        первом показе (см. _get_screen).
+        """
+        self._screen_factories = {
+            "Общие сведения": ('general_info_screen', lambda: self.create_general_screen()),
+            "Процессор": ('processor_screen', lambda: self.CPU_info_screen("Процессор", "Информация о процессоре.", "gui/img/cpu.png")),
+            "Оперативная память": ('memory_screen', lambda: self.RAM_info_screen("Оперативная память", "Информация о памяти.", "gui/img/ram.png")),
+            "Дисковая подсистема": ('disk_screen', lambda: self.HDD_info_screen("Дисковая подсистема", "Информация о дисках.", "gui/img/disk.png")),
+            "Видеокарта": ('gpu_screen', lambda: self.GPU_info_screen("Видеокарта", "Информация о видеокарте.", "gui/img/gpu.png")),
+            "Материнская плата": ('motherboard_screen', lambda: self.MB_info_screen("Материнская плата", "Информация о материнской плате.", "gui/img/motherboard.png")),
+            "Напряжение": ('voltage_screen', lambda: self.Voltage_info_screen("Напряжение", "Информация о напряжении.", "gui/img/volt.png")),
+            "Диагностика": ('diagnostic_screen', lambda: self.create_diagnostic_screen("Диагностика", "Режим диагностики системы.", "gui/img/diag.png")),
+            "Тестирование": ('testing_screen', lambda: self.create_testing_screen("Тестирование", "Тестирование системы на устойчивость.", "gui/img/test.png")),
+        }
+        self._screens = {}
+        self.stacked_widget.setCurrentWidget(self._get_screen("Общие сведения"))
+
+    def _get_screen(self, title):
+        """Возвращает экран по заголовку, создавая его при первом обращении."""
+        screen = self._screens.get(title)
+        if screen is None and title in self._screen_factories:
+            attr, factory = self._screen_factories[title]
+            screen = factory()
+            setattr(self, attr, screen)
+            self._screens[title] = screen
+            self.stacked_widget.addWidget(screen)
+        return screen
 
     def create_general_screen(self):
         """Создаем экран 'Общие сведения' с сеткой карточек."""
@@ -495,11 +731,12 @@ class MainWindow(QMainWindow):
 
     def get_system_state(self):
         """Получение текущего состояния системы"""
+        snapshot = self._state_snapshot()
         state = {
-            'CPU': get_cpu_info(),
-            'RAM': monitor_ram(),
-            'GPU': monitor_gpu()[0] if monitor_gpu() else {},
-            'HDD': monitor_hdd()
+            'CPU': snapshot.cpu,
+            'RAM': snapshot.ram,
+            'GPU': snapshot.gpu[0] if snapshot.gpu else {},
+            'HDD': snapshot.hdd
         }
         return state
 
@@ -576,70 +813,50 @@ class MainWindow(QMainWindow):
         main_layout.addWidget(scroll)
 
         # Таймер обновления
-        self.cpu_timer = QTimer()
-        self.cpu_timer.timeout.connect(self.update_cpu_info)
-        self.cpu_timer.start(500)  # обновление каждые 0.5 секунды
+        self.cpu_timer = self._screen_timer(screen, self.update_cpu_info, 500, {'cpu'})  # обновление каждые 0.5 секунды
 
         return screen
 
     def update_cpu_info(self):
         """Обновление информации о процессоре с улучшенным дизайном"""
-        cpu_data = get_cpu_info()  # Получаем словарь
-
-        # Очищаем контейнер перед обновлением
-        while self.cpu_info_layout.count():
-            item = self.cpu_info_layout.takeAt(0)
-            widget = item.widget()
-            if widget:
-                widget.deleteLater()
+        snapshot = self._fresh_snapshot('cpu')
+        if snapshot is None:
+            return
+        cpu_data = snapshot.cpu or {"error": "Нет данных"}
 
         if "error" in cpu_data:
-            error_label = QLabel(f"Ошибка: {cpu_data['error']}")
-            error_label.setStyleSheet("color: red; font-weight: bold;")
-            self.cpu_info_layout.addWidget(error_label, alignment=Qt.AlignmentFlag.AlignCenter)
+            self._render_form('cpu', self.cpu_info_layout, error=cpu_data['error'])
             return
 
         # Основные параметры
-        main_group = QGroupBox("Основные параметры")
-        main_layout = QFormLayout()
-        main_layout.addRow("Загрузка:", self._create_colored_label(f"{cpu_data['usage']}%", 'percent'))
-        main_layout.addRow("Ядра:", QLabel(str(cpu_data['cores'])))
-        main_layout.addRow("Потоки:", QLabel(str(cpu_data['threads'])))
-        main_layout.addRow("Текущая частота:", QLabel(f"{cpu_data['freq_current']} MHz"))
-        main_layout.addRow("Минимальная частота:", QLabel(f"{cpu_data['freq_min']} MHz"))
-        main_layout.addRow("Максимальная частота:", QLabel(f"{cpu_data['freq_max']} MHz"))
-        main_group.setLayout(main_layout)
-        self.cpu_info_layout.addWidget(main_group)
+        groups = [("Основные параметры", [
+            ("Загрузка:", f"{cpu_data['usage']}%", 'percent'),
+            ("Ядра:", cpu_data['cores'], None),
+            ("Потоки:", cpu_data['threads'], None),
+            ("Текущая частота:", f"{cpu_data['freq_current']} MHz", None),
+            ("Минимальная частота:", f"{cpu_data['freq_min']} MHz", None),
+            ("Максимальная частота:", f"{cpu_data['freq_max']} MHz", None),
+        ])]
 
         # Температуры
         if cpu_data["temperatures"]:
-            temp_group = QGroupBox("Температуры")
-            temp_layout = QFormLayout()
-            
+            temp_rows = []
             for sensor, entries in cpu_data["temperatures"].items():
                 # Добавляем разделитель между сенсорами
-                if temp_layout.rowCount() > 0:
-                    separator = QFrame()
-                    separator.setFrameShape(QFrame.Shape.HLine)
-                    separator.setFrameShadow(QFrame.Shadow.Sunken)
-                    temp_layout.addRow(separator)
-                
+                if temp_rows:
+                    temp_rows.append(None)
+
                 for entry in entries:
-                    label = entry['label']
-                    current = entry['current']
                     high = entry.get('high', 'N/A')
                     critical = entry.get('critical', 'N/A')
-                    
-                    temp_layout.addRow(
-                        f"{label}:", 
-                        self._create_colored_label(f"{current}°C (макс: {high}, крит: {critical})", 'temp')
-                    )
-            
-            temp_group.setLayout(temp_layout)
-            self.cpu_info_layout.addWidget(temp_group)
+                    temp_rows.append((
+                        f"{entry['label']}:",
+                        f"{entry['current']}°C (макс: {high}, крит: {critical})",
+                        'temp'
+                    ))
+            groups.append(("Температуры", temp_rows))
 
-        # Добавляем растяжку в конце
-        self.cpu_info_layout.addStretch()
+        self._render_form('cpu', self.cpu_info_layout, groups)
         
     def GPU_info_screen(self, title, description, image_path=None):
         screen = QWidget()
@@ -664,53 +881,43 @@ class MainWindow(QMainWindow):
         main_layout.addWidget(scroll)
 
         # Таймер для обновления данных
-        self.gpu_timer = QTimer()
-        self.gpu_timer.timeout.connect(self.update_gpu_info)
-        self.gpu_timer.start(500)  # Обновление каждую секунду
+        self.gpu_timer = self._screen_timer(screen, self.update_gpu_info, 500, {'gpu'})  # Обновление каждые 0.5 секунды
 
         return screen
 
     def update_gpu_info(self):
         """Обновление информации о видеокарте с улучшенным дизайном"""
-        gpu_data_list = monitor_gpu()
-
-        # Очищаем контейнер перед обновлением
-        while self.gpu_info_layout.count():
-            item = self.gpu_info_layout.takeAt(0)
-            widget = item.widget()
-            if widget:
-                widget.deleteLater()
+        snapshot = self._fresh_snapshot('gpu')
+        if snapshot is None:
+            return
+        gpu_data_list = snapshot.gpu
 
         if not gpu_data_list:
-            error_label = QLabel("Ошибка: Не удалось получить данные о видеокарте")
-            error_label.setStyleSheet("color: red; font-weight: bold;")
-            self.gpu_info_layout.addWidget(error_label, alignment=Qt.AlignmentFlag.AlignCenter)
+            self._render_form('gpu', self.gpu_info_layout, error="Не удалось получить данные о видеокарте")
             return
 
+        groups = []
         for i, gpu_data in enumerate(gpu_data_list):
-            # Группа для каждой видеокарты
-            gpu_group = QGroupBox(f"Видеокарта {i}: {gpu_data.get('gpu', 'Неизвестно')}")
-            gpu_layout = QFormLayout()
-            
             # Основные параметры
-            gpu_layout.addRow("Загрузка GPU:", self._create_colored_label(f"{gpu_data['load']}%", 'percent'))
-            gpu_layout.addRow("Загрузка памяти:", self._create_colored_label(f"{gpu_data['ram_load']}%", 'percent'))
-            gpu_layout.addRow("Температура:", self._create_colored_label(f"{gpu_data['temperature']}°C", 'temp'))
-            gpu_layout.addRow("Частота чипа:", QLabel(f"{gpu_data['chip']} МГц"))
-            
+            rows = [
+                ("Загрузка GPU:", f"{gpu_data['load']}%", 'percent'),
+                ("Загрузка памяти:", f"{gpu_data['ram_load']}%", 'percent'),
+                ("Температура:", f"{gpu_data['temperature']}°C", 'temp'),
+                ("Частота чипа:", f"{gpu_data['chip']} МГц", None),
+            ]
+
             # Дополнительные параметры, если есть
             if 'memory_total' in gpu_data:
-                gpu_layout.addRow("Объем памяти:", QLabel(f"{gpu_data['memory_total']} МБ"))
+                rows.append(("Объем памяти:", f"{gpu_data['memory_total']} МБ", None))
             if 'memory_used' in gpu_data:
-                gpu_layout.addRow("Использовано памяти:", QLabel(f"{gpu_data['memory_used']} МБ"))
+                rows.append(("Использовано памяти:", f"{gpu_data['memory_used']} МБ", None))
             if 'memory_free' in gpu_data:
-                gpu_layout.addRow("Свободно памяти:", QLabel(f"{gpu_data['memory_free']} МБ"))
-            
-            gpu_group.setLayout(gpu_layout)
-            self.gpu_info_layout.addWidget(gpu_group)
+                rows.append(("Свободно памяти:", f"{gpu_data['memory_free']} МБ", None))
+
+            # Группа для каждой видеокарты
+            groups.append((f"Видеокарта {i}: {gpu_data.get('gpu', 'Неизвестно')}", rows))
 
-        # Добавляем растяжку в конце
-        self.gpu_info_layout.addStretch()
+        self._render_form('gpu', self.gpu_info_layout, groups)
     
     def MB_info_screen(self, title, description, image_path=None):
         screen = QWidget()
@@ -734,90 +941,67 @@ class MainWindow(QMainWindow):
         scroll.setWidget(content)
         main_layout.addWidget(scroll)
 
-        # Таймер обновления
-        self.mb_timer = QTimer()
-        self.mb_timer.timeout.connect(self.update_mb_info)
-        self.mb_timer.start(5000)  # обновление каждые 5 секунд (данные обычно статичны)
+        # Повторный сбор статических данных только по запросу пользователя
+        refresh_btn = QPushButton("Обновить сведения об оборудовании")
+        refresh_btn.clicked.connect(lambda: self.inventory.load_async(refresh=True))
+        main_layout.addWidget(refresh_btn)
+
+        # Таймер обновления (данные берутся из кэша оборудования)
+        self.mb_timer = self._screen_timer(screen, self.update_mb_info, 1000)
 
         return screen
 
     def update_mb_info(self):
         """Обновление информации о материнской плате с улучшенным дизайном"""
-        mb_data = get_motherboard_info()
-
-        # Очищаем контейнер перед обновлением
-        while self.mb_info_layout.count():
-            item = self.mb_info_layout.takeAt(0)
-            widget = item.widget()
-            if widget:
-                widget.deleteLater()
+        facts = self.inventory.facts(wait=False)
+        if facts is None:
+            self._render_form('mb', self.mb_info_layout, [("Параметры платы", [("Статус:", "Сбор данных...", None)])])
+            return
+        mb_data = facts['motherboard']
 
         if "error" in mb_data:
-            error_label = QLabel(f"Ошибка: {mb_data['error']}")
-            error_label.setStyleSheet("color: red; font-weight: bold;")
-            self.mb_info_layout.addWidget(error_label, alignment=Qt.AlignmentFlag.AlignCenter)
+            self._render_form('mb', self.mb_info_layout, error=mb_data['error'])
             return
 
         # Основные параметры платы
-        board_group = QGroupBox("Параметры платы")
-        board_layout = QFormLayout()
-        board_layout.addRow("Производитель:", QLabel(mb_data.get('manufacturer', 'Неизвестно')))
-        board_layout.addRow("Модель:", QLabel(mb_data.get('product', 'Неизвестно')))
-        board_layout.addRow("Версия:", QLabel(mb_data.get('version', 'Неизвестно')))
-        board_layout.addRow("Серийный номер:", QLabel(mb_data.get('serial', 'Неизвестно')))
-        board_layout.addRow("Чипсет:", QLabel(mb_data.get('chipset', 'Неизвестно')))
-        board_group.setLayout(board_layout)
-        self.mb_info_layout.addWidget(board_group)
+        groups = [("Параметры платы", [
+            ("Производитель:", mb_data.get('manufacturer', 'Неизвестно'), None),
+            ("Модель:", mb_data.get('product', 'Неизвестно'), None),
+            ("Версия:", mb_data.get('version', 'Неизвестно'), None),
+            ("Серийный номер:", mb_data.get('serial', 'Неизвестно'), None),
+            ("Чипсет:", mb_data.get('chipset', 'Неизвестно'), None),
+        ])]
 
         # Информация о BIOS
-        bios_group = QGroupBox("BIOS")
-        bios_layout = QFormLayout()
-        bios_layout.addRow("Производитель:", QLabel(mb_data.get('bios_vendor', 'Неизвестно')))
-        bios_layout.addRow("Версия:", QLabel(mb_data.get('bios_version', 'Неизвестно')))
-        bios_layout.addRow("Дата:", QLabel(mb_data.get('bios_date', 'Неизвестно')))
-        bios_layout.addRow("Размер:", QLabel(mb_data.get('bios_size', 'Неизвестно')))
-        bios_group.setLayout(bios_layout)
-        self.mb_info_layout.addWidget(bios_group)
+        groups.append(("BIOS", [
+            ("Производитель:", mb_data.get('bios_vendor', 'Неизвестно'), None),
+            ("Версия:", mb_data.get('bios_version', 'Неизвестно'), None),
+            ("Дата:", mb_data.get('bios_date', 'Неизвестно'), None),
+            ("Размер:", mb_data.get('bios_size', 'Неизвестно'), None),
+        ]))
 
         # Слоты расширения
         if 'slots' in mb_data and mb_data['slots']:
-            slots_group = QGroupBox("Слоты расширения")
-            slots_layout = QFormLayout()
-            
+            slot_rows = []
             for i, slot in enumerate(mb_data['slots']):
-                slot_layout = QFormLayout()
-                slot_layout.addRow("Тип:", QLabel(slot.get('type', 'N/A')))
-                slot_layout.addRow("Статус:", QLabel("Занят" if slot.get('occupied') else "Свободен"))
-                slot_layout.addRow("Описание:", QLabel(slot.get('description', 'N/A')))
-                
                 # Добавляем разделитель между слотами
                 if i > 0:
-                    separator = QFrame()
-                    separator.setFrameShape(QFrame.Shape.HLine)
-                    separator.setFrameShadow(QFrame.Shadow.Sunken)
-                    slots_layout.addRow(separator)
-                
-                slots_layout.addRow(f"Слот {i+1}:", slot_layout)
-            
-            slots_group.setLayout(slots_layout)
-            self.mb_info_layout.addWidget(slots_group)
+                    slot_rows.append(None)
+                slot_rows += [
+                    (f"Слот {i+1}, тип:", slot.get('type', 'N/A'), None),
+                    ("Статус:", "Занят" if slot.get('occupied') else "Свободен", None),
+                    ("Описание:", slot.get('description', 'N/A'), None),
+                ]
+            groups.append(("Слоты расширения", slot_rows))
 
         # Датчики температуры (если доступны)
         if 'temperatures' in mb_data and mb_data['temperatures']:
-            temp_group = QGroupBox("Температуры")
-            temp_layout = QFormLayout()
-            
-            for sensor, temp in mb_data['temperatures'].items():
-                temp_layout.addRow(
-                    f"{sensor}:", 
-                    self._create_colored_label(f"{temp}°C", 'temp')
-                )
-            
-            temp_group.setLayout(temp_layout)
-            self.mb_info_layout.addWidget(temp_group)
+            groups.append(("Температуры", [
+                (f"{sensor}:", f"{temp}°C", 'temp')
+                for sensor, temp in mb_data['temperatures'].items()
+            ]))
 
-        # Добавляем растяжку в конце
-        self.mb_info_layout.addStretch()
+        self._render_form('mb', self.mb_info_layout, groups)
         
     def Voltage_info_screen(self, title, description, image_path=None):
         screen = QWidget()
@@ -842,77 +1026,60 @@ class MainWindow(QMainWindow):
         main_layout.addWidget(scroll)
 
         # Таймер для обновления данных
-        self.voltage_timer = QTimer()
-        self.voltage_timer.timeout.connect(self.update_voltage_info)
-        self.voltage_timer.start(2000)  # Обновление каждые 2 секунды
+        self.voltage_timer = self._screen_timer(screen, self.update_voltage_info, 2000, {'voltage'})  # Обновление каждые 2 секунды
 
         return screen
 
     def update_voltage_info(self):
         """Обновление информации о напряжении с улучшенным дизайном"""
-        voltage_info = get_voltage_info()
-
-        # Очищаем контейнер перед обновлением
-        while self.voltage_info_layout.count():
-            item = self.voltage_info_layout.takeAt(0)
-            widget = item.widget()
-            if widget:
-                widget.deleteLater()
+        snapshot = self._fresh_snapshot('voltage')
+        if snapshot is None:
+            return
+        voltage_info = snapshot.voltage
 
         if not voltage_info:
-            error_label = QLabel("Ошибка: Не удалось получить данные о напряжении")
-            error_label.setStyleSheet("color: red; font-weight: bold;")
-            self.voltage_info_layout.addWidget(error_label, alignment=Qt.AlignmentFlag.AlignCenter)
+            self._render_form('voltage', self.voltage_info_layout, error="Не удалось получить данные о напряжении")
             return
             
         if "error" in voltage_info:
-            error_label = QLabel(f"Ошибка: {voltage_info['error']}")
-            error_label.setStyleSheet("color: red; font-weight: bold;")
-            self.voltage_info_layout.addWidget(error_label, alignment=Qt.AlignmentFlag.AlignCenter)
+            self._render_form('voltage', self.voltage_info_layout, error=voltage_info['error'])
             return
 
         # Группа для батареи
-        battery_group = QGroupBox("Состояние батареи")
-        battery_layout = QFormLayout()
-        
+        battery_rows = []
         battery = voltage_info.get('battery', {})
         if battery:
-            battery_layout.addRow("Питание от сети:", QLabel("Да" if battery.get('power_plugged') else "Нет"))
-            battery_layout.addRow("Заряд:", self._create_colored_label(f"{battery.get('percent', 'Нет данных')}%", 'percent'))
+            battery_rows.append(("Питание от сети:", "Да" if battery.get('power_plugged') else "Нет", None))
+            battery_rows.append(("Заряд:", f"{battery.get('percent', 'Нет данных')}%", 'percent'))
             
             secsleft = battery.get('secsleft')
             if secsleft is not None:
                 if secsleft == -1:
-                    battery_layout.addRow("Оставшееся время:", QLabel("Расчитывается..."))
+                    battery_rows.append(("Оставшееся время:", "Расчитывается...", None))
                 elif secsleft == -2:
-                    battery_layout.addRow("Оставшееся время:", QLabel("Неограничено"))
+                    battery_rows.append(("Оставшееся время:", "Неограничено", None))
                 else:
                     mins, secs = divmod(secsleft, 60)
                     hours, mins = divmod(mins, 60)
-                    battery_layout.addRow("Оставшееся время:", QLabel(f"{hours:02d}:{mins:02d}:{secs:02d}"))
+                    battery_rows.append(("Оставшееся время:", f"{hours:02d}:{mins:02d}:{secs:02d}", None))
         else:
-            battery_layout.addRow("Статус:", QLabel("Батарея не обнаружена"))
-            
-        battery_group.setLayout(battery_layout)
-        self.voltage_info_layout.addWidget(battery_group)
+            battery_rows.append(("Статус:", "Батарея не обнаружена", None))
 
         # Группа для напряжений
-        voltages_group = QGroupBox("Напряжения компонентов")
-        voltages_layout = QFormLayout()
-        
         voltages = voltage_info.get('voltages', {})
-        voltages_layout.addRow("CPU:", QLabel(voltages.get('cpu_voltage', 'Нет данных')))
-        voltages_layout.addRow("GPU:", QLabel(voltages.get('gpu_voltage', 'Нет данных')))
-        voltages_layout.addRow("RAM:", QLabel(voltages.get('ram_voltage', 'Нет данных')))
-        voltages_layout.addRow("3.3V:", QLabel(voltages.get('3v3_voltage', 'Нет данных')))
-        voltages_layout.addRow("5V:", QLabel(voltages.get('5v_voltage', 'Нет данных')))
-        voltages_layout.addRow("12V:", QLabel(voltages.get('12v_voltage', 'Нет данных')))
-        
-        voltages_group.setLayout(voltages_layout)
-        self.voltage_info_layout.addWidget(voltages_group)
+        groups = [
+            ("Состояние батареи", battery_rows),
+            ("Напряжения компонентов", [
+                ("CPU:", voltages.get('cpu_voltage', 'Нет данных'), None),
+                ("GPU:", voltages.get('gpu_voltage', 'Нет данных'), None),
+                ("RAM:", voltages.get('ram_voltage', 'Нет данных'), None),
+                ("3.3V:", voltages.get('3v3_voltage', 'Нет данных'), None),
+                ("5V:", voltages.get('5v_voltage', 'Нет данных'), None),
+                ("12V:", voltages.get('12v_voltage', 'Нет данных'), None),
+            ]),
+        ]
 
-        # Добавляем растяжку в конце
-        self.voltage_info_layout.addStretch()
+        self._render_form('voltage', self.voltage_info_layout, groups)
         
     def RAM_info_screen(self, title, description, image_path=None):
         screen = QWidget()
@@ -937,66 +1104,46 @@ class MainWindow(QMainWindow):
         main_layout.addWidget(scroll)
 
         # Таймер для обновления данных
-        self.ram_timer = QTimer()
-        self.ram_timer.timeout.connect(self.update_ram_info)
-        self.ram_timer.start(500)
+        self.ram_timer = self._screen_timer(screen, self.update_ram_info, 500, {'ram'})
 
         return screen
 
     def update_ram_info(self):
         """Обновление информации об оперативной памяти с улучшенным дизайном"""
-        ram_info = monitor_ram()
-
-        # Очищаем контейнер перед обновлением
-        while self.ram_info_layout.count():
-            item = self.ram_info_layout.takeAt(0)
-            widget = item.widget()
-            if widget:
-                widget.deleteLater()
+        snapshot = self._fresh_snapshot('ram')
+        if snapshot is None:
+            return
+        ram_info = snapshot.ram
 
         if not ram_info:
-            error_label = QLabel("Ошибка: Не удалось получить данные о RAM")
-            error_label.setStyleSheet("color: red; font-weight: bold;")
-            self.ram_info_layout.addWidget(error_label, alignment=Qt.AlignmentFlag.AlignCenter)
+            self._render_form('ram', self.ram_info_layout, error="Не удалось получить данные о RAM")
             return
 
         # Основные параметры
-        main_group = QGroupBox("Основные параметры")
-        main_layout = QFormLayout()
-        main_layout.addRow("Общий объем:", QLabel(f"{ram_info['ram']} ГБ"))
-        main_layout.addRow("Свободно:", QLabel(f"{ram_info['free']} ГБ"))
-        main_layout.addRow("Используется:", QLabel(f"{ram_info['usage']} ГБ"))
-        main_layout.addRow("Занято:", self._create_colored_label(f"{ram_info['percent']}%", 'percent'))
-        main_group.setLayout(main_layout)
-        self.ram_info_layout.addWidget(main_group)
+        groups = [("Основные параметры", [
+            ("Общий объем:", f"{ram_info['ram']} ГБ", None),
+            ("Свободно:", f"{ram_info['free']} ГБ", None),
+            ("Используется:", f"{ram_info['usage']} ГБ", None),
+            ("Занято:", f"{ram_info['percent']}%", 'percent'),
+        ])]
 
         # Детализация по слотам, если есть
         if 'slots' in ram_info and ram_info['slots']:
-            slots_group = QGroupBox("Слоты памяти")
-            slots_layout = QFormLayout()
-            
+            slot_rows = []
             for i, slot in enumerate(ram_info['slots']):
-                slot_layout = QFormLayout()
-                slot_layout.addRow("Размер:", QLabel(f"{slot.get('size', 'N/A')} ГБ"))
-                slot_layout.addRow("Тип:", QLabel(slot.get('type', 'N/A')))
-                slot_layout.addRow("Скорость:", QLabel(f"{slot.get('speed', 'N/A')} МГц"))
-                slot_layout.addRow("Производитель:", QLabel(slot.get('manufacturer', 'N/A')))
-                slot_layout.addRow("Серийный номер:", QLabel(slot.get('serial', 'N/A')))
-                
                 # Добавляем разделитель между слотами
                 if i > 0:
-                    separator = QFrame()
-                    separator.setFrameShape(QFrame.Shape.HLine)
-                    separator.setFrameShadow(QFrame.Shadow.Sunken)
-                    slots_layout.addRow(separator)
-                
-                slots_layout.addRow(f"Слот {i+1}:", slot_layout)
-            
-            slots_group.setLayout(slots_layout)
-            self.ram_info_layout.addWidget(slots_group)
-
-        # Добавляем растяжку в конце
-        self.ram_info_layout.addStretch()
+                    slot_rows.append(None)
+                slot_rows += [
+                    (f"Слот {i+1}, размер:", f"{slot.get('size', 'N/A')} ГБ", None),
+                    ("Тип:", slot.get('type', 'N/A'), None),
+                    ("Скорость:", f"{slot.get('speed', 'N/A')} МГц", None),
+                    ("Производитель:", slot.get('manufacturer', 'N/A'), None),
+                    ("Серийный номер:", slot.get('serial', 'N/A'), None),
+                ]
+            groups.append(("Слоты памяти", slot_rows))
+
+        self._render_form('ram', self.ram_info_layout, groups)
         
     def HDD_info_screen(self, title, description, image_path=None):
         screen = QWidget()
@@ -1021,83 +1168,49 @@ class MainWindow(QMainWindow):
         main_layout.addWidget(scroll)
 
         # Таймер для обновления данных
-        self.hdd_timer = QTimer()
-        self.hdd_timer.timeout.connect(self.update_hdd_info)
-        self.hdd_timer.start(500)
+        self.hdd_timer = self._screen_timer(screen, self.update_hdd_info, 500, {'hdd'})
 
         return screen
 
     def update_hdd_info(self):
         """Обновление информации о дисках с улучшенным дизайном"""
-        hdd_info = monitor_hdd()  # Изменено название переменной (не список)
-
-        # Очищаем контейнер перед обновлением
-        while self.hdd_info_layout.count():
-            item = self.hdd_info_layout.takeAt(0)
-            widget = item.widget()
-            if widget:
-                widget.deleteLater()
+        snapshot = self._fresh_snapshot('hdd')
+        if snapshot is None:
+            return
+        hdd_info = snapshot.hdd  # Изменено название переменной (не список)
 
         # Обрабатываем случай с ошибкой получения данных
         if not hdd_info:
-            error_label = QLabel("Ошибка: Не удалось получить данные о дисках")
-            error_label.setStyleSheet("color: red; font-weight: bold;")
-            self.hdd_info_layout.addWidget(error_label, alignment=Qt.AlignmentFlag.AlignCenter)
+            self._render_form('hdd', self.hdd_info_layout, error="Не удалось получить данные о дисках")
             return
 
         # Основная группа для диска
-        disk_group = QGroupBox(f"Диск: {hdd_info.get('device', 'Неизвестно')}")
-        disk_layout = QFormLayout()
-        
-        # Основные параметры
-        disk_layout.addRow("Точка подключения:", QLabel(hdd_info['mountpoint']))
-        disk_layout.addRow("Тип файловой системы:", QLabel(hdd_info['file_sys']))
-        disk_layout.addRow("Общий объем:", QLabel(f"{hdd_info['size']} ГБ"))
-        disk_layout.addRow("Использовано:", QLabel(f"{hdd_info['used']} ГБ"))
-        disk_layout.addRow("Свободно:", QLabel(f"{hdd_info['free']} ГБ"))
-        disk_layout.addRow("Процент использования:", self._create_colored_label(f"{hdd_info['percent']}%", 'percent'))
-        
+        groups = [(f"Диск: {hdd_info.get('device', 'Неизвестно')}", [
+            ("Точка подключения:", hdd_info['mountpoint'], None),
+            ("Тип файловой системы:", hdd_info['file_sys'], None),
+            ("Общий объем:", f"{hdd_info['size']} ГБ", None),
+            ("Использовано:", f"{hdd_info['used']} ГБ", None),
+            ("Свободно:", f"{hdd_info['free']} ГБ", None),
+            ("Процент использования:", f"{hdd_info['percent']}%", 'percent'),
+        ])]
+
         # SMART информация, если доступна
         if 'smart' in hdd_info and hdd_info['smart']:
-            smart_group = QGroupBox("SMART статус")
-            smart_layout = QFormLayout()
-            
-            smart_layout.addRow("Статус:", QLabel(hdd_info['smart']['status']))
-            smart_layout.addRow("Температура:", self._create_colored_label(
-                f"{hdd_info['smart'].get('temperature', 'N/A')}°C", 'temp'))
-            smart_layout.addRow("Время работы:", QLabel(f"{hdd_info['smart'].get('power_on_hours', 'N/A')} часов"))
-            smart_layout.addRow("Ошибки чтения:", QLabel(str(hdd_info['smart'].get('read_errors', 'N/A'))))
-            
-            smart_group.setLayout(smart_layout)
-            disk_layout.addRow(smart_group)
-        
-        disk_group.setLayout(disk_layout)
-        self.hdd_info_layout.addWidget(disk_group)
+            smart = hdd_info['smart']
+            groups.append(("SMART статус", [
+                ("Статус:", smart['status'], None),
+                ("Температура:", f"{smart.get('temperature', 'N/A')}°C", 'temp'),
+                ("Время работы:", f"{smart.get('power_on_hours', 'N/A')} часов", None),
+                ("Ошибки чтения:", smart.get('read_errors', 'N/A'), None),
+            ]))
 
-        # Добавляем растяжку в конце
-        self.hdd_info_layout.addStretch()
+        self._render_form('hdd', self.hdd_info_layout, groups)
         
     def create_diagnostic_screen(self, title, description, image_path=None):
         """Создаем экран диагностики с улучшенным дизайном"""
         screen = QWidget()
         main_layout = QVBoxLayout(screen)
         
-        # Стилизация
-        self.setStyleSheet("""
-            QGroupBox {
-                font-size: 14px;
-                border: 1px solid #ddd;
-                border-radius: 5px;
-                margin-top: 10px;
-                padding-top: 15px;
-            }
-            QGroupBox::title {
-                subcontrol-origin: margin;
-                left: 10px;
-                padding: 0 3px;
-            }
-        """)
-        
         # Кнопка запуска
         self.diagnose_btn = QPushButton("Запустить диагностику")
         self.diagnose_btn.setStyleSheet("""
@@ -1115,6 +1228,8 @@ class MainWindow(QMainWindow):
         """)
         self.diagnose_btn.setFixedHeight(50)
         self.diagnose_btn.clicked.connect(self.start_diagnosis)
+        # Кнопка станет доступна, когда модель загрузится в фоне
+        self.diagnose_btn.setEnabled(self.diagnostic_model is not None)
         
         # Прогресс-бар
         self.progress_bar = QProgressBar()
@@ -1154,8 +1269,6 @@ class MainWindow(QMainWindow):
         main_layout.addWidget(self.progress_bar)
         main_layout.addWidget(scroll)
         
-        self.diagnostic_model = DiagnosticModel()
-        
         return screen
 
     def start_diagnosis(self):
@@ -1173,15 +1286,11 @@ class MainWindow(QMainWindow):
             label.setAlignment(Qt.AlignmentFlag.AlignCenter)
             group.layout().addWidget(label)
         
-        self.diagnostic_thread = DiagnosticThread(self.diagnostic_model)
+        self.diagnostic_thread = DiagnosticThread(self.diagnostic_model, self.sampler, self.features)
         self.diagnostic_thread.update_signal.connect(
             lambda v, m: self.update_progress(v, m))
         self.diagnostic_thread.finished_signal.connect(self.show_results)
         self.diagnostic_thread.start()
-        
-        self.status_timer = QTimer()
-        self.status_timer.timeout.connect(self.update_system_status)
-        self.status_timer.start(1000)
 
     def show_results(self, data, verdict):
         """Показывает результаты в новом формате"""
@@ -1211,7 +1320,7 @@ class MainWindow(QMainWindow):
             return
         
         # Процессор
-        cpu = data['CPU']
+        cpu = data['CPU'] or {}
         cpu_widget = QWidget()
         cpu_layout = QFormLayout(cpu_widget)
         cpu_layout.addRow("Загрузка:", QLabel(f"{cpu.get('usage', 'N/A')}%"))
@@ -1225,7 +1334,7 @@ class MainWindow(QMainWindow):
         self.cpu_group.layout().addWidget(cpu_widget)
         
         # Видеокарта
-        gpu = data['GPU'][0] if data['GPU'] else {}
+        gpu = (data['GPU'] or [{}])[0]
         gpu_widget = QWidget()
         gpu_layout = QFormLayout(gpu_widget)
         gpu_layout.addRow("Загрузка:", QLabel(f"{gpu.get('load', 'N/A')}%"))
@@ -1233,7 +1342,7 @@ class MainWindow(QMainWindow):
         self.gpu_group.layout().addWidget(gpu_widget)
         
         # Память
-        ram = data['RAM']
+        ram = data['RAM'] or {}
         ram_widget = QWidget()
         ram_layout = QFormLayout(ram_widget)
         ram_layout.addRow("Использовано:", QLabel(f"{ram.get('percent', 'N/A')}%"))
@@ -1241,7 +1350,7 @@ class MainWindow(QMainWindow):
         self.ram_group.layout().addWidget(ram_widget)
         
         # Диск
-        hdd = data['HDD']
+        hdd = data['HDD'] or {}
         disk_widget = QWidget()
         disk_layout = QFormLayout(disk_widget)
         disk_layout.addRow("Использовано:", QLabel(f"{hdd.get('percent', 'N/A')}%"))
@@ -1268,7 +1377,29 @@ class MainWindow(QMainWindow):
         details_btn.clicked.connect(lambda: self.show_diagnosis_details(verdict))
         
         self.verdict_group.layout().addWidget(verdict_label)
+        trend = self._trend_text(data.get('WINDOW'), data.get('CURRENT', {}))
+        if trend:
+            trend_label = QLabel(trend)
+            trend_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+            self.verdict_group.layout().addWidget(trend_label)
         self.verdict_group.layout().addWidget(details_btn)
+
+    def _trend_text(self, window, current):
+        """Текущее значение, максимум и тренд температур за окно диагностики"""
+        if window is None:
+            return ""
+        lines = []
+        for title, name in (("CPU", 'cpu_temp'), ("GPU", 'gpu_temp')):
+            i = self.features.metrics.index(name)
+            if window.count[i] >= DiagnosticThread.MIN_WINDOW_SAMPLES:
+                slope = window.slope[i] * 60  # °C в минуту
+                now = current.get(name)
+                now = "нет данных" if now is None else f"{now:.0f}°C"
+                lines.append(f"{title}: сейчас {now}, макс. {window.max[i]:.0f}°C "
+                             f"({window.count[i]} замеров), тренд {slope:+.1f}°C/мин")
+        if not lines:
+            return ""
+        return f"За {DiagnosticThread.FEATURE_WINDOW:.0f} с: " + "; ".join(lines)
             
     def show_diagnosis_details(self, verdict):
         """Подробная информация о диагностике"""
@@ -1297,8 +1428,10 @@ class MainWindow(QMainWindow):
         self.test_ram_btn = QPushButton("Тест RAM")
         self.test_gpu_btn = QPushButton("Тест GPU")
         self.test_all_btn = QPushButton("Тест всего")
+        self.test_stability_btn = QPushButton("Стабильность CPU")
+        self.test_disk_btn = QPushButton("Тест диска")
         
-        for btn in [self.test_cpu_btn, self.test_ram_btn, self.test_gpu_btn, self.test_all_btn]:
+        for btn in [self.test_cpu_btn, self.test_ram_btn, self.test_gpu_btn, self.test_all_btn, self.test_stability_btn, self.test_disk_btn]:
             btn.setFixedHeight(40)
             btn.setStyleSheet("font-size: 14px;")
             btn_layout.addWidget(btn)
@@ -1315,9 +1448,17 @@ class MainWindow(QMainWindow):
         self.results_layout = QVBoxLayout(content)
         
         # Группы результатов
+        self.stability_group = QGroupBox("Стабильность ядер")
+        self.stability_group.setLayout(QFormLayout())
+        self.stability_group.setVisible(False)
+        self.benchmark_group = QGroupBox("Результаты теста")
+        self.benchmark_group.setLayout(QFormLayout())
+        self.benchmark_group.setVisible(False)
         self.before_group = QGroupBox("Состояние до теста")
         self.after_group = QGroupBox("Состояние после теста")
         
+        self.results_layout.addWidget(self.stability_group)
+        self.results_layout.addWidget(self.benchmark_group)
         self.results_layout.addWidget(self.before_group)
         self.results_layout.addWidget(self.after_group)
         self.results_layout.addStretch()
@@ -1334,11 +1475,11 @@ class MainWindow(QMainWindow):
         self.test_ram_btn.clicked.connect(lambda: self.start_test('ram'))
         self.test_gpu_btn.clicked.connect(lambda: self.start_test('gpu'))
         self.test_all_btn.clicked.connect(lambda: self.start_test('all'))
+        self.test_stability_btn.clicked.connect(lambda: self.start_test('stability'))
+        self.test_disk_btn.clicked.connect(lambda: self.start_test('disk'))
         
         # Таймер обновления
-        self.status_timer = QTimer()
-        self.status_timer.timeout.connect(self.update_system_status)
-        self.status_timer.start(1000)
+        self.status_timer = self._screen_timer(screen, self.update_system_status, 1000, STATE_COLLECTORS)
         
         return screen
 
@@ -1352,24 +1493,32 @@ class MainWindow(QMainWindow):
         self.update_test_results(self.before_state, self.before_group)
         
         # Блокируем кнопки
-        for btn in [self.test_cpu_btn, self.test_ram_btn, self.test_gpu_btn, self.test_all_btn]:
+        for btn in [self.test_cpu_btn, self.test_ram_btn, self.test_gpu_btn, self.test_all_btn, self.test_stability_btn, self.test_disk_btn]:
             btn.setEnabled(False)
         
         self.test_progress.setVisible(True)
         self.test_progress.setValue(0)
+        self._reset_test_output(test_type)
         
         # Запускаем процесс
-        self.test_process = QProcess()
+        process = QProcess()
+        self.test_process = process
         self.test_process.finished.connect(lambda: self.on_test_finished(test_type))
-        
-        script = {
-            'cpu': 'testing_CPU.py',
-            'ram': 'testing_RAM.py',
-            'gpu': 'testing_GPU.py',
-            'all': 'testing_ALL.py'
+        self.test_process.readyReadStandardOutput.connect(lambda: self._read_test_output(process))
+        
+        # Тест диска - на разделе, который показывает мониторинг, в обход кэша
+        # страниц; тесты с длительностью - с запасом до принудительной остановки через 60 с
+        disk = (self.before_state.get('HDD') or {}).get('mountpoint') or '/'
+        script, args = {
+            'cpu': ('testing_CPU.py', []),
+            'ram': ('testing_RAM.py', [str(self.TEST_SECONDS)]),
+            'gpu': ('testing_GPU.py', []),
+            'all': ('testing_ALL.py', []),
+            'stability': ('testing_CPU.py', ['--stability', str(self.TEST_SECONDS)]),
+            'disk': ('testing_HDD.py', [str(self.TEST_SECONDS), '--direct', '--dir', disk])
         }[test_type]
         
-        self.test_process.start('python', [f'test/{script}'])
+        self.test_process.start('python', [f'test/{script}', *args])
         
         # Таймер прогресса
         self.test_time = 0
@@ -1402,6 +1551,64 @@ class MainWindow(QMainWindow):
                 if hasattr(self, 'test_process') and self.test_process.state() == QProcess.ProcessState.Running:
                     self.test_process.terminate()
 
+    def _reset_test_output(self, test_type):
+        """Очистка результатов из вывода предыдущего теста"""
+        for group in (self.stability_group, self.benchmark_group):
+            layout = group.layout()
+            while layout.count():
+                item = layout.takeAt(0)
+                if item.widget():
+                    item.widget().deleteLater()
+        self._core_labels = {}
+        self._result_labels = {}
+        self._test_output = ""
+        self.stability_group.setVisible(test_type == 'stability')
+        self.benchmark_group.setVisible(test_type in ('disk', 'gpu', 'ram'))
+
+    def _read_test_output(self, process):
+        """Разбор вывода теста.
+
+        CORE:<ядро>:<проверок>:<ошибок>:<первая ошибка, с>[:FAILED:<причина>] - таблица ядер,
+        RESULT:<название>:<значение> - строка результатов замера; повторная
+        строка с тем же названием обновляет значение (промежуточные результаты).
+        """
+        self._test_output += bytes(process.readAllStandardOutput()).decode(errors='replace')
+        *lines, self._test_output = self._test_output.split('\n')
+        for line in lines:
+            if line.startswith('RESULT:'):
+                _, name, value = line.strip().split(':', 2)
+                label = self._result_labels.get(name)
+                if label is None:
+                    label = self._result_labels[name] = QLabel()
+                    label.setWordWrap(True)
+                    self.benchmark_group.layout().addRow(f"{name}:", label)
+                label.setText(value)
+                continue
+            if not line.startswith('CORE:'):
+                continue
+            try:
+                _, cpu, checks, errors, first_error, *failure = line.strip().split(':', 6)
+                failure = failure[1] if failure[:1] == ['FAILED'] and len(failure) > 1 else None
+                self._update_core_result(int(cpu), int(checks), int(errors), first_error, failure)
+            except ValueError:
+                continue
+
+    def _update_core_result(self, cpu, checks, errors, first_error, failure=None):
+        label = self._core_labels.get(cpu)
+        if label is None:
+            label = self._core_labels[cpu] = QLabel()
+            self.stability_group.layout().addRow(f"Ядро {cpu}:", label)
+        if failure:
+            # Процесс проверки упал или был убит - ядро не прошло тест
+            label.setText(f"СБОЙ: {failure}, проверок {checks}, ошибок {errors}")
+            label.setStyleSheet("color: #e74c3c; font-weight: bold;")
+        elif errors:
+            label.setText(f"проверок {checks}, ошибок {errors}, первая через {first_error} с")
+            label.setStyleSheet("color: #e74c3c; font-weight: bold;")
+        else:
+            label.setText(f"проверок {checks}, ошибок нет")
+            label.setStyleSheet("color: #2ecc71;")
+
     def on_test_finished(self, test_type):
         """Завершение теста"""
         if hasattr(self, 'test_process'):
@@ -1411,7 +1618,7 @@ class MainWindow(QMainWindow):
         self.update_test_results(self.after_state, self.after_group)
         
         # Разблокируем кнопки
-        for btn in [self.test_cpu_btn, self.test_ram_btn, self.test_gpu_btn, self.test_all_btn]:
+        for btn in [self.test_cpu_btn, self.test_ram_btn, self.test_gpu_btn, self.test_all_btn, self.test_stability_btn, self.test_disk_btn]:
             btn.setEnabled(True)
         
         self.test_progress.setVisible(False)
@@ -1544,7 +1751,13 @@ class MainWindow(QMainWindow):
     def _create_colored_label(self, value, value_type):
         """Создает QLabel с цветом в зависимости от значения"""
         label = QLabel(str(value))
-        
+        style = self._value_style(value, value_type)
+        if style:
+            label.setStyleSheet(style)
+        return label
+
+    def _value_style(self, value, value_type):
+        """Стиль метки в зависимости от значения ('' - без подсветки)"""
         if value_type == 'percent':
             try:
                 num = float(value) if isinstance(value, (int, float)) else float(value.replace('%', ''))
@@ -1552,11 +1765,11 @@ class MainWindow(QMainWindow):
                 num = 0
                 
             if num > 90:
-                label.setStyleSheet("color: red; font-weight: bold;")
+                return "color: red; font-weight: bold;"
             elif num > 70:
-                label.setStyleSheet("color: orange;")
+                return "color: orange;"
             else:
-                label.setStyleSheet("color: green;")
+                return "color: green;"
                 
         elif value_type == 'temp':
             try:
@@ -1565,52 +1778,110 @@ class MainWindow(QMainWindow):
                 num = 0
                 
             if num > 85:
-                label.setStyleSheet("color: red; font-weight: bold;")
+                return "color: red; font-weight: bold;"
             elif num > 75:
-                label.setStyleSheet("color: red;")
+                return "color: red;"
             elif num > 65:
-                label.setStyleSheet("color: orange;")
+                return "color: orange;"
             elif num > 50:
-                label.setStyleSheet("color: yellow;")
+                return "color: yellow;"
             else:
-                label.setStyleSheet("color: green;")
-        
-        return label
+                return "color: green;"
+        
+        return ""
+
+    def _set_label(self, label, value, value_type=None):
+        """Меняет текст и стиль метки, только если они изменились"""
+        text = str(value)
+        if label.text() != text:
+            label.setText(text)
+        style = self._value_style(text, value_type)
+        if label.styleSheet() != style:
+            label.setStyleSheet(style)
+
+    def _clear_layout(self, layout):
+        """Удаляет все виджеты из layout"""
+        while layout.count():
+            item = layout.takeAt(0)
+            widget = item.widget()
+            if widget:
+                widget.deleteLater()
+
+    def _render_form(self, screen, layout, groups=None, error=None):
+        """Отрисовка экрана из групп строк с обновлением на месте.
+
+        groups - список (заголовок, строки), строка - (подпись, значение, тип)
+        или None для разделителя. Виджеты создаются заново только при
+        изменении набора групп и строк, в остальных случаях у существующих
+        меток меняются лишь изменившиеся текст и стиль.
+        """
+        if error is not None:
+            structure = ('error', error)
+        else:
+            structure = tuple(
+                (title, tuple(row[0] if row else None for row in rows))
+                for title, rows in groups
+            )
+
+        state = self._screen_forms.get(screen)
+        if state is None or state[0] != structure:
+            self._clear_layout(layout)
+            labels = []
+
+            if error is not None:
+                error_label = QLabel(f"Ошибка: {error}")
+                error_label.setStyleSheet("color: red; font-weight: bold;")
+                layout.addWidget(error_label, alignment=Qt.AlignmentFlag.AlignCenter)
+            else:
+                for title, rows in groups:
+                    group = QGroupBox(title)
+                    form = QFormLayout()
+                    for row in rows:
+                        if row is None:
+                            separator = QFrame()
+                            separator.setFrameShape(QFrame.Shape.HLine)
+                            separator.setFrameShadow(QFrame.Shadow.Sunken)
+                            form.addRow(separator)
+                            continue
+                        value_label = QLabel()
+                        form.addRow(row[0], value_label)
+                        labels.append(value_label)
+                    group.setLayout(form)
+                    layout.addWidget(group)
+
+                # Добавляем растяжку в конце
+                layout.addStretch()
+
+            state = (structure, labels)
+            self._screen_forms[screen] = state
+
+        if error is None:
+            rows = (row for _, group_rows in groups for row in group_rows if row is not None)
+            for label, (_, value, value_type) in zip(state[1], rows):
+                self._set_label(label, value, value_type)
 
     def get_system_state(self):
         """Получение полного состояния системы с обработкой ошибок прав доступа"""
+        snapshot = self._state_snapshot()
         try:
-            cpu_info = get_cpu_info()
-            ram_info = monitor_ram()
-            gpu_info = monitor_gpu()
-            hdd_info = monitor_hdd()
+            cpu_info = snapshot.cpu
+            # Снимок неизменяем - дополняем его копии
+            ram_info = dict(snapshot.ram) if snapshot.ram else None
+            gpu_info = snapshot.gpu
+            hdd_info = snapshot.hdd
             
             # Дополняем данные RAM (если доступно)
             if ram_info and isinstance(ram_info, dict):
-                try:
-                    # Пытаемся получить информацию о памяти, но не требуем прав root
-                    output = subprocess.check_output(
-                        ['dmidecode', '--type', 'memory'], 
-                        stderr=subprocess.DEVNULL  # Подавляем ошибки
-                    ).decode('utf-8', errors='ignore')
-                    
-                    ram_info['type'] = next(
-                        (line.split(':')[1].strip() for line in output.split('\n') 
-                        if 'Type:' in line), 'Недоступно без прав root'
-                    )
-                    ram_info['speed'] = next(
-                        (line.split(':')[1].strip().split()[0] for line in output.split('\n') 
-                        if 'Speed:' in line), 'Недоступно без прав root'
-                    )
-                except Exception:
-                    # Если не получилось - используем значения по умолчанию
-                    ram_info['type'] = 'Недоступно'
-                    ram_info['speed'] = 'Недоступно'
+                # Вывод dmidecode берём из кэша оборудования, без запуска процесса
+                facts = self.inventory.facts(wait=False)
+                modules = facts['memory_modules'] if facts else {}
+                ram_info['type'] = modules.get('type', 'Недоступно')
+                ram_info['speed'] = modules.get('speed', 'Недоступно')
             
             # Обработка данных GPU
             gpu_data = {}
             if gpu_info and len(gpu_info) > 0:
-                gpu_data = gpu_info[0]
+                gpu_data = dict(gpu_info[0])
                 gpu_data['name'] = gpu_data.get('gpu', 'N/A')
             
             return {
@@ -1623,10 +1894,10 @@ class MainWindow(QMainWindow):
         except PermissionError:
             # Возвращаем данные, которые можно получить без прав root
             return {
-                'CPU': get_cpu_info(),
-                'RAM': monitor_ram(),
-                'GPU': monitor_gpu()[0] if monitor_gpu() else {},
-                'HDD': monitor_hdd()
+                'CPU': snapshot.cpu,
+                'RAM': snapshot.ram,
+                'GPU': snapshot.gpu[0] if snapshot.gpu else {},
+                'HDD': snapshot.hdd
             }
         except Exception as e:
             print(f"Ошибка получения данных системы: {str(e)}")
@@ -1639,6 +1910,9 @@ class MainWindow(QMainWindow):
 
     def update_system_status(self):
         """Обновление статуса системы"""
+        # Группы результатов появляются вместе с экраном тестирования (_get_screen)
+        if not hasattr(self, 'before_group'):
+            return
         if not hasattr(self, 'before_state'):
             self.before_state = self.get_system_state()
             self.update_test_results(self.before_state, self.before_group)
@@ -1680,35 +1954,11 @@ class MainWindow(QMainWindow):
 
     def switch_screen(self, item):
         """Переключение экранов по выбору в боковом меню."""
-        screens = {
-            "Общие сведения": self.general_info_screen,
-            "Процессор": self.processor_screen,
-            "Оперативная память": self.memory_screen,
-            "Дисковая подсистема": self.disk_screen,
-            "Видеокарта": self.gpu_screen,
-            "Материнская плата": self.motherboard_screen,
-            "Напряжение": self.voltage_screen,
-            "Диагностика": self.diagnostic_screen,
-            "Тестирование": self.testing_screen
-        }
-        selected_screen = screens.get(item.text())
-        if selected_screen:
-            self.stacked_widget.setCurrentWidget(selected_screen)
+        self.switch_screen_by_title(item.text())
 
     def switch_screen_by_title(self, title):
         """Переключение экранов по нажатию на карточку."""
-        screens = {
-            "Общие сведения": self.general_info_screen,
-            "Процессор": self.processor_screen,
-            "Оперативная память": self.memory_screen,
-            "Дисковая подсистема": self.disk_screen,
-            "Видеокарта": self.gpu_screen,
-            "Материнская плата": self.motherboard_screen,
-            "Напряжение": self.voltage_screen,
-            "Диагностика": self.diagnostic_screen,
-            "Тестирование": self.testing_screen
-        }
-        selected_screen = screens.get(title)
+        selected_screen = self._get_screen(title)
         if selected_screen:
             self.stacked_widget.setCurrentWidget(selected_screen)
 
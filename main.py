@@ -1,11 +1,50 @@
 import sys
+import time
+
+_START = time.perf_counter()
+
+from PyQt6.QtCore import QEvent, QObject, QTimer
 from PyQt6.QtGui import QAction
 from PyQt6.QtWidgets import QApplication
 from gui.main_window import MainWindow
 
+# Модули, которые не должны загружаться до первого кадра
+HEAVY_MODULES = ('pandas', 'sklearn', 'scipy', 'joblib', 'numpy', 'pynvml', 'psutil')
+
+
+class StartupBenchmark(QObject):
+    """Замер времени до первого кадра и до готовности к работе.
+
+    Запуск: python main.py --startup-benchmark
+    """
+
+    def __init__(self, app, window):
+        super().__init__()
+        self.first_paint = None
+        self.loaded_at_paint = []
+        app.installEventFilter(self)
+        window.warm_up_finished.connect(lambda: QTimer.singleShot(0, self.report))
+
+    def eventFilter(self, obj, event):
+        if self.first_paint is None and event.type() == QEvent.Type.Paint:
+            self.first_paint = time.perf_counter() - _START
+            self.loaded_at_paint = [m for m in HEAVY_MODULES if m in sys.modules]
+        return False
+
+    def report(self):
+        interactive = time.perf_counter() - _START
+        first_paint = f"{self.first_paint * 1000:.0f} мс" if self.first_paint is not None else "н/д"
+        print(f"Время до первого кадра: {first_paint}")
+        print(f"Время до готовности к работе: {interactive * 1000:.0f} мс")
+        print(f"Тяжёлые модули к первому кадру: {', '.join(self.loaded_at_paint) or 'нет'}")
+        QApplication.instance().quit()
+
+
 if __name__ == "__main__":
     app = QApplication(sys.argv)
 
     window = MainWindow()
+    if "--startup-benchmark" in sys.argv:
+        benchmark = StartupBenchmark(app, window)
     window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    sys.exit(app.exec())
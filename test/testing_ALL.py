@@ -1,18 +1,21 @@
 import multiprocessing
-import math
 import random
 import time
 import signal
 import sys
 from datetime import datetime
 
+from testing_CPU import KERNELS
+
 def load_cpu(stop_event, process_num):
     start_time = time.time()
     duration = 60  # Default
+    kernels = list(KERNELS.values())
+    step = 0
     while not stop_event.is_set():
-        math.sin(random.random())
-        math.cos(random.random())
-        math.sqrt(random.random())
+        # Фиксированные нагрузки из testing_CPU.py по очереди
+        kernels[step % len(kernels)]()
+        step += 1
         if time.time() - start_time > 1:
             progress = int((time.time() - start_time) / duration * 100)
             print(f"CPU_PROGRESS:{progress}%")
@@ -1,18 +1,372 @@
-import multiprocessing
+"""Нагрузочный тест и тест производительности процессора.
+
+Нагрузка (по умолчанию) - все ядра на заданное время:
+    python test/testing_CPU.py [секунды]
+Тест производительности: фиксированные нагрузки сначала в одном
+процессе, затем во всех ядрах одновременно; результат - операций в
+секунду на процесс и коэффициент масштабирования:
+    python test/testing_CPU.py --benchmark [--seconds 3] [--workers N] [--json результат.json]
+
+Тест стабильности (в духе Prime95): на каждом логическом процессоре
+закреплён свой процесс, который по кругу выполняет вычисления с заранее
+известным ответом и сверяет результат; ошибки и время до первой ошибки
+выводятся по каждому ядру строками CORE:
+    python test/testing_CPU.py --stability [секунды] [--cpus 0,1,2]
+
+Нагрузки детерминированы (одинаковые входные данные и объём работы на
+каждой машине), BLAS работает в один поток на процесс, поэтому
+результаты воспроизводимы и сравнимы между машинами. Контрольная сумма
+каждой нагрузки должна совпадать на всех машинах.
+"""
+import argparse
+import hashlib
+import json
 import math
-import random
-import time
+import multiprocessing
+import os
 import signal
 import sys
-from datetime import datetime
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Один поток BLAS/OpenMP на процесс. Задаётся до импорта NumPy: иначе
+# каждый из N процессов теста запускает свой пул из N потоков (N x N
+# потоков на N ядрах), и оценки на процесс искажаются. Процессы пула
+# наследуют и переменные окружения, и уже загруженную библиотеку.
+for _variable in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+    os.environ[_variable] = '1'
+
+import numpy as np
+
+# Размеры одной порции работы
+HASH_ITEMS = 200_000
+FLOAT_ITEMS = 200_000
+VECTOR_SIZE = 1_000_000
+MATRIX_SIZE = 256
+
+# Операций в одной порции: хешей, вычислений функций, FLOP
+OPS_PER_UNIT = {
+    'int_hash': HASH_ITEMS,
+    'float_math': FLOAT_ITEMS,
+    'numpy_vector': 3 * VECTOR_SIZE,
+    'numpy_matmul': 2 * MATRIX_SIZE ** 3,
+}
+
+# Операций в секунду на одном процессе эталонной машины: оценка 1000 = эталон
+REFERENCE = {
+    'int_hash': 6.0e6,
+    'float_math': 5.5e6,
+    'numpy_vector': 8.0e8,
+    'numpy_matmul': 4.0e10,
+}
+
+_arrays = {}
+
+# Флаг остановки теста стабильности по сигналу (handle_stop)
+_stop = False
+
+
+def _data(name):
+    """Входные массивы NumPy: создаются один раз на процесс из фиксированного seed."""
+    if name not in _arrays:
+        rng = np.random.default_rng(0)
+        if name == 'vector':
+            _arrays[name] = (rng.random(VECTOR_SIZE), rng.random(VECTOR_SIZE),
+                             rng.random(VECTOR_SIZE), np.empty(VECTOR_SIZE))
+        else:
+            _arrays[name] = (rng.random((MATRIX_SIZE, MATRIX_SIZE)), rng.random((MATRIX_SIZE, MATRIX_SIZE)))
+    return _arrays[name]
+
+
+def int_hash():
+    """FNV-1a по 64-битным словам: целочисленные умножения и XOR."""
+    h = 0xcbf29ce484222325
+    for i in range(HASH_ITEMS):
+        h = ((h ^ i) * 0x100000001b3) & 0xFFFFFFFFFFFFFFFF
+    return h
+
+
+def float_math():
+    """Тригонометрия и корни в скалярной арифметике double."""
+    total = 0.0
+    x = 0.5
+    for _ in range(FLOAT_ITEMS):
+        total += math.sin(x) * math.sqrt(x + 1.0)
+        x = x * 0.999 + 0.01
+    return total
+
+
+def numpy_vector():
+    """sqrt(a * b + c) на векторе: 3 FLOP на элемент, упирается в память."""
+    a, b, c, out = _data('vector')
+    np.multiply(a, b, out=out)
+    out += c
+    np.sqrt(out, out=out)
+    return float(out.sum())
+
+
+def numpy_matmul():
+    """Произведение матриц через BLAS: 2n^3 FLOP."""
+    a, b = _data('matrix')
+    return float((a @ b).trace())
+
+
+KERNELS = {
+    'int_hash': int_hash,
+    'float_math': float_math,
+    'numpy_vector': numpy_vector,
+    'numpy_matmul': numpy_matmul,
+}
+
+
+def _init_worker():
+    # Тот же предел и для NumPy, импортированного раньше этого модуля (testing_ALL.py)
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(1)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _run_kernel(name, seconds, start_at):
+    """Порции нагрузки name в течение seconds, начиная с общего момента start_at."""
+    kernel = KERNELS[name]
+    kernel()  # Прогрев: выделение массивов и загрузка кода
+    time.sleep(max(0.0, start_at - time.monotonic()))
+
+    units = 0
+    started = time.monotonic()
+    while True:
+        checksum = kernel()
+        units += 1
+        elapsed = time.monotonic() - started
+        if elapsed >= seconds:
+            break
+    return units * OPS_PER_UNIT[name] / elapsed, checksum
+
+
+def _measure(pool, name, workers, seconds):
+    start_at = time.monotonic() + 0.5
+    futures = [pool.submit(_run_kernel, name, seconds, start_at) for _ in range(workers)]
+    return [f.result() for f in futures]
+
+
+def run_benchmark(seconds=3.0, workers=None, kernels=tuple(KERNELS)):
+    """Результаты по нагрузкам: ops/s в одном процессе, ops/s каждого из workers процессов, масштабирование."""
+    workers = workers or os.cpu_count()
+    report = {'workers': workers, 'kernels': {}}
+    steps = 2 * len(kernels)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        for i, name in enumerate(kernels):
+            [(single, checksum)] = _measure(pool, name, 1, seconds)
+            print(f"PROGRESS:{100 * (2 * i + 1) // steps}%", flush=True)
+            multi = [rate for rate, _ in _measure(pool, name, workers, seconds)]
+            print(f"PROGRESS:{100 * (2 * i + 2) // steps}%", flush=True)
+            report['kernels'][name] = {
+                'single': single,
+                'per_worker': multi,
+                'total': sum(multi),
+                'scaling': sum(multi) / single,
+                'efficiency': sum(multi) / single / workers,
+                'checksum': checksum if isinstance(checksum, int) else float(f"{checksum:.12g}"),
+            }
+
+    # Оценка - среднее геометрическое отношений к эталону
+    results = report['kernels']
+    for mode in ('single', 'total'):
+        ratios = [results[name][mode] / REFERENCE[name] for name in results]
+        report[f'score_{mode}'] = 1000 * math.exp(sum(map(math.log, ratios)) / len(ratios))
+    report['scaling'] = report['score_total'] / report['score_single']
+    return report
+
+
+def print_report(report):
+    print(f"Процессов: {report['workers']}")
+    header = f"{'Нагрузка':<14} {'1 процесс':>12} {'на процесс (мин-макс)':>27} {'всего':>12} {'масшт.':>7} {'эфф.':>6}"
+    print(header)
+    print('-' * len(header))
+    for name, r in report['kernels'].items():
+        print(f"{name:<14} {r['single']:>12.4g} {min(r['per_worker']):>13.4g}-{max(r['per_worker']):<13.4g}"
+              f"{r['total']:>12.4g} {r['scaling']:>6.2f}x {r['efficiency']:>5.0%}")
+    print(f"Оценка: 1 процесс {report['score_single']:.0f}, все процессы {report['score_total']:.0f}, "
+          f"масштабирование {report['scaling']:.2f}x")
+
+
+# Показатели простых чисел Мерсенна: тест Люка-Лемера для них даёт остаток 0
+MERSENNE_EXPONENTS = (3217, 4253, 4423)
+# SHA-256 цепочки из SHA_ROUNDS хешей по блоку SHA_BLOCK
+SHA_BLOCK = bytes(range(256)) * 4096
+SHA_ROUNDS = 16
+SHA_EXPECTED = '660a442f66f6514017b233ff59b36ec01e241efa43cda7a7f72a599a975048f8'
+# Целочисленные матрицы в float64: произведение точное и сверяется с расчётом в int64
+STABILITY_MATRIX = 384
+STABILITY_MATRIX_SUM = -94950
+MATMUL_REPEATS = 50
+
+
+def lucas_lehmer(p):
+    """Остаток теста Люка-Лемера для 2^p - 1: длинная целочисленная арифметика."""
+    s, m = 4, (1 << p) - 1
+    for _ in range(p - 2):
+        s = (s * s - 2) % m
+    return s
+
+
+def sha256_chain():
+    digest = hashlib.sha256(SHA_BLOCK).digest()
+    for _ in range(SHA_ROUNDS - 1):
+        digest = hashlib.sha256(digest + SHA_BLOCK).digest()
+    return digest.hex()
+
+
+def _stability_checks():
+    """Проверки с известным ответом: (название, функция -> True при верном результате)."""
+    rng = np.random.default_rng(2023)
+    a = rng.integers(-8, 9, (STABILITY_MATRIX, STABILITY_MATRIX))
+    b = rng.integers(-8, 9, (STABILITY_MATRIX, STABILITY_MATRIX))
+    expected = a @ b  # Целочисленное умножение без BLAS и FPU
+    if int(expected.sum()) != STABILITY_MATRIX_SUM:
+        raise RuntimeError("Неверный эталон умножения матриц")
+    a, b = a.astype(np.float64), b.astype(np.float64)
+
+    def matmul():
+        return all(np.array_equal(a @ b, expected) for _ in range(MATMUL_REPEATS))
+
+    checks = [(f'lucas_lehmer_{p}', lambda p=p: lucas_lehmer(p) == 0) for p in MERSENNE_EXPONENTS]
+    checks.append(('sha256', lambda: sha256_chain() == SHA_EXPECTED))
+    checks.append(('matmul', matmul))
+    return checks
+
+
+def _stability_worker(cpu, started, deadline, queue):
+    """Проверки на логическом процессоре cpu до deadline; состояние - в queue раз в секунду."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Обработчик SIGTERM родителя унаследован при fork: процесс должен завершаться по terminate()
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    os.sched_setaffinity(0, {cpu})
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(1)
+
+    checks = _stability_checks()
+    iterations = errors = 0
+    first_error = None
+    reported = time.monotonic()
+    while time.time() < deadline:
+        for name, check in checks:
+            try:
+                ok = check()
+            except Exception as e:  # Сбой вычислений - тоже ошибка ядра
+                ok, name = False, f"{name} ({e})"
+            iterations += 1
+            if not ok:
+                errors += 1
+                if first_error is None:
+                    first_error = time.time() - started
+                queue.put(('error', cpu, name, time.time() - started))
+            if time.monotonic() - reported >= 1.0:
+                reported = time.monotonic()
+                queue.put(('status', cpu, iterations, errors, first_error))
+            if time.time() >= deadline:
+                break
+    queue.put(('done', cpu, iterations, errors, first_error))
+
+
+def _print_core(cpu, iterations, errors, first_error, failure=None):
+    first = '-' if first_error is None else f"{first_error:.1f}"
+    line = f"CORE:{cpu}:{iterations}:{errors}:{first}"
+    if failure:
+        line += f":FAILED:{failure}"
+    print(line, flush=True)
+
+
+def _exit_reason(exitcode):
+    """Причина аварийного завершения процесса проверки по коду выхода."""
+    if exitcode < 0:
+        try:
+            return f"процесс завершён сигналом {signal.Signals(-exitcode).name}"
+        except ValueError:
+            return f"процесс завершён сигналом {-exitcode}"
+    return f"процесс завершился с кодом {exitcode}"
+
+
+def run_stability(duration=60, cpus=None):
+    """Тест стабильности на логических процессорах cpus (по умолчанию - на всех доступных).
+
+    Возвращает (status, failed): status - {cpu: (проверок, ошибок, время до
+    первой ошибки или None)}, failed - {cpu: причина} для ядер, процесс
+    которых упал, был убит (OOM, machine check) или не завершился вовремя.
+    По сигналу остановки (handle_stop) возвращает состояние на момент остановки.
+    """
+    cpus = sorted(cpus or os.sched_getaffinity(0))
+    started = time.time()
+    deadline = started + duration
+    queue = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=_stability_worker, args=(cpu, started, deadline, queue), daemon=True)
+                 for cpu in cpus]
+    for p in processes:
+        p.start()
+
+    status = {cpu: (0, 0, None) for cpu in cpus}
+    finished = set()
+    failed = {}
+    printed = time.monotonic()
+    # Ждём, пока каждый процесс не сообщит итог или не умрёт; запас после
+    # deadline - на последнюю проверку каждого процесса
+    while len(finished) + len(failed) < len(cpus) and not _stop:
+        try:
+            kind, cpu, *data = queue.get(timeout=0.5)
+        except Exception:
+            kind = None
+        if kind == 'error':
+            name, at = data
+            print(f"ERROR:ядро {cpu}: неверный результат {name} через {at:.1f} с", flush=True)
+            # Ошибка учитывается сразу: при остановке по сигналу 'status' с ней может не успеть прийти
+            checks, errors, first_error = status[cpu]
+            status[cpu] = (checks, errors + 1, at if first_error is None else first_error)
+        elif kind is not None:
+            # Счётчики процесса не меньше уже учтённых по сообщениям 'error'
+            status[cpu] = (data[0], max(data[1], status[cpu][1]), data[2] if data[2] is not None else status[cpu][2])
+            if kind == 'done':
+                finished.add(cpu)
+
+        for cpu, p in zip(cpus, processes):
+            if cpu in finished or cpu in failed or p.is_alive():
+                continue
+            # Итог 'done' отправляется до выхода; без него при пустой очереди процесс упал
+            if p.exitcode != 0:
+                failed[cpu] = _exit_reason(p.exitcode)
+            elif kind is None:
+                failed[cpu] = "процесс завершился без результата"
+            if cpu in failed:
+                print(f"ERROR:ядро {cpu}: {failed[cpu]}", flush=True)
+        if time.time() >= deadline + 60:
+            for cpu, p in zip(cpus, processes):
+                if cpu not in finished and cpu not in failed:
+                    failed[cpu] = "процесс проверки завис"
+                    print(f"ERROR:ядро {cpu}: {failed[cpu]}", flush=True)
+                    p.terminate()
+            break
+
+        if time.monotonic() - printed >= 1.0:
+            printed = time.monotonic()
+            for cpu, values in status.items():
+                _print_core(cpu, *values, failed.get(cpu))
+            print(f"PROGRESS:{min(99, int((time.time() - started) / duration * 100))}%", flush=True)
+
+    for p in processes:
+        if p.is_alive():
+            p.terminate()
+        p.join(1)
+    return status, failed
+
 
 def load_cpu(stop_event, process_num):
     start_time = time.time()
     duration = 60  # Default, will be overridden by stop_event
+    kernels = list(KERNELS.values())
+    step = 0
     while not stop_event.is_set():
-        math.sin(random.random())
-        math.cos(random.random())
-        math.sqrt(random.random())
+        # Те же фиксированные нагрузки, что и в тесте производительности, по очереди
+        kernels[step % len(kernels)]()
+        step += 1
         if time.time() - start_time > 1:  # Report progress every second
             progress = int((time.time() - start_time) / duration * 100)
             print(f"PROGRESS:{progress}%")
@@ -22,20 +376,63 @@ def handle_signal(signum, frame):
     print("PROGRESS:100%")
     sys.exit(0)
 
+
+def handle_stop(signum, frame):
+    # Тест стабильности: цикл ожидания завершается, итог по ядрам выводится как обычно
+    global _stop
+    _stop = True
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Тест процессора")
+    parser.add_argument('duration', nargs='?', type=int, default=60, help="длительность нагрузки, с")
+    parser.add_argument('--benchmark', action='store_true', help="тест производительности вместо нагрузки")
+    parser.add_argument('--seconds', type=float, default=3.0, help="время каждой нагрузки в тесте, с")
+    parser.add_argument('--workers', type=int, help="число процессов (по умолчанию - все ядра)")
+    parser.add_argument('--stability', action='store_true', help="тест стабильности с проверкой результатов")
+    parser.add_argument('--cpus', help="логические процессоры для теста стабильности, например 0,2,4")
+    parser.add_argument('--json', help="сохранить результат в JSON")
+    args = parser.parse_args()
+
+    if args.stability:
+        signal.signal(signal.SIGTERM, handle_stop)
+        signal.signal(signal.SIGINT, handle_stop)
+        cpus = [int(c) for c in args.cpus.split(',')] if args.cpus else None
+        status, failed = run_stability(args.duration, cpus)
+        for cpu, values in status.items():
+            _print_core(cpu, *values, failed.get(cpu))
+        errors = sum(values[1] for values in status.values())
+        print(f"Ядер: {len(status)}, проверок: {sum(v[0] for v in status.values())}, ошибок: {errors}, "
+              f"сбоев процессов: {len(failed)}")
+        if _stop:
+            print("Тест остановлен досрочно, результат - на момент остановки")
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump({cpu: dict(zip(('checks', 'errors', 'first_error'), v), failure=failed.get(cpu))
+                           for cpu, v in status.items()}, f, indent=2)
+        print("PROGRESS:100%")
+        sys.exit(1 if errors or failed else 0)
+
+    if args.benchmark:
+        report = run_benchmark(args.seconds, args.workers)
+        print_report(report)
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(report, f, indent=2)
+        sys.exit(0)
+
     signal.signal(signal.SIGTERM, handle_signal)
     signal.signal(signal.SIGINT, handle_signal)
-    
-    duration = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+
+    duration = args.duration
     stop_event = multiprocessing.Event()
     processes = []
-    
+
     for i in range(multiprocessing.cpu_count()):
         p = multiprocessing.Process(target=load_cpu, args=(stop_event, i))
         p.daemon = True
         p.start()
         processes.append(p)
-    
+
     try:
         time.sleep(duration)
     finally:
@@ -43,4 +440,4 @@ if __name__ == "__main__":
         for p in processes:
             p.terminate()
             p.join(1)
-        print("PROGRESS:100%")
\ No newline at end of file
+        print("PROGRESS:100%")
@@ -1,39 +1,179 @@
-import time
+"""Нагрузочный тест видеокарты (OpenCL) с замером GFLOPS и ГБ/с.
+
+    python test/testing_GPU.py [секунды] [--device 0:1] [--flops-per-byte 8] [--size-mb 64] [--json результат.json]
+
+Буферы создаются на устройстве один раз и остаются там: ядро по кругу
+читает один буфер и пишет другой (буферы меняются местами), данные
+между хостом и устройством передаются только в начале и при
+проверке результата в конце. Интенсивность вычислений задаётся числом
+FLOP на байт памяти: на каждый элемент (4 байта чтения и 4 записи)
+выполняется цикл FMA нужной длины. Подходит любое устройство OpenCL,
+в том числе процессор через PoCL.
+"""
+import argparse
+import json
 import signal
 import sys
+import time
+
+import numpy as np
+
+STARTED = time.monotonic()
+
+KERNEL = """
+__kernel void stress(__global const float *src, __global float *dst, const int iterations) {
+    int i = get_global_id(0);
+    float x = src[i];
+    float y = x * 0.5f + 0.25f;
+    // Две независимые цепочки FMA: 4 FLOP на итерацию
+    for (int k = 0; k < iterations; k++) {
+        x = fma(x, 0.9999f, 0.0001f);
+        y = fma(y, 0.9998f, 0.0002f);
+    }
+    dst[i] = x + y;
+}
+"""
+BYTES_PER_ELEMENT = 8  # float32: чтение и запись
+FLOPS_PER_ITERATION = 4
+BATCH_SECONDS = 0.5  # Длительность пачки запусков между замерами
+
+_stop = False
+
+
+def reference(values, iterations):
+    """То же вычисление на NumPy для проверки результата устройства."""
+    x = values.astype(np.float32)
+    y = x * np.float32(0.5) + np.float32(0.25)
+    for _ in range(iterations):
+        x = x * np.float32(0.9999) + np.float32(0.0001)
+        y = y * np.float32(0.9998) + np.float32(0.0002)
+    return x + y
+
+
+def select_device(cl, spec=None):
+    """Устройство OpenCL: 'платформа:устройство', часть названия или первая видеокарта (иначе любое)."""
+    platforms = cl.get_platforms()
+    devices = [device for platform in platforms for device in platform.get_devices()]
+    if not devices:
+        raise RuntimeError("устройства OpenCL не найдены")
+    if spec:
+        if ':' in spec and spec.replace(':', '').isdigit():
+            p, d = map(int, spec.split(':'))
+            return platforms[p].get_devices()[d]
+        for device in devices:
+            if spec.lower() in device.name.lower():
+                return device
+        raise RuntimeError(f"устройство {spec} не найдено")
+    gpus = [device for device in devices if device.type & cl.device_type.GPU]
+    return (gpus or devices)[0]
+
+
+def stress_gpu(duration=60, device=None, flops_per_byte=8.0, size_mb=64):
+    """Ядро на буферах устройства до конца duration (считая от запуска скрипта)."""
+    import pyopencl as cl
+
+    device = select_device(cl, device)
+    ctx = cl.Context([device])
+    queue = cl.CommandQueue(ctx)
+    program = cl.Program(ctx, KERNEL).build()
+    kernel = cl.Kernel(program, 'stress')
+    print(f"Устройство: {device.name.strip()} ({device.platform.name.strip()})", flush=True)
+
+    iterations = max(0, round(flops_per_byte * BYTES_PER_ELEMENT / FLOPS_PER_ITERATION))
+    elements = size_mb * 2 ** 20 // 4
+    host = np.random.default_rng(0).random(elements, dtype=np.float32)
+    mf = cl.mem_flags
+    buffers = [cl.Buffer(ctx, mf.READ_WRITE | mf.COPY_HOST_PTR, hostbuf=host),
+               cl.Buffer(ctx, mf.READ_WRITE, size=host.nbytes)]
+
+    def launch(count):
+        for _ in range(count):
+            kernel(queue, (elements,), None, buffers[0], buffers[1], np.int32(iterations))
+            buffers.reverse()
+
+    # Прогрев: компиляция под устройство и оценка времени одного запуска
+    started = time.perf_counter()
+    launch(1)
+    queue.finish()
+    batch = max(1, int(BATCH_SECONDS / max(time.perf_counter() - started, 1e-6)))
+
+    deadline = STARTED + duration - 1.0  # Запас на проверку и вывод результата
+    launches = 0
+    elapsed = 0.0
+    while not _stop and time.monotonic() < deadline:
+        started = time.perf_counter()
+        launch(batch)
+        queue.finish()
+        spent = time.perf_counter() - started
+        elapsed += spent
+        launches += batch
+        # Пачка подстраивается так, чтобы занимать около BATCH_SECONDS
+        batch = max(1, int(batch * BATCH_SECONDS / max(spent, 1e-6)))
+        progress = min(99, int((time.monotonic() - STARTED) / duration * 100))
+        print(f"PROGRESS:{progress}%", flush=True)
+
+    # Проверка: один запуск из исходных данных и сравнение с NumPy на части элементов
+    check = cl.Buffer(ctx, mf.READ_WRITE | mf.COPY_HOST_PTR, hostbuf=host)
+    kernel(queue, (elements,), None, check, buffers[1], np.int32(iterations))
+    result = np.empty_like(host)
+    cl.enqueue_copy(queue, result, buffers[1])
+    queue.finish()
+    sample = slice(0, min(elements, 65536))
+    valid = bool(np.allclose(result[sample], reference(host[sample], iterations), rtol=1e-3, atol=1e-4))
+
+    return {
+        'device': device.name.strip(),
+        'platform': device.platform.name.strip(),
+        'elements': elements,
+        'iterations': iterations,
+        'flops_per_byte': FLOPS_PER_ITERATION * iterations / BYTES_PER_ELEMENT,
+        'launches': launches,
+        'seconds': elapsed,
+        'gflops': launches * elements * iterations * FLOPS_PER_ITERATION / max(elapsed, 1e-9) / 1e9,
+        'gbps': launches * elements * BYTES_PER_ELEMENT / max(elapsed, 1e-9) / 1e9,
+        'valid': valid,
+    }
+
+
+def print_report(report):
+    print(f"RESULT:Устройство:{report['device']} ({report['platform']})")
+    print(f"RESULT:Вычисления:{report['gflops']:.1f} GFLOPS при {report['flops_per_byte']:g} FLOP/байт")
+    print(f"RESULT:Память:{report['gbps']:.1f} ГБ/с")
+    print(f"RESULT:Запусков ядра:{report['launches']} за {report['seconds']:.1f} с")
+    if not report['valid']:
+        print("ERROR:результат вычислений на устройстве не совпадает с эталоном")
 
-def stress_gpu():
-    try:
-        import pyopencl as cl
-        ctx = cl.create_some_context()
-        queue = cl.CommandQueue(ctx)
-        
-        # Простое ядро для нагрузки
-        prg = cl.Program(ctx, """
-        __kernel void test(__global float *a) {
-            int i = get_global_id(0);
-            a[i] = a[i] * a[i];
-        }
-        """).build()
-        
-        import numpy as np
-        a = np.random.rand(100000).astype(np.float32)
-        a_buf = cl.Buffer(ctx, cl.mem_flags.READ_WRITE, size=a.nbytes)
-        
-        for _ in range(1000):
-            cl.enqueue_copy(queue, a_buf, a)
-            prg.test(queue, a.shape, None, a_buf)
-            cl.enqueue_copy(queue, a, a_buf)
-            
-    except ImportError:
-        print("pyopencl не установлен")
-        while True:
-            time.sleep(1)
 
 def handle_signal(signum, frame):
-    sys.exit(0)
+    # Цикл нагрузки завершается, результат выводится
+    global _stop
+    _stop = True
 
 if __name__ == "__main__":
     signal.signal(signal.SIGTERM, handle_signal)
     signal.signal(signal.SIGINT, handle_signal)
-    stress_gpu()
\ No newline at end of file
+
+    parser = argparse.ArgumentParser(description="Тест видеокарты (OpenCL)")
+    parser.add_argument('duration', nargs='?', type=int, default=60, help="длительность, с")
+    parser.add_argument('--device', help="платформа:устройство (например 0:1) или часть названия")
+    parser.add_argument('--flops-per-byte', type=float, default=8.0, help="интенсивность вычислений")
+    parser.add_argument('--size-mb', type=int, default=64, help="размер каждого из двух буферов, МБ")
+    parser.add_argument('--json', help="сохранить результат в JSON")
+    args = parser.parse_args()
+
+    try:
+        report = stress_gpu(args.duration, args.device, args.flops_per_byte, args.size_mb)
+    except ImportError:
+        print("ERROR:pyopencl не установлен")
+        print("PROGRESS:100%")
+        sys.exit(1)
+    except Exception as e:  # Ошибки платформы OpenCL (нет устройств, сбой сборки ядра)
+        print(f"ERROR:{str(e)}")
+        print("PROGRESS:100%")
+        sys.exit(1)
+
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    print("PROGRESS:100%")
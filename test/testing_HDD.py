@@ -0,0 +1,298 @@
+"""Тест дисковой подсистемы: последовательная скорость, IOPS и задержки.
+
+    python test/testing_HDD.py [секунды] [--dir каталог] [--size-mb 1024] [--depths 1,4,16,32]
+                                [--direct] [--fsync none|end|each] [--json результат.json]
+
+Тестовый файл до size-mb мегабайт создаётся на диске каталога --dir (по
+умолчанию TEST_DIR или корневой раздел, который показывает мониторинг
+core/hdd.py), после теста он удаляется. Если сам каталог недоступен для
+записи (например, точка монтирования /), берётся доступный для записи
+каталог на том же устройстве. Замеры:
+- последовательная запись и чтение блоками --block-kb (МБ/с);
+- случайное чтение и запись блоками по 4 КБ при нескольких глубинах
+  очереди (глубина - число потоков, каждый держит один запрос): IOPS и
+  задержки p50/p95/p99/p99.9.
+Все замеры укладываются в заданное число секунд (последовательные
+ограничены по времени, если диск не успевает обработать весь файл),
+строка RESULT выводится сразу после каждого замера.
+
+Кэш страниц учитывается явно: с --direct файл открывается с O_DIRECT
+(буферы выровнены по странице), без него перед каждым чтением данные
+файла сбрасываются на диск и вытесняются из кэша (posix_fadvise
+DONTNEED), а упреждающее чтение отключается. Повторные случайные
+чтения одних и тех же блоков без --direct всё равно могут попасть в
+кэш, поэтому для оценки самого устройства нужен --direct (экран
+тестирования запускает тест с ним). Буферизованный режим - без
+--direct или когда файловая система не поддерживает O_DIRECT - явно
+отмечается в первой строке RESULT.
+--fsync задаёт, когда запись считается завершённой: none - при
+попадании в кэш, end - после fsync в конце теста, each - после fsync
+на каждый запрос.
+"""
+import argparse
+import json
+import mmap
+import os
+import shutil
+import signal
+import sys
+import threading
+import time
+
+import numpy as np
+
+RANDOM_BLOCK = 4096
+FSYNC_MODES = ('none', 'end', 'each')
+PERCENTILES = (50, 95, 99, 99.9)
+
+# Доля длительности на каждый последовательный замер и запас на удаление файла и вывод, с
+SEQUENTIAL_SHARE = 0.15
+RESERVE_SECONDS = 3.0
+MIN_RANDOM_SECONDS = 0.5
+
+
+def _buffer(size, fill=None):
+    """Буфер, выровненный по странице (требование O_DIRECT)."""
+    buf = mmap.mmap(-1, size)
+    buf.write(fill if fill is not None else os.urandom(size))
+    return buf
+
+
+class DiskBenchmark:
+    def __init__(self, directory, size, block, direct=False, fsync='end'):
+        if fsync not in FSYNC_MODES:
+            raise ValueError(f"Неизвестный режим fsync: {fsync}")
+        self.path = os.path.join(directory, f'.disk_benchmark_{os.getpid()}.tmp')
+        self.size = size // block * block
+        self.block = block
+        self.fsync = fsync
+        self.fallback = None  # Причина перехода на буферизованный режим
+        self.direct = direct and self._direct_supported(directory)
+
+    def _direct_supported(self, directory):
+        probe = os.path.join(directory, f'.disk_benchmark_probe_{os.getpid()}')
+        try:
+            fd = os.open(probe, os.O_CREAT | os.O_WRONLY | os.O_DIRECT, 0o600)
+            os.close(fd)
+            return True
+        except OSError as e:
+            self.fallback = f"O_DIRECT не поддерживается ({e})"
+            print(f"ERROR:{self.fallback}, используется буферизованный ввод-вывод", flush=True)
+            return False
+        finally:
+            if os.path.exists(probe):
+                os.remove(probe)
+
+    def _open(self, flags):
+        return os.open(self.path, flags | (os.O_DIRECT if self.direct else 0), 0o600)
+
+    def _drop_cache(self):
+        """Данные файла - на диск и из кэша страниц: следующее чтение идёт с устройства."""
+        if self.direct:
+            return
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+    def sequential_write(self, seconds=None):
+        """Запись файла (не дольше seconds секунд): на медленном диске файл
+        получается меньше size, остальные замеры идут по записанной части."""
+        buf = _buffer(self.block)
+        fd = self._open(os.O_WRONLY | os.O_CREAT | os.O_TRUNC)
+        try:
+            started = time.perf_counter()
+            written = 0
+            while written < self.size:
+                os.pwritev(fd, [buf], written)
+                written += self.block
+                if self.fsync == 'each':
+                    os.fsync(fd)
+                if seconds is not None and time.perf_counter() - started >= seconds:
+                    break
+            if self.fsync == 'end':
+                os.fsync(fd)
+            elapsed = time.perf_counter() - started
+        finally:
+            os.close(fd)
+        self.size = written
+        return written / elapsed
+
+    def sequential_read(self, seconds=None):
+        self._drop_cache()
+        buf = _buffer(self.block, bytes(self.block))
+        fd = self._open(os.O_RDONLY)
+        try:
+            started = time.perf_counter()
+            done = 0
+            while done < self.size:
+                os.preadv(fd, [buf], done)
+                done += self.block
+                if seconds is not None and time.perf_counter() - started >= seconds:
+                    break
+            elapsed = time.perf_counter() - started
+        finally:
+            os.close(fd)
+        return done / elapsed
+
+    def random_io(self, depth, seconds, write=False):
+        """Случайные запросы по 4 КБ в depth потоках: (IOPS, задержки в секундах)."""
+        self._drop_cache()
+        fd = self._open(os.O_RDWR if write else os.O_RDONLY)
+        # Без упреждающего чтения соседних страниц
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_RANDOM)
+        blocks = self.size // RANDOM_BLOCK
+        deadline = time.perf_counter() + seconds
+        latencies = [[] for _ in range(depth)]
+
+        def worker(number):
+            buf = _buffer(RANDOM_BLOCK)
+            offsets = np.random.default_rng(number).integers(0, blocks, 65536) * RANDOM_BLOCK
+            done = latencies[number]
+            i = 0
+            while time.perf_counter() < deadline:
+                offset = int(offsets[i % len(offsets)])
+                started = time.perf_counter_ns()
+                if write:
+                    os.pwritev(fd, [buf], offset)
+                    if self.fsync == 'each':
+                        os.fdatasync(fd)
+                else:
+                    os.preadv(fd, [buf], offset)
+                done.append(time.perf_counter_ns() - started)
+                i += 1
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(depth)]
+        started = time.perf_counter()
+        try:
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            if write and self.fsync == 'end':
+                os.fsync(fd)
+            elapsed = time.perf_counter() - started
+        finally:
+            os.close(fd)
+        latencies = np.concatenate([np.array(l, dtype=np.int64) for l in latencies]) / 1e9
+        return len(latencies) / elapsed, latencies
+
+    def cleanup(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _percentiles(latencies):
+    if len(latencies) == 0:
+        return dict.fromkeys(f"p{p:g}" for p in PERCENTILES)
+    return {f"p{p:g}": float(v) for p, v in zip(PERCENTILES, np.percentile(latencies, PERCENTILES))}
+
+
+def writable_directory(path):
+    """Каталог для тестового файла на том же диске, что и path.
+
+    Точка монтирования обычно недоступна для записи (или засорять её
+    не стоит), поэтому для неё берётся первый доступный для записи
+    каталог того же устройства: /var/tmp, домашний, текущий, сам path.
+    """
+    device = os.stat(path).st_dev
+    candidates = ['/var/tmp', os.path.expanduser('~'), os.getcwd(), path]
+    if not os.path.ismount(path):
+        candidates.insert(0, path)
+    for directory in candidates:
+        if os.path.isdir(directory) and os.access(directory, os.W_OK) and os.stat(directory).st_dev == device:
+            return directory
+    raise OSError(f"на диске {path} нет каталога, доступного для записи")
+
+
+def _mode_text(bench):
+    if bench.direct:
+        return 'O_DIRECT (в обход кэша страниц)'
+    reason = bench.fallback or 'запуск без --direct'
+    return f"БУФЕРИЗОВАННЫЙ ({reason}): результаты могут включать кэш страниц ОС"
+
+
+def _print_sequential(name, rate):
+    print(f"RESULT:{name}:{rate / 2 ** 20:.1f} МБ/с", flush=True)
+
+
+def _print_random(r):
+    name = 'Случайное чтение' if r['operation'] == 'read' else 'Случайная запись'
+    latency = ', '.join(f"{key} {value * 1e6:.0f}" for key, value in r.items()
+                        if key.startswith('p') and value is not None)
+    print(f"RESULT:{name} 4К, QD{r['depth']}:{r['iops']:,.0f} IOPS; задержки, мкс: {latency}", flush=True)
+
+
+def run_benchmark(directory, duration=60, size=1024 * 2 ** 20, block=2 ** 20, depths=(1, 4, 16, 32),
+                  direct=False, fsync='end'):
+    """Все замеры за duration секунд; результат каждого выводится сразу.
+
+    Последовательные запись и чтение - не дольше 15% длительности каждая,
+    случайные тесты делят оставшееся время поровну (с запасом на
+    удаление файла и вывод).
+    """
+    deadline = time.monotonic() + duration - RESERVE_SECONDS
+    directory = writable_directory(directory)
+    # Тестовый файл не больше 10% свободного места
+    size = min(size, shutil.disk_usage(directory).free // 10)
+    bench = DiskBenchmark(directory, size, block, direct, fsync)
+    steps = 2 + 2 * len(depths)
+    report = {'path': directory, 'direct': bench.direct, 'fallback': bench.fallback, 'fsync': fsync, 'random': []}
+    print(f"RESULT:Режим:{_mode_text(bench)}, fsync: {fsync}", flush=True)
+    try:
+        report['seq_write'] = bench.sequential_write(duration * SEQUENTIAL_SHARE)
+        report['size'] = bench.size
+        _print_sequential('Последовательная запись', report['seq_write'])
+        print(f"RESULT:Тестовый файл:{bench.size / 2 ** 20:.0f} МБ в {directory}", flush=True)
+        print(f"PROGRESS:{100 // steps}%", flush=True)
+        report['seq_read'] = bench.sequential_read(duration * SEQUENTIAL_SHARE)
+        _print_sequential('Последовательное чтение', report['seq_read'])
+        print(f"PROGRESS:{200 // steps}%", flush=True)
+        step = 2
+        for write in (False, True):
+            for depth in depths:
+                # Оставшееся время делится поровну между оставшимися замерами
+                seconds = max(MIN_RANDOM_SECONDS, (deadline - time.monotonic()) / (steps - step))
+                iops, latencies = bench.random_io(depth, seconds, write)
+                result = {'operation': 'write' if write else 'read', 'depth': depth,
+                          'iops': iops, **_percentiles(latencies)}
+                report['random'].append(result)
+                _print_random(result)
+                step += 1
+                print(f"PROGRESS:{100 * step // steps}%", flush=True)
+    finally:
+        bench.cleanup()
+    return report
+
+
+def handle_signal(signum, frame):
+    print("PROGRESS:100%")
+    sys.exit(0)
+
+if __name__ == "__main__":
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    parser = argparse.ArgumentParser(description="Тест дисковой подсистемы")
+    parser.add_argument('duration', nargs='?', type=int, default=60, help="примерная длительность, с")
+    parser.add_argument('--dir', default=os.getenv('TEST_DIR') or '/', help="каталог на тестируемом диске")
+    parser.add_argument('--size-mb', type=int, default=1024, help="размер тестового файла, МБ")
+    parser.add_argument('--block-kb', type=int, default=1024, help="блок последовательных операций, КБ")
+    parser.add_argument('--depths', default='1,4,16,32', help="глубины очереди случайных операций")
+    parser.add_argument('--direct', action='store_true', help="O_DIRECT в обход кэша страниц")
+    parser.add_argument('--fsync', choices=FSYNC_MODES, default='end')
+    parser.add_argument('--json', help="сохранить результат в JSON")
+    args = parser.parse_args()
+
+    try:
+        report = run_benchmark(args.dir, args.duration, args.size_mb * 2 ** 20, args.block_kb * 1024,
+                               [int(d) for d in args.depths.split(',')], args.direct, args.fsync)
+    except OSError as e:
+        print(f"ERROR:{str(e)}")
+    else:
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(report, f, indent=2)
+    print("PROGRESS:100%")
@@ -1,29 +1,269 @@
-import random
-import time
+"""Тест оперативной памяти: пропускная способность и поиск ошибок.
+
+    python test/testing_RAM.py [секунды] [--percent 25] [--workers N] [--json результат.json]
+
+Тестируется percent процентов доступной памяти, разделённые между
+workers процессами (по умолчанию - по числу ядер, чтобы загрузить все
+каналы памяти). Каждый процесс по кругу до конца времени:
+- записывает образец «бегущий бит» (одна единица или один ноль в
+  64-битном слове, позиция сдвигается с каждым проходом) и проверяет его;
+- записывает в каждое слово его собственный адрес (индекс) и проверяет -
+  так находятся ошибки адресации, которые одинаковый образец не видит;
+- копирует одну половину буфера в другую.
+Запись, чтение, копирование и проверка выполняются целыми блоками
+NumPy, по ним считается пропускная способность в ГБ/с; проверка -
+сравнение блоков с образцом, несовпадения выводятся строками MEM_ERROR.
+"""
+import argparse
+import json
+import multiprocessing
+import os
 import signal
 import sys
-from datetime import datetime
+import time
+from queue import Empty
+
+import numpy as np
+import psutil
+
+# Слов (uint64) в блоке проверки: временные массивы сравнения не больше 32 МБ
+BLOCK_WORDS = 4 * 1024 * 1024
+MAX_REPORTED_ERRORS = 10
+
+# Замеряемые операции; verify - чтение со сравнением с образцом
+OPERATIONS = ('write', 'read', 'copy', 'verify')
+
+_stop = False
+
+
+def _blocks(words):
+    """Блоки массива words по BLOCK_WORDS слов: (смещение в словах, блок)."""
+    for start in range(0, len(words), BLOCK_WORDS):
+        yield start, words[start:start + BLOCK_WORDS]
+
+
+class _Worker:
+    """Буфер одного процесса, счётчики байтов/времени по операциям и ошибки."""
+
+    def __init__(self, number, words):
+        self.number = number
+        self.words = np.empty(words, dtype=np.uint64)
+        self.words.fill(0)  # Страницы выделяются до замеров
+        self.index = np.arange(BLOCK_WORDS, dtype=np.uint64)
+        self.expected = np.empty(BLOCK_WORDS, dtype=np.uint64)
+        self.bytes = dict.fromkeys(OPERATIONS, 0)
+        self.seconds = dict.fromkeys(OPERATIONS, 0.0)
+        self.errors = 0
+        self.first_error = None
+
+    def _timed(self, operation, nbytes, started):
+        self.bytes[operation] += nbytes
+        self.seconds[operation] += time.perf_counter() - started
+
+    def _report(self, offset, block, expected, pattern):
+        bad = np.flatnonzero(block != expected)
+        if self.first_error is None:
+            self.first_error = time.time()
+        self.errors += len(bad)
+        for i in bad[:MAX_REPORTED_ERRORS].tolist():
+            address = (offset + i) * 8
+            value = int(block[i])
+            wrong = int(expected if np.isscalar(expected) else expected[i])
+            print(f"MEM_ERROR:процесс {self.number}, {pattern}, смещение 0x{address:x}: "
+                  f"ожидалось 0x{wrong:016x}, прочитано 0x{value:016x}, биты 0x{wrong ^ value:016x}", flush=True)
+
+    def walking_bit(self, step):
+        """Бегущая единица (чётные проходы) или бегущий ноль (нечётные)."""
+        pattern = np.uint64(1 << (step // 2 % 64))
+        if step % 2:
+            pattern = ~pattern
+        started = time.perf_counter()
+        self.words.fill(pattern)
+        self._timed('write', self.words.nbytes, started)
+
+        # Чистое чтение: XOR всех слов (результат нужен только чтобы чтение не пропустить)
+        started = time.perf_counter()
+        for _, block in _blocks(self.words):
+            np.bitwise_xor.reduce(block)
+        self._timed('read', self.words.nbytes, started)
+
+        started = time.perf_counter()
+        for offset, block in _blocks(self.words):
+            if not np.array_equal(block, np.broadcast_to(pattern, block.shape)):
+                self._report(offset, block, pattern, f"бегущий бит 0x{int(pattern):016x}")
+        self._timed('verify', self.words.nbytes, started)
+
+    def address_in_address(self):
+        """В каждом слове - его индекс в буфере."""
+        started = time.perf_counter()
+        for offset, block in _blocks(self.words):
+            np.add(self.index[:len(block)], np.uint64(offset), out=block)
+        self._timed('write', self.words.nbytes, started)
+
+        started = time.perf_counter()
+        for offset, block in _blocks(self.words):
+            expected = self.expected[:len(block)]
+            np.add(self.index[:len(block)], np.uint64(offset), out=expected)
+            if not np.array_equal(block, expected):
+                self._report(offset, block, expected, "адрес в адресе")
+        self._timed('verify', self.words.nbytes, started)
+
+    def copy(self):
+        """Копирование половины буфера в другую (считаются прочитанные и записанные байты, как в STREAM)."""
+        half = len(self.words) // 2
+        started = time.perf_counter()
+        np.copyto(self.words[half:2 * half], self.words[:half])
+        self._timed('copy', 2 * self.words[:half].nbytes, started)
+
+    def result(self):
+        return {
+            'bytes': self.bytes,
+            'seconds': self.seconds,
+            'errors': self.errors,
+            'first_error': self.first_error,
+        }
+
+
+def _run_worker(number, words, deadline, queue):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Обработчик SIGTERM родителя унаследован при fork: процесс должен завершаться по terminate()
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    worker = _Worker(number, words)
+    step = 0
+    while time.time() < deadline:
+        worker.walking_bit(step)
+        queue.put(('status', number, worker.result()))
+        if time.time() >= deadline:
+            break
+        worker.address_in_address()
+        worker.copy()
+        queue.put(('status', number, worker.result()))
+        step += 1
+    queue.put(('done', number, worker.result()))
+
+
+def _summarize(results, workers, words, started):
+    """Отчёт по последним состояниям процессов (в том числе незавершённых)."""
+    # Процессы работают одновременно: общая скорость - сумма скоростей процессов
+    report = {'workers': workers, 'bytes_per_worker': words * 8, 'bandwidth': {}}
+    for operation in OPERATIONS:
+        report['bandwidth'][operation] = sum(
+            r['bytes'][operation] / r['seconds'][operation] for r in results.values() if r['seconds'][operation]) / 1e9
+    report['errors'] = [results[i]['errors'] if i in results else 0 for i in range(workers)]
+    first = [r['first_error'] for r in results.values() if r['first_error'] is not None]
+    report['time_to_first_error'] = min(first) - started if first else None
+    return report
+
+
+def stress_memory(duration=60, percent=25.0, workers=None):
+    """Тест percent процентов доступной памяти в workers процессах в течение duration секунд.
+
+    Промежуточные результаты выводятся строками RESULT раз в секунду. По
+    сигналу остановки (handle_signal) процессы завершаются, отчёт строится
+    по уже выполненным проходам (report['interrupted']). Упавшие процессы -
+    в report['failed'].
+    """
+    workers = workers or os.cpu_count()
+    total = int(psutil.virtual_memory().available * percent / 100)
+    words = max(total // workers // 8, 2)
+    print(f"Память: {words * 8 * workers / 2 ** 30:.2f} ГБ в {workers} процессах", flush=True)
+
+    started = time.time()
+    deadline = started + duration
+    queue = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=_run_worker, args=(i, words, deadline, queue), daemon=True)
+                 for i in range(workers)]
+    for p in processes:
+        p.start()
+
+    results = {}
+    finished = set()
+    failed = {}
+    printed = time.monotonic()
+    while len(finished) + len(failed) < workers and not _stop:
+        try:
+            kind, number, result = queue.get(timeout=0.5)
+        except Empty:
+            kind = None
+        if kind is not None:
+            results[number] = result
+            if kind == 'done':
+                finished.add(number)
+        for number, p in enumerate(processes):
+            if number in finished or number in failed or p.is_alive():
+                continue
+            # Итог 'done' отправляется до выхода; без него при пустой очереди процесс упал
+            if p.exitcode != 0 or kind is None:
+                failed[number] = f"процесс {number} завершился с кодом {p.exitcode}"
+                print(f"ERROR:{failed[number]}", flush=True)
+        if time.monotonic() - printed >= 1.0:
+            printed = time.monotonic()
+            print_results(_summarize(results, workers, words, started))
+            print(f"PROGRESS:{min(99, int((time.time() - started) / duration * 100))}%", flush=True)
+
+    for p in processes:
+        if p.is_alive():
+            p.terminate()
+        p.join(1)
+    report = _summarize(results, workers, words, started)
+    report['failed'] = failed
+    report['interrupted'] = _stop
+    return report
+
+
+def print_results(report):
+    """Строки RESULT: скорость по операциям и ошибки."""
+    bandwidth = report['bandwidth']
+    print(f"RESULT:Запись:{bandwidth['write']:.2f} ГБ/с")
+    print(f"RESULT:Чтение:{bandwidth['read']:.2f} ГБ/с")
+    print(f"RESULT:Копирование:{bandwidth['copy']:.2f} ГБ/с")
+    print(f"RESULT:Проверка:{bandwidth['verify']:.2f} ГБ/с")
+    errors = sum(report['errors'])
+    if errors:
+        print(f"RESULT:Ошибки памяти:{errors}, первая через {report['time_to_first_error']:.1f} с")
+    else:
+        print("RESULT:Ошибки памяти:нет")
+    sys.stdout.flush()
+
+
+def print_report(report):
+    print_results(report)
+    errors = sum(report['errors'])
+    if errors:
+        print(f"ERROR:ошибок памяти {errors} (по процессам: {report['errors']}), "
+              f"первая через {report['time_to_first_error']:.1f} с")
+    else:
+        print("Ошибок памяти не найдено")
+    if report['interrupted']:
+        print("Тест остановлен досрочно, результат - по выполненным проходам")
 
-def stress_memory(duration=60, size_mb=1024):
-    start_time = time.time()
-    try:
-        data = bytearray(size_mb * 1024 * 1024)
-        while time.time() - start_time < duration:
-            for i in range(0, len(data), 4096):  # Изменяем каждую 4K страницу
-                data[i] = random.randint(0, 255)
-            progress = int(((time.time() - start_time) / duration) * 100)
-            print(f"PROGRESS:{progress}%")
-            time.sleep(0.5)
-    except Exception as e:
-        print(f"ERROR:{str(e)}")
-    print("PROGRESS:100%")
 
 def handle_signal(signum, frame):
-    print("PROGRESS:100%")
-    sys.exit(0)
+    # Цикл ожидания завершается, отчёт выводится по уже выполненным проходам
+    global _stop
+    _stop = True
 
 if __name__ == "__main__":
     signal.signal(signal.SIGTERM, handle_signal)
     signal.signal(signal.SIGINT, handle_signal)
-    duration = int(sys.argv[1]) if len(sys.argv) > 1 else 60
-    stress_memory(duration)
\ No newline at end of file
+
+    parser = argparse.ArgumentParser(description="Тест оперативной памяти")
+    parser.add_argument('duration', nargs='?', type=int, default=60, help="длительность, с")
+    parser.add_argument('--percent', type=float, default=25.0, help="процент доступной памяти")
+    parser.add_argument('--workers', type=int, help="число процессов (по умолчанию - все ядра)")
+    parser.add_argument('--json', help="сохранить результат в JSON")
+    args = parser.parse_args()
+
+    try:
+        report = stress_memory(args.duration, args.percent, args.workers)
+    except (MemoryError, OSError) as e:
+        print(f"ERROR:{str(e)}")
+        print("PROGRESS:100%")
+        sys.exit(1)
+
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    print("PROGRESS:100%")
+    sys.exit(1 if sum(report['errors']) or report['failed'] else 0)
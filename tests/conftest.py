@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+
+import data.model.model as model_module
+import data.model.online as online
+from data.model.model import FEATURES
+from data.model.naive_bayes import GaussianNBStats
+
+
+@pytest.fixture
+def model_files(tmp_path, monkeypatch):
+    # Небольшая модель с границами классов посреди диапазона признаков
+    rng = np.random.default_rng(0)
+    X = rng.uniform(0, 100, size=(3000, len(FEATURES)))
+    y = np.digitize(X[:, 0] + X[:, 1], [90, 130])
+    GaussianNBStats(len(FEATURES)).update(X, y).to_model(FEATURES).save(tmp_path / 'model.json')
+    monkeypatch.setattr(model_module, 'MODEL_FILE', tmp_path / 'model.json')
+    monkeypatch.setattr(online, 'MODEL_FILE', tmp_path / 'model.json')
+    monkeypatch.setattr(model_module, 'ONLINE_MODEL_FILE', tmp_path / 'online.json')
+    return tmp_path
@@ -0,0 +1,49 @@
+import numpy as np
+
+from core.history import METRICS
+from data.logs.binlog import (
+    HEADER_SIZE, NO_STATE, RECORD_DTYPE, STATE_CODES, BinaryLogWriter, BufferedLogWriter,
+    make_records, open_log, read_log,
+)
+
+
+def test_written_records_read_back_through_memmap(tmp_path):
+    path = str(tmp_path / 'log.bin')
+    rng = np.random.default_rng(0)
+    timestamps = 1_700_000_000 + np.arange(1000)
+    values = rng.uniform(0, 100, size=(1000, 6)).astype(np.float32)
+    values[::7, 2] = np.nan
+    states = rng.integers(-1, 4, size=1000).astype(np.int8)
+
+    with BufferedLogWriter(path, batch_size=64) as writer:
+        writer.write(make_records(timestamps[:600], values[:600], states[:600]))
+        for t, row, state in zip(timestamps[600:].tolist(), values[600:].tolist(), states[600:].tolist()):
+            row = [None if v != v else v for v in row]
+            writer.append(t, row, None if state == NO_STATE else list(STATE_CODES)[state])
+
+    records = open_log(path)
+    assert isinstance(records, np.memmap) and len(records) == 1000
+    assert np.array_equal(records['timestamp'], timestamps)
+    assert np.array_equal(records['system_state'], states)
+    stored = np.column_stack([records[name] for name in METRICS])
+    assert np.array_equal(stored, values, equal_nan=True)
+
+    frame = read_log(path)
+    assert frame['gpu_usage'].isna().sum() == len(range(0, 1000, 7))
+    assert frame['system_state'].isna().sum() == (states == NO_STATE).sum()
+
+
+def test_torn_record_is_dropped_before_append(tmp_path):
+    path = str(tmp_path / 'log.bin')
+    with BinaryLogWriter(path) as writer:
+        writer.append(100, [1, 2, 3, 4, 5, 6], 'Normal')
+    # Обрыв записи посередине, как при сбое питания
+    with open(path, 'ab') as f:
+        f.write(b'\x01' * (RECORD_DTYPE.itemsize // 2))
+    with BinaryLogWriter(path) as writer:
+        writer.append(101, [6, 5, 4, 3, 2, 1], 'Warning')
+
+    records = open_log(path)
+    assert (tmp_path / 'log.bin').stat().st_size == HEADER_SIZE + 2 * RECORD_DTYPE.itemsize
+    assert records['timestamp'].tolist() == [100, 101]
+    assert records['cpu_usage'].tolist() == [1.0, 6.0]
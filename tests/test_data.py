@@ -0,0 +1,19 @@
+import numpy as np
+
+from data.data import STATES, generate_balanced_data, iter_chunks
+from data.logs.binlog import read_log
+
+
+def test_generate_balanced_data_is_exactly_balanced(tmp_path):
+    path = str(tmp_path / 'balanced.csv')
+    generate_balanced_data(path, rows_per_class=200, seed=1)
+
+    frame = read_log(path)
+    assert len(frame) == 600
+    assert frame['system_state'].value_counts().to_dict() == {state: 200 for state in STATES}
+
+
+def test_exact_counts_hold_across_chunks():
+    labels = np.concatenate([labels for _, _, labels in
+                             iter_chunks(1001, seed=0, ratios=(5, 3, 2), chunksize=97, exact_counts=True)])
+    assert np.bincount(labels).tolist() == [501, 300, 200]
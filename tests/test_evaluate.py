@@ -0,0 +1,45 @@
+import json
+
+import numpy as np
+import pytest
+
+from data.data import iter_chunks
+from data.model.evaluate import NaiveBayesCandidate
+from data.model.naive_bayes import NumpyGaussianNB
+
+
+@pytest.fixture
+def artifact(tmp_path):
+    _, X, y = next(iter_chunks(3000, seed=0, noise=2.0))
+    candidate = NaiveBayesCandidate().fit(X, y)
+    path = tmp_path / 'naive_bayes.json'
+    path.write_bytes(candidate.artifact())
+    return path, candidate, X
+
+
+def test_artifact_loads_with_identical_predictions(artifact):
+    path, candidate, X = artifact
+    assert np.array_equal(NumpyGaussianNB.load(path).predict(X), candidate.predict(X))
+
+
+def _shift_theta(data):
+    data['params']['theta'][0][0] += 1e-6
+
+
+def _swap_classes(data):
+    data['params']['classes'].reverse()
+
+
+def _bump_schema(data):
+    data['schema_version'] += 1
+
+
+@pytest.mark.parametrize('tamper', [_shift_theta, _swap_classes, _bump_schema])
+def test_tampered_artifact_is_rejected(artifact, tamper):
+    path, _, _ = artifact
+    data = json.loads(path.read_text())
+    tamper(data)
+    path.write_text(json.dumps(data))
+
+    with pytest.raises(ValueError):
+        NumpyGaussianNB.load(path)
@@ -0,0 +1,64 @@
+import math
+
+import numpy as np
+
+from core.history import MetricsStore
+from core.sampler import SamplingEngine
+
+
+class FakeEngine(SamplingEngine):
+    """Сборщик с постоянными значениями вместо датчиков."""
+
+    COLLECTORS = {
+        'cpu': lambda: {'usage': 10.0, 'temperatures': {'coretemp': [{'current': 50.0}]}},
+        'gpu': lambda: [{'load': 40.0, 'temperature': 60.0}],
+        'ram': lambda: {'percent': 30.0},
+        'hdd': lambda: {'percent': 20.0},
+        'voltage': lambda: {},
+    }
+
+
+def test_partial_tick_writes_nan_for_uncollected_metrics():
+    history = MetricsStore(tiers=((0, 100), (3600, 10)))
+    # CPU опрашивается каждый такт, остальные - только в первом
+    engine = FakeEngine(periods={'cpu': 0.0, 'gpu': 3600.0, 'ram': 3600.0, 'hdd': 3600.0}, history=history)
+    engine.set_demand('test', ('cpu', 'gpu', 'ram', 'hdd'))
+    try:
+        first = engine.sample_once()
+        assert first.collected == {'cpu', 'gpu', 'ram', 'hdd'}
+        for _ in range(11):
+            snapshot = engine.sample_once()
+            assert snapshot.collected == {'cpu'}
+            # Снимок по-прежнему отдаёт экранам последние значения
+            assert snapshot.gpu[0]['load'] == 40.0
+    finally:
+        engine.stop()
+
+    _, cpu = history.column('cpu_usage')
+    _, gpu = history.column('gpu_usage')
+    assert len(cpu) == 12 and np.all(cpu == 10.0)
+    assert gpu[0] == 40.0 and np.isnan(gpu[1:]).all()
+
+    # Агрегаты пропускают NaN: одно измерение GPU, двенадцать - CPU
+    history.tiers[1].flush()
+    window = history.window(tier=1)
+    assert window.mean[0, history.metrics.index('gpu_usage')] == 40.0
+    assert window.max[0, history.metrics.index('ram_usage')] == 30.0
+
+    latest = history.latest()
+    assert latest['gpu_usage'] == 40.0 and latest['cpu_usage'] == 10.0
+
+
+def test_windowed_features_count_only_measured_samples():
+    from core.features import WindowedFeatures
+
+    history = MetricsStore()
+    features = history.attach(WindowedFeatures(windows=(60.0,)))
+    history.append(100.0, [10, 50, 40, 60, 20, 30])
+    for t in range(101, 106):
+        history.append(float(t), [12, 52, math.nan, math.nan, math.nan, math.nan])
+
+    stats = features.window(60.0)
+    counts = dict(zip(features.metrics, stats.count.tolist()))
+    assert counts['cpu_usage'] == 6 and counts['gpu_usage'] == 1
+    assert stats.mean[features.metrics.index('gpu_usage')] == 40.0
@@ -0,0 +1,35 @@
+import sys
+
+import pandas as pd
+
+import data.logs.log as log
+from data.logs.binlog import CSV_HEADER, is_binary_log, read_log
+
+
+def test_existing_csv_target_keeps_csv_format(tmp_path, monkeypatch):
+    path = tmp_path / 'system_data.csv'
+    path.write_text(','.join(CSV_HEADER) + '\n2024-01-01 12:00:00,10.0,50.0,20.0,55.0,40.0,30.0,Normal\n')
+    monkeypatch.setenv('FILENAME', str(path))
+    monkeypatch.setattr(sys, 'argv', ['log'])
+    monkeypatch.setattr(log, 'collect_sample', lambda: [12.5, 51.0, None, None, 40.0, 31.0])
+
+    log.main()
+
+    assert not is_binary_log(path)
+    frame = read_log(str(path))
+    assert list(frame.columns) == CSV_HEADER
+    assert len(frame) == 2
+    last = frame.iloc[-1]
+    assert last['cpu_usage'] == 12.5 and pd.isna(last['gpu_usage'])
+    assert last['system_state'] == log.state_of([12.5, 51.0, None, None, 40.0, 31.0])
+
+
+def test_new_bin_target_is_binary(tmp_path, monkeypatch):
+    path = tmp_path / 'system_data.bin'
+    monkeypatch.setattr(sys, 'argv', ['log', str(path)])
+    monkeypatch.setattr(log, 'collect_sample', lambda: [12.5, 51.0, 20.0, 55.0, 40.0, 31.0])
+
+    log.main()
+
+    assert is_binary_log(path)
+    assert len(read_log(str(path))) == 1
@@ -0,0 +1,31 @@
+import numpy as np
+
+from data.model.model import FEATURES, DiagnosticModel
+
+
+def test_cached_predictions_match_uncached(model_files):
+    cached = DiagnosticModel(cache_size=4096)
+    uncached = DiagnosticModel(cache_size=0)
+
+    # Точка на границе классов: бисекция между отсчётами Normal и Warning
+    low, high = np.full(len(FEATURES), 20.0), np.full(len(FEATURES), 20.0)
+    high[:2] = 80.0
+    assert uncached.predict(*low) != uncached.predict(*high)
+    for _ in range(60):
+        middle = (low + high) / 2
+        if uncached.predict(*middle) == uncached.predict(*low):
+            low = middle
+        else:
+            high = middle
+    # Два значения одной ячейки кэша по разные стороны границы
+    below, above = low - 1e-3, high + 1e-3
+    key = cached.cache.key(below)
+    assert cached.cache.key(above) == key
+    assert uncached.predict(*below) != uncached.predict(*above)
+
+    expected = uncached.predict(*cached.cache.center(key))
+    for first, second in ((below, above), (above, below)):
+        cached.cache.clear()
+        # Результат не зависит от того, какое значение ячейки пришло первым
+        assert cached.predict(*first) == cached.predict(*second) == expected
+    assert cached.cache_info()['hits'] == 2
@@ -0,0 +1,40 @@
+import numpy as np
+
+from data.data import iter_chunks
+from data.model.model import FEATURES, DiagnosticModel
+from data.model.naive_bayes import GaussianNBStats
+
+
+def _dataset():
+    chunks = list(iter_chunks(5000, seed=0, noise=2.0, chunksize=1300))
+    return chunks, np.concatenate([X for _, X, _ in chunks]), np.concatenate([y for _, _, y in chunks])
+
+
+def test_merged_stats_equal_single_fit():
+    chunks, X, y = _dataset()
+    single = GaussianNBStats(len(FEATURES)).update(X, y).to_model(FEATURES)
+
+    merged = GaussianNBStats(len(FEATURES))
+    for _, part, labels in chunks:
+        merged.merge(GaussianNBStats(len(FEATURES)).update(part, labels))
+    merged = merged.to_model(FEATURES)
+
+    assert np.array_equal(merged.classes_, single.classes_)
+    assert np.allclose(merged.theta_, single.theta_, rtol=1e-12)
+    assert np.allclose(merged.var_, single.var_, rtol=1e-9)
+    assert np.allclose(merged.class_prior_, single.class_prior_)
+    assert np.array_equal(merged.predict(X), single.predict(X))
+
+
+def test_predict_batch_matches_predict(model_files):
+    _, X, _ = _dataset()
+    model = DiagnosticModel(cache_size=0)
+    X = X[:300]
+    X[::11, 3] = np.nan
+
+    codes, proba = model.predict_batch(X)
+    valid = ~np.isnan(X).any(axis=1)
+    assert model.labels(codes[valid]).tolist() == [model.predict(*row) for row in X[valid].tolist()]
+    # Строки с пропусками: код -1 и вероятности NaN
+    assert (codes[~valid] == -1).all() and np.isnan(proba[~valid]).all()
+    assert np.allclose(proba[valid].sum(axis=1), 1.0)
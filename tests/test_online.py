@@ -0,0 +1,39 @@
+import os
+
+import numpy as np
+
+from data.model.model import DiagnosticModel
+from data.model.online import OnlineTrainer, load_checkpoint, previous_path
+
+
+def _train(trainer, rows, seed):
+    rng = np.random.default_rng(seed)
+    for values in rng.uniform(0, 100, size=(rows, 6)):
+        trainer.add(values, 'Normal')
+    assert trainer.checkpoint()
+
+
+def test_corrupt_checkpoint_falls_back_to_previous(model_files):
+    path = str(model_files / 'online.json')
+    trainer = OnlineTrainer(DiagnosticModel(), path=path, checkpoint_interval=1e9, refresh_every=10 ** 9)
+    _train(trainer, 50, seed=0)
+    first_model, first_stats = load_checkpoint(path)
+    _train(trainer, 30, seed=1)
+
+    # Прежняя точка сохранена рядом, временных файлов не осталось
+    _, prev_stats = load_checkpoint(previous_path(path))
+    assert prev_stats.rows == first_stats.rows
+    assert sorted(os.listdir(model_files)) == ['model.json', 'online.json', 'online.json.prev']
+
+    with open(path, 'w') as f:
+        f.write('{"classes": [0, 1')
+
+    diagnostic_model = DiagnosticModel()
+    restored = OnlineTrainer(diagnostic_model, path=path)
+    assert restored.stats.rows == first_stats.rows
+    assert np.array_equal(diagnostic_model.model.theta_, first_model.theta_)
+
+    # rollback() делает предыдущую точку текущей
+    restored.rollback()
+    assert load_checkpoint(path)[1].rows == first_stats.rows
+    assert not os.path.exists(previous_path(path))
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from core.rules import RuleEngine, load_rules
+
+CUSTOM_RULES = {
+    'default': 'Normal',
+    'required': ['cpu_usage'],
+    'rules': [
+        {'state': 'Critical', 'all': [['cpu_usage', '>=', 90, 4], ['cpu_temp', '>', 80]]},
+        {'state': 'Warning', 'any': [['ram_usage', '<=', 20, 5], ['gpu_temp', '>=', 75, 2]]},
+    ],
+}
+
+
+def _without_hysteresis(config):
+    rules = [{key: [condition[:3] for condition in value] if key in ('any', 'all') else value
+              for key, value in rule.items()} for rule in config['rules']]
+    return dict(config, hysteresis={}, rules=rules)
+
+
+def _history(rows=5000, seed=0):
+    """Случайное блуждание метрик через пороги правил, с пропусками."""
+    rng = np.random.default_rng(seed)
+    X = np.cumsum(rng.normal(0, 2.0, size=(rows, 6)), axis=0) % 100
+    X[:, [1, 3]] = 50 + X[:, [1, 3]] / 2  # Температуры 50..100 °C
+    X[rng.random(X.shape) < 0.01] = np.nan
+    return X
+
+
+@pytest.mark.parametrize('config', [load_rules(), CUSTOM_RULES], ids=['default', 'custom'])
+def test_label_matches_sequential_evaluate(config):
+    engine = RuleEngine(config)
+    X = _history()
+
+    expected = []
+    for row in X.tolist():
+        expected.append(engine.evaluate(row))
+    assert engine.label_states(X).tolist() == expected
+    assert set(expected) >= {'Normal', 'Warning', 'Critical', 'Error'}
+    # Гистерезис действительно влияет на разметку
+    assert expected != RuleEngine(_without_hysteresis(config)).label_states(X).tolist()
+
+    # Разметка частями с переносом состояния триггеров совпадает с разметкой целиком
+    levels, active = engine.label(X[:1234])
+    rest, _ = engine.label(X[1234:], active)
+    assert np.array_equal(np.concatenate([levels, rest]), engine.label(X)[0])
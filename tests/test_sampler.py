@@ -0,0 +1,66 @@
+import time
+
+from core.sampler import SamplingEngine
+
+
+def _slow_hdd():
+    time.sleep(1.0)
+    return {'percent': 20.0}
+
+
+class SlowDiskEngine(SamplingEngine):
+    """Сборщик, у которого коллектор диска не укладывается в таймаут."""
+
+    COLLECTORS = {
+        'cpu': lambda: {'usage': 10.0, 'temperatures': {'coretemp': [{'current': 50.0}]}},
+        'gpu': lambda: [{'load': 40.0, 'temperature': 60.0}],
+        'ram': lambda: None,
+        'hdd': _slow_hdd,
+        'voltage': lambda: {},
+    }
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, **values):
+        self.calls.append(values)
+        return "Normal"
+
+
+def test_slow_collector_times_out_with_none():
+    engine = SlowDiskEngine(timeouts={'hdd': 0.1})
+    engine.start()
+    try:
+        started = time.monotonic()
+        snapshot = engine.refresh('test', ('cpu', 'gpu', 'ram', 'hdd'), timeout=5)
+        assert time.monotonic() - started < 0.9
+    finally:
+        engine.stop()
+
+    assert snapshot.hdd is None and snapshot.ram is None
+    assert snapshot.cpu['usage'] == 10.0
+    assert snapshot.collected == {'cpu', 'gpu', 'ram', 'hdd'}
+
+
+def test_diagnostic_thread_treats_missing_collectors_as_unavailable():
+    from gui.main_window import DiagnosticThread
+
+    engine = SlowDiskEngine(timeouts={'hdd': 0.1})
+    engine.start()
+    model = FakeModel()
+    results = []
+    thread = DiagnosticThread(model, engine)
+    thread.finished_signal.connect(lambda components, verdict: results.append((components, verdict)))
+    try:
+        thread.run()
+    finally:
+        engine.stop()
+
+    (components, verdict), = results
+    assert verdict == "Normal"
+    assert components['CURRENT']['disk_usage'] is None and components['CURRENT']['ram_usage'] is None
+    # Недоступные метрики без окна усреднения - нули, как пропуски при обучении
+    assert model.calls == [{'cpu_usage': 10.0, 'cpu_temp': 50.0, 'gpu_usage': 40.0, 'gpu_temp': 60.0,
+                            'disk_usage': 0.0, 'ram_usage': 0.0}]